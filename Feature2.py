@@ -1,42 +1,53 @@
+import datetime
 import streamlit as st
 import pandas as pd
 import numpy as np
 import requests
-import io
-import os
 import plotly.express as px  # type: ignore
-from pathlib import Path
-import openai
+import app_data
+import perf_metrics
+from promotion_engine import promotion_placement, top_k_aisles
+from remote_csv import RemoteCSV
+
+perf_metrics.start_run("Feature2")
 
 # URL of the raw CSV file in the GitHub repository
 url = 'https://raw.githubusercontent.com/ltdeguzman/Feature2/main/heatmapData.csv'
 
-# Fetch the CSV file content
-response = requests.get(url)
-if response.status_code != 200:
-    raise Exception(f"Failed to load data: {response.status_code}")
+# Local copy of the remote CSV, shared by every session and revalidated in the background
+@perf_metrics.cache_resource
+def get_heatmap_source(url):
+    return RemoteCSV(url)
+
+heatmap_source = get_heatmap_source(url)
 
-# Read the CSV content into a DataFrame
-df = pd.read_csv(io.StringIO(response.text))
+# Read the CSV content into a DataFrame (copied, since the snapshot is shared between sessions)
+try:
+    df = heatmap_source.load().copy()
+except requests.RequestException as e:
+    st.error(f"Failed to load data: {e}")
+    st.stop()
+
+if heatmap_source.stale:
+    st.warning("Showing the last downloaded heat map data; the latest version could not be fetched.")
+perf_metrics.checkpoint("load data")
 
 # Simulate a timestamp column
-times = pd.date_range(start='2024-10-27', periods=len(df), freq='H')
+times = pd.date_range(start='2024-10-27', periods=len(df), freq='h')
 df['timestamp'] = times
 
 # Determine promotion placement by finding the aisle with the highest foot traffic for each timestamp
-df['Promotion_Placement'] = df.drop(columns=['timestamp']).idxmax(axis=1)
+promotion_data = promotion_placement(df)
 
 # Melt the DataFrame to get it into long format suitable for time series plotting
 df_melted = df.melt(id_vars=['timestamp'], var_name='aisle', value_name='foot_traffic')
-
-# Filter the data to only include rows where the aisle is the suggested Promotion_Placement
-promotion_data = df_melted[df_melted.apply(lambda row: row['aisle'] == df.loc[df['timestamp'] == row['timestamp'], 'Promotion_Placement'].values[0], axis=1)]
+perf_metrics.checkpoint("promotion placement")
 
 # Title of the heat map table
 st.subheader('Heatmap Data of a Retail Store in Downtown San Jose, California', divider='grey')
 
-# Display the DataFrame without the Promotion Placement column
-st.dataframe(df.drop(columns=['Promotion_Placement']))
+# Display the DataFrame
+st.dataframe(df)
 
 # Create a time series plot for foot traffic, including promotion placement
 time_chart = px.line(df_melted, x='timestamp', y='foot_traffic', color='aisle', title='Foot Traffic in Aisles Over Store Hours')
@@ -46,34 +57,64 @@ time_chart.add_scatter(x=promotion_data['timestamp'], y=promotion_data['foot_tra
 
 # Display the chart
 st.plotly_chart(time_chart)
+perf_metrics.checkpoint("render store charts")
 
-# Display the random data for comparison
+# Display other stores' data for comparison
 st.subheader('Other Retail Store Heat Map Data Comparison in Downtown San Jose, California', divider='grey')
 
-# Generate random data for comparison and add promotion placement suggestion
-random_df = pd.DataFrame(np.random.randn(11, 11), columns=("Aisle %d" % i for i in range(11)))
-random_times = pd.date_range(start='2024-10-27', periods=11, freq='H')
-random_df['timestamp'] = random_times
+# Hourly aisle heat data of the other stores, memory-mapped: only the store and hours picked below are read
+aisle_store = app_data.aisle_store()
+store_names = aisle_store.names()
 
-# Add a promotion placement column for the random data by identifying the highest foot traffic aisle
-random_df['Promotion_Placement'] = random_df.drop(columns=['timestamp']).idxmax(axis=1)
+col1, col2 = st.columns(2)
+with col1:
+    other_store = st.selectbox("Compare with store", store_names)
+first_hour, last_hour = aisle_store.time_range(other_store)
+with col2:
+    date_range = st.date_input("Time range", value=(first_hour.date(), min(first_hour.date() + datetime.timedelta(days=2), last_hour.date())),
+                               min_value=first_hour.date(), max_value=last_hour.date())
 
-# Melt the DataFrame to get it into long format suitable for time series plotting
-random_df_melted = random_df.melt(id_vars=['timestamp'], var_name='aisle', value_name='foot_traffic')
-
-# Filter the random data to include only promotion placement aisles
-random_promotion_data = random_df_melted[random_df_melted.apply(lambda row: row['aisle'] == random_df.loc[random_df['timestamp'] == row['timestamp'], 'Promotion_Placement'].values[0], axis=1)]
+# The picker returns one date while the range is being chosen; the end date is included up to its last hour
+range_start = pd.Timestamp(date_range[0])
+range_end = pd.Timestamp(date_range[-1]) + pd.Timedelta(hours=23)
 
-# Display the random data without the Promotion Placement column
-st.dataframe(random_df.drop(columns=['Promotion_Placement']))
+other_df = aisle_store.frame(other_store, range_start, range_end)
 
-# Create a time series plot for the random data, including promotion placement
-random_time_chart = px.line(random_df_melted, x='timestamp', y='foot_traffic', color='aisle', title='Random Data Foot Traffic in Aisles Over Store Hours')
+# Promotion placement for the other store by identifying the highest foot traffic aisle
+other_promotion_data = promotion_placement(other_df, aisle_columns=aisle_store.aisles)
 
-# Add promotion placement line to the random data plot
-random_time_chart.add_scatter(x=random_promotion_data['timestamp'], y=random_promotion_data['foot_traffic'], mode='lines+markers', name='Promotion Placement', line=dict(dash='dash'))
-
-# Display the random data plot
-st.plotly_chart(random_time_chart)
+# Melt the DataFrame to get it into long format suitable for time series plotting
+other_df_melted = other_df.melt(id_vars=['timestamp'], var_name='aisle', value_name='foot_traffic')
+
+# Display the other store's data
+st.dataframe(other_df)
+
+# Create a time series plot for the other store, including promotion placement
+other_time_chart = px.line(other_df_melted, x='timestamp', y='foot_traffic', color='aisle', title=f'{other_store} Foot Traffic in Aisles Over Store Hours')
+
+# Add promotion placement line to the other store's plot
+other_time_chart.add_scatter(x=other_promotion_data['timestamp'], y=other_promotion_data['foot_traffic'], mode='lines+markers', name='Promotion Placement', line=dict(dash='dash'))
+
+# Display the other store's plot
+st.plotly_chart(other_time_chart)
+perf_metrics.checkpoint("comparison")
+
+# Best promotion aisle across several stores over the same hours, from one (store x hour x aisle) slice
+st.subheader('Promotion Placement Across Stores', divider='grey')
+compared_stores = st.multiselect("Stores", store_names, default=store_names[:10])
+if compared_stores:
+    stacked, _ = aisle_store.stack(compared_stores, range_start, range_end)
+    best_aisles, _ = top_k_aisles(stacked)
+
+    # Share of the hours with readings in which each aisle drew the most foot traffic, per store
+    n_stores, n_aisles = len(compared_stores), len(aisle_store.aisles)
+    has_readings = ~np.isnan(stacked).all(axis=-1)
+    cells = (np.arange(n_stores)[:, np.newaxis] * n_aisles + best_aisles[..., 0])[has_readings]
+    counts = np.bincount(cells, minlength=n_stores * n_aisles).reshape(n_stores, n_aisles)
+    placement_share = pd.DataFrame(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1),
+                                   index=pd.Index(compared_stores, name='store'), columns=aisle_store.aisles)
+    st.bar_chart(placement_share, y_label="Share of hours as the promotion aisle")
+perf_metrics.checkpoint("promotion placement across stores")
+perf_metrics.finish_run()
 
 # This code is generated by ChatGBT & Microsoft CoPilot
@@ -3,20 +3,34 @@ import pandas as pd
 import folium
 from streamlit_folium import st_folium
 from folium.plugins import HeatMap
+import perf_metrics
+from datasets import read_heat_points
+from spatial_index import SpatialIndex
+from heat_binning import build_pyramid_from_frame, cells_for_view, heat_data, view_from_state
 
 # Set page config
 st.set_page_config(page_title="Foot Traffic Heat Map", layout="wide")
+perf_metrics.start_run("Footflow")
 
-# Load Data
-@st.cache_data
-def load_data(file_path):
-    data = pd.read_csv(file_path)
-    return data
+# Heat map cells for every zoom level, binned once per data set
+@perf_metrics.cache_data
+def load_heat_pyramid(data):
+    return build_pyramid_from_frame(data, 'latitude', 'longitude', 'weight')
+
+# Spatial index for traffic inside the current map view, built once per data set
+@perf_metrics.cache_resource
+def load_spatial_index(data):
+    return SpatialIndex(data['latitude'], data['longitude'], data['weight'])
 
 # Input for the data file (upload CSV or choose a sample file path)
 uploaded_file = st.file_uploader("Choose a CSV file with latitude, longitude, and weight columns", type="csv")
 if uploaded_file:
-    data = pd.read_csv(uploaded_file)
+    # Parse the upload once per file; reruns (every pan or zoom of the map is one) reuse it from the session
+    if st.session_state.get('heat_points_file_id') != uploaded_file.file_id:
+        uploaded_file.seek(0)
+        st.session_state['heat_points'] = read_heat_points(uploaded_file)
+        st.session_state['heat_points_file_id'] = uploaded_file.file_id
+    data = st.session_state['heat_points']
 else:
     # Sample synthetic data if no file is uploaded
     data = pd.DataFrame({
@@ -25,17 +39,27 @@ else:
         'weight': [1, 2, 3, 4]
     })
 
+perf_metrics.checkpoint("load data")
+
 # Display data
 st.write("Data Preview", data.head())
 
-# Define the map centered around the average location
-m = folium.Map(location=[data['latitude'].mean(), data['longitude'].mean()], zoom_start=14)
+# Define the map centered around the average location, then follow the user's last pan/zoom
+center, zoom, bounds = view_from_state(st.session_state.get('heat_map'),
+                                       [data['latitude'].mean(), data['longitude'].mean()], 14)
+m = folium.Map(location=center, zoom_start=zoom)
 
-# Add HeatMap layer
-heat_data = [[row['latitude'], row['longitude'], row['weight']] for index, row in data.iterrows()]
-HeatMap(heat_data).add_to(m)
+# Add HeatMap layer with only the binned cells that fit the current view
+pyramid = load_heat_pyramid(data[['latitude', 'longitude', 'weight']])
+HeatMap(heat_data(cells_for_view(pyramid, zoom, bounds))).add_to(m)
+perf_metrics.checkpoint("heat map cells")
 
 # Display map with Streamlit
-st_folium(m, width=700, height=500)
+st_folium(m, width=700, height=500, key='heat_map', returned_objects=['zoom', 'bounds'])
+if bounds is not None:
+    index = load_spatial_index(data[['latitude', 'longitude', 'weight']])
+    st.write(f"**Total weight in the current view:** {index.bbox_total(*bounds):,.0f}")
+perf_metrics.checkpoint("render map")
+perf_metrics.finish_run()
 
 #This has all been ChatGPT assisted
@@ -0,0 +1,174 @@
+# Binary store of per-store (hour x aisle) heat matrices, for comparing a store against many others
+#
+#   python synthetic_data.py aisle --stores 500 --days 90 --out data/
+#   python aisle_store.py data/aisle-*.csv --out .cache/aisle_store
+#
+# Every store's hourly readings sit in one float32 file as a contiguous block of rows on a regular hourly grid
+# (NaN for hours without a reading). The file is memory-mapped on open, and a small JSON index holds each block's
+# first row, first hour and length. Looking up a store and time range is then plain arithmetic plus a slice
+# of the mapped file, so only the pages that slice covers are read from disk.
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+AISLE_STORE_DIR = os.path.join(".cache", "aisle_store")
+STORE_VERSION = 1
+DATA_FILE = "matrices.f32"
+INDEX_FILE = "index.json"
+HOUR = pd.Timedelta(hours=1)
+
+# Seeded synthetic stores served until a store is built from real data (see synthetic_data.generate_aisle_traffic)
+DEMO_STORES = 200
+DEMO_DAYS = 28
+
+
+class AisleStore:
+    def __init__(self, path=AISLE_STORE_DIR):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get('version') != STORE_VERSION:
+            raise ValueError(f"Aisle store at {path} has version {index.get('version')}, expected {STORE_VERSION}")
+
+        self.path = path
+        self.aisles = index['aisles']
+        # store -> (first row in the data file, number of hours, first hour)
+        self.stores = {name: (entry['row'], entry['hours'], pd.Timestamp(entry['start']))
+                       for name, entry in index['stores'].items()}
+        self.data = np.memmap(os.path.join(path, DATA_FILE), dtype=np.float32, mode='r',
+                              shape=(index['rows'], len(self.aisles)))
+
+    def names(self):
+        return list(self.stores)
+
+    # First and last hour of one store's readings, or of every store's
+    def time_range(self, store=None):
+        entries = [self.stores[store]] if store is not None else list(self.stores.values())
+        return (min(first for _, _, first in entries),
+                max(first + (hours - 1) * HOUR for _, hours, first in entries))
+
+    # Data file rows of a store's block covering the hours from start to end (both included, None for open-ended)
+    # and the hour of the first one
+    def _rows(self, store, start=None, end=None):
+        row, hours, first = self.stores[store]
+        lo = 0 if start is None else min(hours, max(0, -((first - pd.Timestamp(start)) // HOUR)))
+        hi = hours if end is None else min(hours, max(lo, (pd.Timestamp(end) - first) // HOUR + 1))
+        return row + lo, row + hi, first + lo * HOUR
+
+    # (hour x aisle) readings of one store as a read-only view of the mapped file, and the hours of its rows
+    def matrix(self, store, start=None, end=None):
+        lo, hi, first = self._rows(store, start, end)
+        return self.data[lo:hi], pd.date_range(first, periods=hi - lo, freq='h')
+
+    # The same slice in the layout of Feature2's heat data: a time column plus one column per aisle
+    def frame(self, store, start=None, end=None, time_column='timestamp'):
+        matrix, hours = self.matrix(store, start, end)
+        frame = pd.DataFrame(np.array(matrix), columns=self.aisles)
+        frame.insert(0, time_column, hours)
+        return frame
+
+    # (store x hour x aisle) readings of several stores on the shared hourly grid from start to end, NaN where
+    # a store has no reading, ready for promotion_engine.top_k_aisles. Returns the array and the grid's hours.
+    def stack(self, stores, start, end):
+        start, end = pd.Timestamp(start).floor('h'), pd.Timestamp(end).floor('h')
+        hours = pd.date_range(start, end, freq='h')
+        stacked = np.full((len(stores), len(hours), len(self.aisles)), np.nan, dtype=np.float32)
+        for i, store in enumerate(stores):
+            lo, hi, first = self._rows(store, start, end)
+            offset = (first - start) // HOUR
+            stacked[i, offset:offset + hi - lo] = self.data[lo:hi]
+        return stacked, hours
+
+
+def _chunks(source, chunksize):
+    if isinstance(source, pd.DataFrame):
+        yield source
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+# Build a store from CSV files (or frames) with a store column, a time column and one column per aisle, rows in
+# any order. Sources are read twice in chunks, once to lay out every store's block and once to fill it in, so
+# no more than one chunk is ever in memory. The new store replaces the one at path in one step; returns it opened.
+def build_aisle_store(sources, path=AISLE_STORE_DIR, store_column='Store', time_column='timestamp',
+                      chunksize=500_000):
+    sources = list(sources)
+
+    # Pass 1: aisle columns and the first and last hour of every store
+    aisles = None
+    bounds = []
+    for source in sources:
+        for chunk in _chunks(source, chunksize):
+            if aisles is None:
+                aisles = [column for column in chunk.columns if column not in (store_column, time_column)]
+            hours = pd.to_datetime(chunk[time_column]).dt.floor('h')
+            bounds.append(hours.groupby(chunk[store_column].astype(str), sort=False).agg(['min', 'max']))
+    if aisles is None:
+        raise ValueError("No rows to build an aisle store from")
+    bounds = pd.concat(bounds).groupby(level=0, sort=False).agg({'min': 'min', 'max': 'max'})
+    lengths = ((bounds['max'] - bounds['min']) // HOUR + 1).astype(np.int64)
+    first_rows = lengths.cumsum() - lengths
+
+    # Pass 2: every reading into its store's block
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    data = np.memmap(os.path.join(tmp_path, DATA_FILE), dtype=np.float32, mode='w+',
+                     shape=(max(int(lengths.sum()), 1), len(aisles)))
+    data[:] = np.nan
+    for source in sources:
+        for chunk in _chunks(source, chunksize):
+            stores = chunk[store_column].astype(str)
+            hours = pd.to_datetime(chunk[time_column]).dt.floor('h')
+            rows = (stores.map(first_rows) + (hours - stores.map(bounds['min'])) // HOUR).to_numpy(dtype=np.int64)
+            data[rows] = chunk[aisles].to_numpy(dtype=np.float32)
+    data.flush()
+    del data
+
+    index = {
+        'version': STORE_VERSION,
+        'aisles': aisles,
+        'rows': max(int(lengths.sum()), 1),
+        'stores': {store: {'row': int(first_rows[store]), 'hours': int(lengths[store]),
+                           'start': bounds.at[store, 'min'].isoformat()}
+                   for store in bounds.index},
+    }
+    with open(os.path.join(tmp_path, INDEX_FILE), "w") as f:
+        json.dump(index, f)
+
+    old_path = f"{path}.old{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return AisleStore(path)
+
+
+# The store at path, built from the seeded demo stores the first time if no store has been built there yet
+def open_aisle_store(path=AISLE_STORE_DIR):
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        from synthetic_data import generate_aisle_traffic
+
+        return build_aisle_store([generate_aisle_traffic(DEMO_STORES, days=DEMO_DAYS)], path)
+    return AisleStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped aisle heat store from hourly CSV files.")
+    parser.add_argument("sources", nargs="+", help="CSV files with a store column, a time column and aisle columns")
+    parser.add_argument("--out", default=AISLE_STORE_DIR)
+    parser.add_argument("--store-column", default="Store")
+    parser.add_argument("--time-column", default="timestamp")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="Rows read from a CSV at a time")
+    args = parser.parse_args()
+
+    store = build_aisle_store(args.sources, args.out, args.store_column, args.time_column, args.chunksize)
+    first, last = store.time_range()
+    print(f"Wrote {len(store.stores)} stores x {len(store.aisles)} aisles ({first} to {last}) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
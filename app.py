@@ -0,0 +1,33 @@
+# Single entry point for every page:  streamlit run app.py
+#
+# Only the selected page's script runs, so its heavy imports (matplotlib, folium, plotly, openai) and data
+# loads happen the first time someone opens that page. All pages share one process, so the datasets and
+# derived stores in app_data.py are loaded once and reused by every page and session.
+import streamlit as st
+
+import app_data
+
+PAGES = {
+    "Foot Traffic": [
+        st.Page("mainPage.py", title="Foot Traffic Heat Map", url_path="heat-map", default=True),
+        st.Page("Footflow.py", title="Heat Map Explorer", url_path="heat-map-explorer"),
+        st.Page("Feature2.py", title="Store Aisle Traffic", url_path="store-aisles"),
+    ],
+    "Planning": [
+        st.Page("footFlow.py", title="Foot Flow", url_path="foot-flow"),
+        st.Page("areaInsights.py", title="Area Insights", url_path="area-insights"),
+        st.Page("inventory_guide_2.py", title="Inventory Guide", url_path="inventory-guide"),
+        st.Page("chatbot.py", title="Restaurant Advisor", url_path="restaurant-advisor"),
+    ],
+}
+
+
+# Load the shared datasets once per process, after the first page has rendered,
+# so the first visit to any other page doesn't wait for them
+@st.cache_resource(show_spinner=False)
+def prewarm():
+    app_data.prewarm()
+
+
+st.navigation(PAGES).run()
+prewarm()
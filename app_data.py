@@ -0,0 +1,120 @@
+import perf_metrics
+from aisle_store import AISLE_STORE_DIR, open_aisle_store
+from business_cube import chunk_spatial_indexes, combine_spatial_indexes, load_cube
+from datasets import (BUSINESS_DATA_FILE, FOOT_TRAFFIC_FILE, PLAZA_FILE, read_business_data, read_foot_traffic,
+                      read_plaza_listings)
+from derived_store import ChunkMemo, file_signature
+from foot_traffic_rollups import load_rollup_state, load_rollups
+from retrieval_index import build_knowledge_index
+from time_index import (ChunkedTimeIndex, business_chunk_indexes, combine_business_indexes,
+                        corridor_chunk_index)
+from traffic_forecast import load_model
+
+# Datasets and their derived stores, loaded once per process and shared by every page and session.
+# The frames are shared between sessions, so treat them as read-only: copy before adding or changing columns.
+
+
+@perf_metrics.cache_resource
+def business_data(file_path=BUSINESS_DATA_FILE):
+    return read_business_data(file_path)
+
+
+@perf_metrics.cache_resource
+def foot_traffic(file_path=FOOT_TRAFFIC_FILE):
+    return read_foot_traffic(file_path)
+
+
+@perf_metrics.cache_resource
+def plaza_listings(file_path=PLAZA_FILE):
+    return read_plaza_listings(file_path)
+
+
+# Pre-aggregated (business type x zip x date) cube, persisted next to the CSV. Rows appended to the file while
+# the app runs are folded into the cube on the next rerun that reads it, at a cost that depends on the new rows.
+def business_cube(file_path=BUSINESS_DATA_FILE):
+    return _business_cube(file_path, file_signature(file_path))
+
+
+@perf_metrics.cache_resource(max_entries=4)
+def _business_cube(file_path, signature):
+    return load_cube(file_path)
+
+
+# Per-corridor foot traffic aggregates, persisted next to the data and kept up to date with appended rows
+def foot_traffic_rollups(file_path=FOOT_TRAFFIC_FILE):
+    return _foot_traffic_rollups(file_path, file_signature(file_path))
+
+
+@perf_metrics.cache_resource(max_entries=4)
+def _foot_traffic_rollups(file_path, signature):
+    return load_rollups(file_path)
+
+
+# Indexes of the chunks of the cube and of the rollups' volume by date, carried over from one version of a file to
+# the next: when rows are appended, only the chunks they added or merged are indexed
+_business_time_parts = ChunkMemo(business_chunk_indexes)
+_corridor_time_parts = ChunkMemo(corridor_chunk_index)
+_business_spatial_parts = ChunkMemo(chunk_spatial_indexes)
+
+
+# Running-total time indexes for date-range and rolling-window queries, built from the cube and the rollup
+# aggregates (not the raw rows)
+def business_time_index(file_path=BUSINESS_DATA_FILE):
+    return _business_time_index(file_path, file_signature(file_path))
+
+
+@perf_metrics.cache_resource(max_entries=4)
+def _business_time_index(file_path, signature):
+    return combine_business_indexes(_business_time_parts(file_path, business_cube(file_path)['chunks']))
+
+
+def corridor_traffic_index(file_path=FOOT_TRAFFIC_FILE):
+    return _corridor_traffic_index(file_path, file_signature(file_path))
+
+
+@perf_metrics.cache_resource(max_entries=4)
+def _corridor_traffic_index(file_path, signature):
+    return ChunkedTimeIndex(_corridor_time_parts(file_path, load_rollup_state(file_path)['by_date']))
+
+
+# Spatial indexes over business locations (all businesses and one per business type); positions are those
+# business_cube.rows_at reads
+def business_spatial_indexes(file_path=BUSINESS_DATA_FILE):
+    return _business_spatial_indexes(file_path, file_signature(file_path))
+
+
+@perf_metrics.cache_resource(max_entries=4)
+def _business_spatial_indexes(file_path, signature):
+    cube = business_cube(file_path)
+    return combine_spatial_indexes(cube, _business_spatial_parts(file_path, cube['chunks']))
+
+
+# Fitted seasonal traffic model, cached on disk and refitted only when the foot traffic file changes
+@perf_metrics.cache_resource
+def forecast_model(file_path=FOOT_TRAFFIC_FILE):
+    return load_model(file_path)
+
+
+# BM25 index over plaza listings, corridor traffic and business traffic for grounding chatbot answers,
+# rebuilt when any of the files changes
+def knowledge_index(plaza_file=PLAZA_FILE, traffic_file=FOOT_TRAFFIC_FILE, business_file=BUSINESS_DATA_FILE):
+    return _knowledge_index(plaza_file, traffic_file, business_file,
+                            [file_signature(path) for path in (plaza_file, traffic_file, business_file)])
+
+
+@perf_metrics.cache_resource(max_entries=2)
+def _knowledge_index(plaza_file, traffic_file, business_file, signatures):
+    return build_knowledge_index(plaza_listings(plaza_file), foot_traffic_rollups(traffic_file),
+                                 business_time_index(business_file)['type_zip'])
+
+
+# Memory-mapped (hour x aisle) heat matrices of the retail stores Feature2 compares against
+@perf_metrics.cache_resource
+def aisle_store(path=AISLE_STORE_DIR):
+    return open_aisle_store(path)
+
+
+# Load the shared datasets and stores the pages read, e.g. right after the first page of the app has rendered
+def prewarm():
+    for load in (plaza_listings, foot_traffic_rollups, business_cube, forecast_model):
+        load()
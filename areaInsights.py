@@ -1,28 +1,25 @@
-import streamlit as st
-import openai
-import os
 import pandas as pd
-import collections
+import streamlit as st
+from business_cube import business_rows, rows_at, top_type_by_zip
+import app_data
+import llm_gateway
+import perf_metrics
+from llm_prompts import area_insights_prompt
 
-# Set your OpenAI API key here
-openai.api_key = os.getenv('OPENAI_API_KEY')
+perf_metrics.start_run("areaInsights")
 
 # Function to generate insights using OpenAI
 def generate_insights(zip_code, business_type, foot_traffic_volume):
-    prompt = f"Provide detailed insights for the area with zip code {zip_code}, focusing on the business type '{business_type}' with a foot traffic volume of {foot_traffic_volume}."
-    response = openai.Completion.create(
+    prompt = area_insights_prompt(zip_code, business_type, foot_traffic_volume)
+    return llm_gateway.completion(
+        prompt,
         model="gpt-3.5-turbo-instruct",
-        prompt=prompt,
         max_tokens=150
     )
-    return response.choices[0].text.strip()
 
-# Read data from pre-existing CSV file
 csv_file = 'full_year_business_data.csv'  # Ensure this file exists in your directory
-df = pd.read_csv(csv_file)
-
-# Convert 'Foot Traffic Volume' to numeric, forcing any errors to be NaN, then filling NaNs with 0
-df['Foot Traffic Volume'] = pd.to_numeric(df['Foot Traffic Volume'], errors='coerce').fillna(0)
+cube = app_data.business_cube(csv_file)
+perf_metrics.checkpoint("load data")
 
 # Streamlit app
 st.title('Business Foot Traffic Analysis')
@@ -32,43 +29,94 @@ col1, col2 = st.columns(2)
 
 # Create dropdown menus for users to select business type and area code in the respective columns
 with col1:
-    selected_business_type = st.selectbox('Select Business Type', df['Business Type'].unique())
+    selected_business_type = st.selectbox('Select Business Type', cube['business_types'])
 with col2:
-    selected_zip_code = st.selectbox('Select Zip Code', df['Zip Code'].unique())
+    selected_zip_code = st.selectbox('Select Zip Code', cube['zip_codes'])
+
+# Running-total time indexes: any date range, rolling window or week-over-week figure is two lookups per entity
+time_indexes = app_data.business_time_index(csv_file)
+type_zip_index = time_indexes['type_zip']
+date_range = st.date_input('Date range', value=(type_zip_index.first.date(), type_zip_index.last.date()),
+                           min_value=type_zip_index.first.date(), max_value=type_zip_index.last.date())
+
+# The picker returns one date while the range is being chosen
+range_start, range_end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[-1])
 
-# Filter the data based on the selected business type and area code
-filtered_df = df[(df['Business Type'] == selected_business_type) & (df['Zip Code'] == selected_zip_code)]
+# Look up the rows for the selected business type and area code
+filtered_df = business_rows(cube, selected_business_type, selected_zip_code)
 
 # Display the filtered data
 st.write(f'### Data for {selected_business_type} in zip code {selected_zip_code}')
-st.dataframe(filtered_df)
+st.dataframe(filtered_df[filtered_df['Date'].between(range_start, range_end)])
 
-# Analyze the data to find the business type with the highest foot traffic based on area code
-business_count_by_zip = collections.Counter()
-for row in filtered_df.itertuples(index=False):
-    _, business_name, business_type, zip_code, latitude, longitude, foot_traffic_volume, _, _, _, _ = row
-    business_count_by_zip[(business_type, zip_code)] += foot_traffic_volume
+# Foot traffic of the selected business type and zip code over the date range; the rolling averages are per day
+# with a reading and, like the week-over-week change, cover the days up to the end of the range
+st.write(f'### Foot Traffic from {range_start:%b %d, %Y} to {range_end:%b %d, %Y}')
+for column, (label, value) in zip(st.columns(4), type_zip_index.summary((selected_business_type, selected_zip_code),
+                                                                          range_start, range_end).items()):
+    column.metric(label, value)
+st.write(f"All business types in zip code {selected_zip_code}: "
+         f"{time_indexes['zip'].total(selected_zip_code, range_start, range_end):,.0f} visitors in the date range.")
 
-# Find the business type with the highest count in each zip code
-highest_traffic_by_zip = {}
-for key, count in business_count_by_zip.items():
-    business_type, zip_code = key
-    if zip_code not in highest_traffic_by_zip or count > highest_traffic_by_zip[zip_code][1]:
-        highest_traffic_by_zip[zip_code] = (business_type, count)
+businesses = filtered_df['Business Name'].unique()
+if len(businesses):
+    business_time_index = time_indexes['business']
+    st.dataframe(pd.DataFrame.from_dict(
+        {business: business_time_index.summary((selected_business_type, selected_zip_code, business), range_start, range_end)
+         for business in businesses}, orient='index').rename_axis('Business Name'))
+
+# Find the business type with the highest foot traffic in the selected zip code over the date range
+top_traffic_by_zip = top_type_by_zip(type_zip_index.totals(range_start, range_end))
+top_traffic_by_zip = top_traffic_by_zip[top_traffic_by_zip.index == selected_zip_code]
 
 # Display the highest traffic business type by zip code
 st.write('### Highest Traffic Business Type by Zip Code')
-for zip_code, (business_type, count) in highest_traffic_by_zip.items():
-    st.write(f"Highest traffic in area code {zip_code}: {business_type} with {count} visitors")
+for zip_code, (business_type, count) in top_traffic_by_zip.iterrows():
+    st.write(f"Highest traffic in area code {zip_code}: {business_type} with {count:,.0f} visitors")
+perf_metrics.checkpoint("filter and aggregate")
+
+# Local competition around a candidate site, answered from the spatial index instead of scanning every row
+st.write('### Local Competition')
+business_index, business_type_indexes = app_data.business_spatial_indexes(csv_file)
+site = filtered_df if not filtered_df.empty else rows_at(cube)
+col3, col4, col5 = st.columns(3)
+with col3:
+    site_latitude = st.number_input('Candidate site latitude', value=float(site['Latitude'].mean()), format="%.6f")
+with col4:
+    site_longitude = st.number_input('Candidate site longitude', value=float(site['Longitude'].mean()), format="%.6f")
+with col5:
+    radius = st.slider('Radius (meters)', min_value=100, max_value=5000, value=1000, step=100)
+
+nearby_positions, nearby_distances = business_index.within_radius(site_latitude, site_longitude, radius)
+nearby = rows_at(cube, nearby_positions).reset_index(drop=True).assign(**{'Distance (m)': nearby_distances.round()})
+competitors = nearby[nearby['Business Type'] == selected_business_type]
+st.write(f"{len(competitors)} {selected_business_type} locations within {radius:,} m "
+         f"with {int(competitors['Foot Traffic Volume'].sum()):,} total visitors "
+         f"({int(nearby['Foot Traffic Volume'].sum()):,} visitors across all business types).")
+st.dataframe(competitors.groupby('Business Name')
+             .agg(Locations=('Distance (m)', 'size'),
+                  **{'Foot Traffic Volume': ('Foot Traffic Volume', 'sum'), 'Nearest (m)': ('Distance (m)', 'min')})
+             .sort_values('Nearest (m)'))
+
+# k nearest competitors of the selected business type
+type_index = business_type_indexes[selected_business_type]
+nearest_positions, nearest_distances = type_index.nearest(site_latitude, site_longitude, k=5)
+st.write(f'#### 5 Nearest {selected_business_type} Competitors')
+st.dataframe(rows_at(cube, nearest_positions)[['Business Name', 'Zip Code', 'Date', 'Foot Traffic Volume']]
+             .reset_index(drop=True).assign(**{'Distance (m)': nearest_distances.round()}))
+perf_metrics.checkpoint("local competition")
 
 # Generate and display additional insights using OpenAI
 if st.button("Generate Insights"):
     if not filtered_df.empty:
-        foot_traffic_volume = filtered_df['Foot Traffic Volume'].sum()
-        insights = generate_insights(selected_zip_code, selected_business_type, foot_traffic_volume)
+        foot_traffic_volume = int(type_zip_index.total((selected_business_type, selected_zip_code), range_start, range_end))
+        with perf_metrics.stage("insights"):
+            insights = generate_insights(selected_zip_code, selected_business_type, foot_traffic_volume)
         st.write('### Additional Insights')
         st.write(insights)
     else:
         st.write("No data available for the selected filters.")
 
+perf_metrics.finish_run()
+
 # This code is generated by ChatGBT & Microsoft CoPilot
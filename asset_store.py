@@ -0,0 +1,101 @@
+import collections
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image
+
+import llm_gateway
+
+# Where generated images and their display-sized variants are kept
+ASSET_DIR = os.path.join(".cache", "images")
+DISPLAY_WIDTHS = (256, 512)  # Variants written next to every original
+MAX_MEMORY_ITEMS = 32  # Decoded variants kept in memory per process
+
+
+# Render-once store for generated images: generate once per prompt, persist to disk, serve resized variants
+class ImageAssetStore:
+    def __init__(self, directory=ASSET_DIR, widths=DISPLAY_WIDTHS, max_memory_items=MAX_MEMORY_ITEMS,
+                 generate=llm_gateway.generate_image):
+        self.directory = directory
+        self.widths = widths
+        self.max_memory_items = max_memory_items
+        self.generate = generate
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(prompt, size):
+        return hashlib.sha256(f"{size}\n{prompt}".encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key, width=None):
+        if width is None:
+            return os.path.join(self.directory, f"{key}.png")
+        return os.path.join(self.directory, f"{key}_w{width}.jpg")
+
+    # Return image bytes for a prompt at the requested display width (None for the original)
+    def get(self, prompt, width=512, size="1024x1024"):
+        if width is not None and width not in self.widths:
+            raise ValueError(f"Unsupported display width {width}; expected one of {self.widths}")
+        key = self.make_key(prompt, size)
+        memory_key = (key, width)
+
+        with self._lock:
+            if memory_key in self._memory:
+                self._memory.move_to_end(memory_key)
+                return self._memory[memory_key]
+
+        # One generation per prompt even when several sessions ask at the same time
+        with self._key_locks[key]:
+            path = self._path(key, width)
+            if not os.path.exists(path):
+                self._render(key, prompt, size)
+            with open(path, "rb") as f:
+                data = f.read()
+
+        with self._lock:
+            self._memory[memory_key] = data
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+        return data
+
+    # Generate the original (unless it is already on disk) and write every display variant
+    def _render(self, key, prompt, size):
+        original_path = self._path(key)
+        if os.path.exists(original_path):
+            with open(original_path, "rb") as f:
+                original = f.read()
+        else:
+            original = self.generate(prompt, size=size)
+            write_atomic(original_path, original)
+
+        image = Image.open(io.BytesIO(original)).convert("RGB")
+        for width in self.widths:
+            variant = image.copy()
+            variant.thumbnail((width, width * image.height // image.width), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format="JPEG", quality=85, optimize=True)
+            write_atomic(self._path(key, width), buffer.getvalue())
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+# Process-wide image store shared by every page
+def get_image_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ImageAssetStore()
+        return _default_store
@@ -0,0 +1,52 @@
+# Cold start of the app: a fresh Python process imports and renders the first view of a script
+#
+#   python -m benchmarks.bench_cold_start                      # app.py plus every page on its own
+#   python -m benchmarks.bench_cold_start app.py mainPage.py   # only these scripts
+#
+# Each script runs in its own subprocess through Streamlit's AppTest, so module imports, data loads and
+# the first render are all included, as they are for the first visitor after a deploy.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["app.py", "mainPage.py", "footFlow.py", "areaInsights.py", "Footflow.py", "inventory_guide_2.py"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+done = time.perf_counter()
+print(json.dumps({'streamlit': imported - start, 'render': done - imported,
+                  'modules': len(sys.modules), 'exceptions': [str(e.value) for e in at.exception]}))
+"""
+
+
+def cold_start(script, repeat):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE, os.path.join(ROOT, script)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return min(samples, key=lambda sample: sample['render'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start and first render of the app scripts.")
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per script; the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'script':<22} {'render s':>9} {'modules':>8}  notes")
+    for script in args.scripts:
+        sample = cold_start(script, max(args.repeat, 1))
+        notes = "; ".join(sample['exceptions'])[:60]
+        print(f"{script:<22} {sample['render']:9.3f} {sample['modules']:8d}  {notes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Scaling benchmark for promotion_engine.py
+#
+#   python -m benchmarks.bench_promotion_engine
+#
+# Times top-k promotion placement over growing (time x aisle) grids, single-store and stacked multi-store,
+# and prints the time per cell so linear scaling is easy to check. The old row-wise Feature2.py approach
+# is timed on the small sizes only, because it is quadratic.
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from promotion_engine import promotion_placement, promotion_placement_by_store
+
+N_AISLES = 20
+
+
+def heat_frame(n_times, n_aisles=N_AISLES, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.poisson(40, size=(n_times, n_aisles)).astype(np.float64),
+                      columns=[f"Aisle {i}" for i in range(n_aisles)])
+    df['timestamp'] = pd.date_range(start='2024-10-27', periods=n_times, freq='h')
+    return df
+
+
+# The original Feature2.py approach: idxmax, melt, then a full timestamp scan per melted row
+def legacy_promotion_placement(df):
+    df = df.copy()
+    df['Promotion_Placement'] = df.drop(columns=['timestamp']).idxmax(axis=1)
+    df_melted = df.drop(columns=['Promotion_Placement']).melt(id_vars=['timestamp'], var_name='aisle', value_name='foot_traffic')
+    return df_melted[df_melted.apply(lambda row: row['aisle'] == df.loc[df['timestamp'] == row['timestamp'], 'Promotion_Placement'].values[0], axis=1)]
+
+
+def timed(func, *args, repeat=3, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark promotion placement scaling.")
+    parser.add_argument("--k", type=int, default=3, help="Aisles to place per time bucket")
+    parser.add_argument("--max-cells", type=int, default=4_000_000)
+    parser.add_argument("--legacy-max-cells", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'cells':>10} {'stores':>7} {'engine (s)':>11} {'ns/cell':>8} {'legacy (s)':>11}")
+    cells = 10_000
+    while cells <= args.max_cells:
+        n_times = cells // N_AISLES
+        df = heat_frame(n_times)
+        engine = timed(promotion_placement, df, k=args.k)
+        legacy = timed(legacy_promotion_placement, df, repeat=1) if cells <= args.legacy_max_cells else None
+        legacy_text = f"{legacy:11.3f}" if legacy is not None else f"{'-':>11}"
+        print(f"{cells:>10,} {1:>7} {engine:11.4f} {engine / cells * 1e9:8.1f} {legacy_text}")
+
+        # Same number of cells spread over 100 stores
+        stores = {f"Store {i}": heat_frame(max(n_times // 100, 1), seed=i) for i in range(100)}
+        store_cells = sum(len(frame) for frame in stores.values()) * N_AISLES
+        engine = timed(promotion_placement_by_store, stores, k=args.k)
+        print(f"{store_cells:>10,} {100:>7} {engine:11.4f} {engine / store_cells * 1e9:8.1f} {'-':>11}")
+
+        cells *= 10 if cells < 1_000_000 else 4
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# Headless benchmark suite for the data path of every page
+#
+#   python -m benchmarks.run_benchmarks                          # 10k, 100k, 1M and 10M rows
+#   python -m benchmarks.run_benchmarks --sizes 10000 100000     # quick run
+#   python -m benchmarks.run_benchmarks --save-baseline          # record benchmarks/baseline.json
+#
+# Each case builds its synthetic input outside the timed region, then reports the best wall time of
+# --repeat untraced runs and the peak traced memory of one extra run (tracemalloc slows the code it
+# watches, so it never overlaps the timing). With a stored baseline, cases slower than
+# baseline x (1 + tolerance) are flagged and the run exits non-zero.
+import argparse
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from aisle_store import build_aisle_store
+from business_cube import build_cube, business_rows, highest_traffic_by_zip, traffic_total
+from foot_traffic_rollups import build_rollups, ingest_rows
+from heat_binning import build_pyramid_from_frame, cells_for_view, heat_data
+from plaza_search import PlazaTagIndex
+from promotion_engine import promotion_placement, top_k_aisles
+from synthetic_data import generate_aisle_traffic, generate_business_data, generate_corridor_traffic
+from time_index import corridor_time_index
+from upload_ingest import ingest_business_csv, top_zip_codes
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+TAGS = ["Fast Casual", "Family Dining", "International Cuisines", "Quick Service", "Food Truck", "Upscale Dining",
+        "Trendy Cafés", "Ethnic Cuisines", "Dessert Shops", "Italian", "Mexican", "Vegan", "Asian Fusion"]
+BUSINESS_TYPES = ["Restaurant", "Store"]
+
+
+# --- Synthetic inputs ---------------------------------------------------------------------------
+
+def listings(n, rng):
+    picks = rng.integers(0, len(TAGS), size=(n, 4))
+    return [", ".join(TAGS[i] for i in row) for row in picks]
+
+
+def foot_traffic_rows(n, rng):
+    corridors = -(-n // 365)
+    return generate_corridor_traffic(n_corridors=corridors, seed=int(rng.integers(2 ** 31))).head(n)
+
+
+def business_rows_frame(n, rng):
+    businesses = -(-n // 366)
+    return generate_business_data(n_businesses=businesses, n_zip_codes=60, seed=int(rng.integers(2 ** 31))).head(n)
+
+
+def heat_matrix_frame(n_cells, rng, n_aisles=20):
+    n_times = max(n_cells // n_aisles, 1)
+    df = pd.DataFrame(rng.poisson(40, size=(n_times, n_aisles)).astype(np.float64),
+                      columns=[f"Aisle {i}" for i in range(n_aisles)])
+    df['timestamp'] = pd.date_range(start='2024-10-27', periods=n_times, freq='h')
+    return df
+
+
+# Aisle store of about n store-hours (28 days per store), built in the temp directory
+def aisle_store_of(n, rng):
+    stores = max(n // (28 * 24), 1)
+    path = os.path.join(tempfile.gettempdir(), f"aisle_store_bench_{n}")
+    return build_aisle_store([generate_aisle_traffic(stores, days=28, seed=int(rng.integers(2 ** 31)))], path)
+
+
+# Corridor time index over about n rows of daily corridor traffic
+def corridor_index_of(n, rng):
+    return corridor_time_index(ingest_rows(None, foot_traffic_rows(n, rng))['by_date'])
+
+
+# --- Cases: (setup(n, rng) -> input, run(input)) -------------------------------------------------
+
+# The tag index is built once per listings file, so only the query is timed
+def footflow_plaza_filter(index):
+    return index.search(["Fast Food", "Italian", "Mexican", "Vegan"])
+
+
+def footflow_rollups(data):
+    return build_rollups(data)
+
+
+def area_insights(data):
+    cube = build_cube(data)
+    business_type, zip_code = cube['business_types'][0], cube['zip_codes'][0]
+    business_rows(cube, business_type, zip_code)
+    traffic_total(cube, business_type, zip_code)
+    return highest_traffic_by_zip(cube)
+
+
+def main_page(csv_bytes):
+    points, totals = ingest_business_csv(io.BytesIO(csv_bytes))
+    for business_type in BUSINESS_TYPES:
+        top_zip_codes(totals, business_type, largest=True)
+        top_zip_codes(totals, business_type, largest=False)
+    pyramid = build_pyramid_from_frame(points)
+    return heat_data(cells_for_view(pyramid, 14))
+
+
+def feature2_promotion(data):
+    return promotion_placement(data, k=1)
+
+
+def feature2_store_compare(store):
+    names = store.names()
+    first, _ = store.time_range()
+    last = first + pd.Timedelta(days=3) - pd.Timedelta(hours=1)
+    promotion_placement(store.frame(names[len(names) // 2], first, last), aisle_columns=store.aisles)
+    stacked, _ = store.stack(names[:10], first, last)
+    return top_k_aisles(stacked)
+
+
+def date_range_queries(index):
+    start, end = index.first + pd.Timedelta(days=30), index.last - pd.Timedelta(days=30)
+    return [index.summary(corridor, start, end) for corridor in index.entities[:50]]
+
+
+CASES = {
+    'footflow_plaza_filter': (lambda n, rng: PlazaTagIndex(listings(n, rng)), footflow_plaza_filter),
+    'footflow_rollups': (foot_traffic_rows, footflow_rollups),
+    'area_insights': (business_rows_frame, area_insights),
+    'main_page': (lambda n, rng: business_rows_frame(n, rng).to_csv(index=False).encode(), main_page),
+    'feature2_promotion': (heat_matrix_frame, feature2_promotion),
+    'feature2_store_compare': (aisle_store_of, feature2_store_compare),
+    'date_range_queries': (corridor_index_of, date_range_queries),
+}
+
+
+def measure(run, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(data)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('results', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data path of every page.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="Slowdowns below this many seconds are treated as noise")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+
+    print(f"{'case':<24} {'rows':>11} {'seconds':>9} {'peak MB':>9} {'baseline':>9}  status")
+    for name in args.cases:
+        setup, run = CASES[name]
+        for size in args.sizes:
+            key = f"{name}@{size}"
+            data = setup(size, np.random.default_rng(args.seed))
+            seconds, peak = measure(run, data, max(args.repeat, 1))
+            del data
+            results[key] = {'seconds': round(seconds, 6), 'peak_bytes': peak}
+
+            status = ""
+            previous = baseline.get(key)
+            if previous is not None:
+                limit = max(previous['seconds'] * (1 + args.tolerance), previous['seconds'] + args.min_delta)
+                if seconds > limit:
+                    status = f"REGRESSION (+{seconds / previous['seconds'] - 1:.0%})"
+                    regressions.append(key)
+                else:
+                    status = "ok"
+            baseline_text = f"{previous['seconds']:9.3f}" if previous is not None else f"{'-':>9}"
+            print(f"{name:<24} {size:>11,} {seconds:9.3f} {peak / 2 ** 20:9.1f} {baseline_text}  {status}")
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': merged},
+                      f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+from datasets import BUSINESS_DATA_FILE, read_business_data
+from derived_store import CACHE_DIR, append_chunk, load_incremental
+from spatial_index import ChunkedSpatialIndex, SpatialIndex
+
+# Bump this whenever the shape of the stored cube changes so old stores get rebuilt
+CUBE_VERSION = 5
+
+CUBE_KEYS = ['Business Type', 'Zip Code']
+CATEGORY_COLUMNS = ['Business Name', 'Business Type', 'Peak Foot Traffic Time']
+
+
+# Pre-aggregate foot traffic by (Business Type, Zip Code, Date) and index the raw rows by (Business Type, Zip Code)
+def build_cube(df):
+    return ingest_rows(None, df)
+
+
+# Fold new business rows into the cube; cube None builds it from scratch. The new rows and their daily aggregates
+# are kept as a chunk of their own (see derived_store.append_chunk), so an append costs as much as the new rows and
+# the queries below read every chunk. In a chunk the rows are indexed by (Business Type, Zip Code) and sorted so
+# one pair is a single indexed slice (in file order within it). The given cube is left untouched so readers can
+# keep using it.
+def ingest_rows(state, df):
+    if state is not None and df.empty:
+        return state
+    df = df.copy()
+
+    # Convert 'Foot Traffic Volume' to numeric, forcing any errors to be NaN, then filling NaNs with 0
+    df['Foot Traffic Volume'] = pd.to_numeric(df['Foot Traffic Volume'], errors='coerce').fillna(0)
+
+    chunk = {'rows': sorted_rows(df), 'daily': daily_aggregates(df)}
+    business_types = np.asarray(df['Business Type'].unique())
+    zip_codes = np.asarray(df['Zip Code'].unique())
+    by_type_zip = chunk['daily']['volume'].groupby(level=CUBE_KEYS).sum()
+    chunks = [chunk]
+    if state is not None:
+        # Selectable types and zip codes keep the order they first appeared in the file
+        business_types = pd.unique(np.concatenate([state['business_types'], business_types]))
+        zip_codes = pd.unique(np.concatenate([state['zip_codes'], zip_codes]))
+        by_type_zip = (state['by_type_zip'].add(by_type_zip, fill_value=0)
+                       .astype(np.result_type(state['by_type_zip'].dtype, by_type_zip.dtype)))
+
+        chunks = append_chunk(state['chunks'], chunk, lambda chunk: len(chunk['rows']), merge_chunks)
+
+    return {
+        'business_types': business_types,
+        'zip_codes': zip_codes,
+        'chunks': chunks,
+        # Totals per (type, zip) and the highest-traffic business type in every zip code
+        'by_type_zip': by_type_zip,
+        'top_type_by_zip': top_type_by_zip(by_type_zip),
+    }
+
+
+# Rows of a block indexed by (Business Type, Zip Code), sorted by it and in file order within a pair
+def sorted_rows(df):
+    return df.set_index(CUBE_KEYS, drop=False).sort_index(kind='stable')
+
+
+# Chunk of two consecutive chunks of rows
+def merge_chunks(previous, last):
+    return {'rows': sorted_rows(concat_rows([previous['rows'], last['rows']])),
+            'daily': merge_daily([previous['daily'], last['daily']])}
+
+
+# Visits and number of rows per (Business Type, Zip Code, Date) of a block of rows. Business types are plain
+# labels, so blocks whose categories differ still line up when merged.
+def daily_aggregates(df):
+    keys = [df['Business Type'].astype(object), df['Zip Code'], pd.to_datetime(df['Date'])]
+    return (df['Foot Traffic Volume'].groupby(keys).agg(['sum', 'size'])
+            .rename(columns={'sum': 'volume', 'size': 'businesses'}))
+
+
+# Daily aggregates of several blocks of rows
+def merge_daily(dailies):
+    if len(dailies) == 1:
+        return dailies[0]
+    return pd.concat(dailies).groupby(level=CUBE_KEYS + ['Date']).sum()
+
+
+# Rows of several blocks in one frame, their categorical columns sharing one set of categories
+def concat_rows(frames):
+    if len(frames) == 1:
+        return frames[0]
+    categories = union_categories(frames)
+    return pd.concat([with_categories(frame, categories) for frame in frames], ignore_index=True)
+
+
+# Categories of the first frame's categorical columns, extended with the labels only found in the frames after it
+# (labels keep their codes)
+def union_categories(frames):
+    categories = {}
+    for column in CATEGORY_COLUMNS:
+        if column not in frames[0] or not isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            continue
+        known = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            values = frame[column]
+            labels = (values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype)
+                      else pd.Index(values.dropna().unique()))
+            known = known.append(labels.difference(known))
+        categories[column] = known
+    return categories
+
+
+# Frame with its columns recoded to the given categories; columns already using them are kept as they are
+def with_categories(frame, categories):
+    frame = frame.copy()
+    for column, labels in categories.items():
+        if column not in frame:
+            continue
+        dtype = frame[column].dtype
+        if not (isinstance(dtype, pd.CategoricalDtype) and dtype.categories.equals(labels)):
+            ordered = isinstance(dtype, pd.CategoricalDtype) and dtype.ordered
+            frame[column] = pd.Categorical(frame[column], categories=labels, ordered=ordered)
+    return frame
+
+
+# Highest-traffic business type per zip code from totals indexed by (Business Type, Zip Code)
+def top_type_by_zip(by_type_zip):
+    if by_type_zip.empty:
+        return pd.DataFrame(columns=['Business Type', 'Foot Traffic Volume'])
+    best = by_type_zip.loc[by_type_zip.groupby(level='Zip Code', observed=True).idxmax()]
+    return (best.rename('Foot Traffic Volume')
+            .reset_index(level='Business Type'))
+
+
+# Cube for a business data file; rows appended since the last load are read and folded in on their own
+def load_cube(file_path=BUSINESS_DATA_FILE, cache_dir=CACHE_DIR):
+    return load_incremental(file_path, 'cube', CUBE_VERSION,
+                            lambda source, state: ingest_rows(state, read_business_data(source)), cache_dir)
+
+
+# Raw rows for one business type in one zip code
+def business_rows(cube, business_type, zip_code):
+    key = (business_type, zip_code)
+    rows = [chunk['rows'].loc[[key]] for chunk in cube['chunks'] if key in chunk['rows'].index]
+    if not rows:
+        return cube['chunks'][0]['rows'].iloc[0:0].reset_index(drop=True)
+    return concat_rows(rows).reset_index(drop=True)
+
+
+# Raw rows at positions numbered across the chunks in order, as in their concatenation (every row when positions
+# is None), in the order of the positions
+def rows_at(cube, positions=None):
+    chunks = cube['chunks']
+    if positions is None:
+        return concat_rows([chunk['rows'] for chunk in chunks])
+    positions = np.asarray(positions, dtype=np.int64)
+    offsets = np.cumsum([0] + [len(chunk['rows']) for chunk in chunks])
+    owners = np.searchsorted(offsets, positions, side='right') - 1
+    rows, order = [], []
+    for number, chunk in enumerate(chunks):
+        picked = np.flatnonzero(owners == number)
+        if len(picked):
+            rows.append(chunk['rows'].iloc[positions[picked] - offsets[number]])
+            order.append(picked)
+    if not rows:
+        return chunks[0]['rows'].iloc[0:0]
+    return concat_rows(rows).iloc[np.argsort(np.concatenate(order), kind='stable')]
+
+
+# Spatial indexes over the business locations of one chunk: of every row, and of the rows of each business type
+# together with their positions in the chunk
+def chunk_spatial_indexes(chunk, earlier=()):
+    rows = chunk['rows']
+    by_type = {}
+    for business_type in rows['Business Type'].unique():
+        positions = (rows['Business Type'] == business_type).to_numpy().nonzero()[0]
+        by_type[business_type] = (SpatialIndex(rows['Latitude'].iloc[positions], rows['Longitude'].iloc[positions]),
+                                  positions)
+    return SpatialIndex(rows['Latitude'], rows['Longitude'], rows['Foot Traffic Volume']), by_type
+
+
+# Spatial indexes over every business location and over those of each business type from the indexes of the
+# cube's chunks; their positions are those rows_at reads
+def combine_spatial_indexes(cube, parts):
+    offsets = np.cumsum([0] + [len(chunk['rows']) for chunk in cube['chunks']])
+    by_type = {}
+    for (_, type_indexes), offset in zip(parts, offsets):
+        for business_type, (index, positions) in type_indexes.items():
+            by_type.setdefault(business_type, []).append((index, offset, positions))
+    return (ChunkedSpatialIndex([(index, offset, None) for (index, _), offset in zip(parts, offsets)]),
+            {business_type: ChunkedSpatialIndex(indexes) for business_type, indexes in by_type.items()})
+
+
+# Daily aggregates for any filter combination; None means "all" and start/end bound the date range
+def daily_traffic(cube, business_type=None, zip_code=None, start=None, end=None):
+    selector = (
+        slice(None) if business_type is None else [business_type],
+        slice(None) if zip_code is None else [zip_code],
+        slice(start, end),
+    )
+    dailies = []
+    for chunk in cube['chunks']:
+        try:
+            dailies.append(chunk['daily'].loc[selector, :])
+        except KeyError:
+            continue
+    if not dailies:
+        return cube['chunks'][0]['daily'].iloc[0:0]
+    return merge_daily(dailies)
+
+
+# Total foot traffic for any filter combination; unfiltered dates are answered from the precomputed totals
+def traffic_total(cube, business_type=None, zip_code=None, start=None, end=None):
+    if start is None and end is None and business_type is not None and zip_code is not None:
+        return cube['by_type_zip'].get((business_type, zip_code), 0)
+    return daily_traffic(cube, business_type, zip_code, start, end)['volume'].sum()
+
+
+# Highest-traffic business type per zip code, optionally limited to some zip codes and a date range
+def highest_traffic_by_zip(cube, zip_codes=None, start=None, end=None):
+    if start is None and end is None:
+        top = cube['top_type_by_zip']
+    else:
+        daily = daily_traffic(cube, start=start, end=end)
+        top = top_type_by_zip(daily['volume'].groupby(level=['Business Type', 'Zip Code'], observed=True).sum())
+    if zip_codes is not None:
+        top = top[top.index.isin(zip_codes)]
+    return top
@@ -0,0 +1,124 @@
+import collections
+import hashlib
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+
+import perf_metrics
+
+MAX_BYTES = 32 * 1024 * 1024  # Rendered charts kept in memory per process
+DPI = 200  # Same resolution st.pyplot renders at
+FORMATS = ("png", "svg")
+
+
+# Stable digest of chart inputs: DataFrames/Series by content, arrays by bytes, anything else by repr
+def digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode("utf-8"))
+            h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(repr((part.dtype.str, part.shape)).encode("utf-8"))
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+# Render-once cache for matplotlib/seaborn charts: a chart is keyed by its drawing function and inputs,
+# drawn on a standalone Figure (never registered with pyplot), saved to PNG/SVG bytes and released at once.
+# Bytes are kept in memory with least-recently-used eviction once max_bytes is exceeded.
+class ChartCache:
+    def __init__(self, max_bytes=MAX_BYTES, dpi=DPI):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+
+    # Image bytes of draw(ax, *args) on a figsize figure; only the first call for the same inputs draws
+    def render(self, draw, *args, figsize=(10, 6), fmt="png"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported chart format {fmt!r}; expected one of {FORMATS}")
+        name = f"{draw.__module__}.{draw.__qualname__}"
+        key = (name, digest(*args), tuple(figsize), fmt, self.dpi)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                data = self._memory[key]
+            else:
+                data = None
+        if data is not None:
+            perf_metrics.record_cache(name, hit=True)
+            return data
+
+        # Sessions asking for the same chart at the same time share one drawing
+        with self._key_locks[key]:
+            with self._lock:
+                data = self._memory.get(key)
+                drawn = data is None
+                if not drawn:
+                    self.hits += 1
+            if drawn:
+                with perf_metrics.stage(f"render {draw.__qualname__}"):
+                    data = self._draw(draw, args, figsize, fmt)
+                with self._lock:
+                    self.misses += 1
+                    self._memory[key] = data
+                    self._bytes += len(data)
+                    while self._bytes > self.max_bytes and len(self._memory) > 1:
+                        _, evicted = self._memory.popitem(last=False)
+                        self._bytes -= len(evicted)
+        self._key_locks.pop(key, None)
+        perf_metrics.record_cache(name, hit=not drawn)
+        return data
+
+    def _draw(self, draw, args, figsize, fmt):
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=figsize)
+        try:
+            draw(fig.subplots(), *args)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=self.dpi, bbox_inches="tight")
+            return buffer.getvalue()
+        finally:
+            fig.clear()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._memory),
+                'bytes': self._bytes,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+# Process-wide chart cache shared by every page and session
+def get_chart_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ChartCache()
+        return _default_cache
@@ -1,45 +1,82 @@
 import streamlit as st
-import openai
+import app_data
+import llm_gateway
+import perf_metrics
+from conversation_memory import ConversationMemory, extractive_summary, truncate_tokens
+from llm_prompts import chatbot_messages, conversation_summary_messages
+from asset_store import get_image_store
 
-# Set up OpenAI API
-openai.api_key = 'api-key'
+# Prompt size stays the same however long the chat: bounded history, a few retrieved rows and a capped question
+RETRIEVED_ROWS = 4
+ROW_TOKENS = 80
+QUESTION_TOKENS = 300
 
-def get_chatbot_response(user_input):
-    messages = [
-        {"role": "system", "content": "You are a knowledgeable assistant for new restaurant owners in San Jose, helping them understand space requirements, seating capacity, and equipment needs. Respond concisely with information about restaurant capacity planning, equipment needs (such as refrigeration, ovens, seating, tables), and general tips for a successful restaurant setup."},
-        {"role": "user", "content": user_input}
-    ]
+# Fold older turns into a summary with the model, or without it if that fails
+def summarize_turns(summary, messages):
+    try:
+        return llm_gateway.chat_completion(
+            conversation_summary_messages(summary, messages),
+            model="gpt-3.5-turbo",
+            max_tokens=150,
+            temperature=0
+        )
+    except Exception:
+        return extractive_summary(summary, messages)
 
-    response = openai.ChatCompletion.create(
+def new_memory():
+    return ConversationMemory(summarize=summarize_turns)
+
+# The question with the conversation so far and the local data rows most relevant to it. Rows are looked up with
+# the previous question as well, so a follow-up like "and what's the foot traffic there?" stays about the same place.
+def build_messages(user_input, memory=None):
+    memory = memory or ConversationMemory()
+    previous = next((message['content'] for message in reversed(memory.turns) if message['role'] == 'user'), "")
+    rows = app_data.knowledge_index().top_documents(f"{user_input} {previous}", k=RETRIEVED_ROWS)
+    context = [truncate_tokens(row, ROW_TOKENS) for row in rows]
+    return chatbot_messages(truncate_tokens(user_input, QUESTION_TOKENS), memory.messages(), context)
+
+# Reply to the question from the model, given the conversation so far and the local data rows most relevant to it
+def get_chatbot_response(user_input, memory=None):
+    messages = build_messages(user_input, memory)
+    return llm_gateway.chat_completion(
+        messages,
         model="gpt-3.5-turbo",
-        messages=messages,
         max_tokens=200,
         temperature=0.7
     )
-    return response.choices[0].message['content'].strip()
-
-def generate_restaurant_image():
-    # Request DALL-E to create an image of a typical restaurant space
-    response = openai.Image.create(
-        prompt="A modern restaurant interior with tables, chairs, a counter, ambient lighting, and a cozy, welcoming atmosphere.",
-        n=1,
-        size="1024x1024"
+
+# Stream the reply token by token instead of waiting for the whole answer
+def stream_chatbot_response(user_input, memory=None):
+    messages = build_messages(user_input, memory)
+    return llm_gateway.chat_completion_stream(
+        messages,
+        model="gpt-3.5-turbo",
+        max_tokens=200,
+        temperature=0.7
     )
-    image_url = response['data'][0]['url']
-    return image_url
+
+RESTAURANT_IMAGE_PROMPT = "A modern restaurant interior with tables, chairs, a counter, ambient lighting, and a cozy, welcoming atmosphere."
+
+def generate_restaurant_image(width=512):
+    # Request DALL-E to create an image of a typical restaurant space once; later runs are served from the asset store
+    return get_image_store().get(RESTAURANT_IMAGE_PROMPT, width=width, size="1024x1024")
 
 def main():
+    perf_metrics.start_run("chatbot")
     st.title("Restaurant Startup Advisor - San Jose")
     st.write("Welcome! I’m here to help you with questions about your new restaurant setup in San Jose. Ask me about seating capacity, equipment needs, or any other requirements for a successful restaurant.")
 
     # Display AI-generated image of a restaurant space
     st.write("### Example Restaurant Space:")
-    image_url = generate_restaurant_image()
-    st.image(image_url, caption="AI-generated image of a sample restaurant interior.", use_column_width=True)
+    with perf_metrics.stage("restaurant image"):
+        image = generate_restaurant_image()
+    st.image(image, caption="AI-generated image of a sample restaurant interior.", width="stretch")
 
-    # Chat history
+    # Chat history, and the token-budgeted memory of it that is sent with each question
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    if "memory" not in st.session_state:
+        st.session_state.memory = new_memory()
 
     # Display chat history
     for message in st.session_state.messages:
@@ -51,10 +88,16 @@ def main():
     if user_input:
         st.session_state.messages.append({"role": "User", "content": user_input})
         
-        response = get_chatbot_response(user_input)
+        st.write("**Assistant:**")
+        with perf_metrics.stage("assistant reply"):
+            response = st.write_stream(stream_chatbot_response(user_input, st.session_state.memory))
         st.session_state.messages.append({"role": "Assistant", "content": response})
-        
-        st.write(f"**Assistant:** {response}")
+
+        with perf_metrics.stage("conversation memory"):
+            st.session_state.memory.add("user", user_input)
+            st.session_state.memory.add("assistant", response)
+
+    perf_metrics.finish_run()
 
 if __name__ == "__main__":
     main()
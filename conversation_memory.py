@@ -0,0 +1,84 @@
+# Bounded chat memory: the latest turns verbatim, older turns folded into a short running summary,
+# so the history sent with each question stays under a fixed token budget however long the chat gets
+import re
+
+CHARS_PER_TOKEN = 4  # Rough size of a token in English text, close enough for budgeting
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators the chat format adds to every message
+MEMORY_TOKENS = 600  # Budget for the summary plus the verbatim turns
+SUMMARY_TOKENS = 150  # Budget for the summary of older turns
+KEEP_TURNS = 2  # Latest messages always kept verbatim (the last question and answer)
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def message_tokens(message):
+    return estimate_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+
+
+# Text cut to about `tokens` tokens, at a word boundary
+def truncate_tokens(text, tokens):
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+# Summary without a model: the previous summary plus the first sentence of every folded message, most recent kept
+def extractive_summary(summary, messages, tokens=SUMMARY_TOKENS):
+    lines = [summary] if summary else []
+    for message in messages:
+        first_sentence = re.split(r"(?<=[.!?])\s", message['content'].strip(), maxsplit=1)[0]
+        lines.append(f"{message['role'].capitalize()}: {first_sentence}")
+    text = " ".join(lines)
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else "…" + text[-limit:].split(" ", 1)[-1]
+
+
+# Chat history ({'role', 'content'} messages) kept within a token budget. Once the turns no longer fit, the oldest
+# ones are handed to summarize(summary, messages) -> new summary (extractive_summary by default, or e.g. an LLM
+# call) and dropped; the summary is sent ahead of the remaining turns as a system message.
+class ConversationMemory:
+    def __init__(self, budget=MEMORY_TOKENS, summary_budget=SUMMARY_TOKENS, keep_turns=KEEP_TURNS, summarize=None):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.keep_turns = keep_turns
+        self.summarize = summarize or extractive_summary
+        self.summary = ""
+        self.turns = []
+
+    def add(self, role, content):
+        self.turns.append({'role': role, 'content': content})
+        self._trim()
+
+    # Messages to send before the new question
+    def messages(self):
+        prefix = []
+        if self.summary:
+            prefix.append({'role': 'system', 'content': f"Summary of the earlier conversation: {self.summary}"})
+        return prefix + list(self.turns)
+
+    def tokens(self):
+        return sum(message_tokens(message) for message in self.messages())
+
+    def _trim(self):
+        folded = []
+        turns_budget = self.budget - (estimate_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary
+                                      else 0)
+        while len(self.turns) > self.keep_turns and sum(map(message_tokens, self.turns)) > turns_budget:
+            folded.append(self.turns.pop(0))
+            # Reserve room for the summary the folded turns turn into
+            turns_budget = self.budget - self.summary_budget - MESSAGE_OVERHEAD_TOKENS
+        # Fold whole exchanges, so the verbatim turns never start with an answer to a question that isn't there
+        while folded and len(self.turns) > self.keep_turns and self.turns[0]['role'] != 'user':
+            folded.append(self.turns.pop(0))
+        if folded:
+            self.summary = truncate_tokens(self.summarize(self.summary, folded), self.summary_budget)
+
+        # The latest turns are never folded away, only shortened if they alone are over budget
+        if sum(map(message_tokens, self.turns)) > turns_budget:
+            room = max(self.budget - self.summary_budget - MESSAGE_OVERHEAD_TOKENS, 0) // len(self.turns)
+            for message in self.turns:
+                if message_tokens(message) > room:
+                    message['content'] = truncate_tokens(message['content'], max(room - MESSAGE_OVERHEAD_TOKENS, 1))
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Default locations of the datasets the pages read
+BUSINESS_DATA_FILE = 'full_year_business_data.csv'
+FOOT_TRAFFIC_FILE = "sanjosefoottrafficvolume.csv"
+PLAZA_FILE = "sanjosedataset.csv"
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+PEAK_TIMES = ['Morning', 'Afternoon', 'Evening']
+
+# Compact dtypes: repeated labels as categories, counts as int32, coordinates and rates as float32
+BUSINESS_DTYPES = {
+    'Business Name': 'category',
+    'Business Type': 'category',
+    'Zip Code': 'int32',
+    'Latitude': 'float32',
+    'Longitude': 'float32',
+    'Traffic Trend (Week)': 'float32',
+    'Traffic Trend (Month)': 'float32',
+}
+FOOT_TRAFFIC_DTYPES = {
+    'Business Corridor': 'category',
+    'Address': 'category',
+}
+PLAZA_DTYPES = {
+    'Average Store Size (sq ft)': 'float32',
+    'Average Lease Rate ($/sq ft)': 'float32',
+    'Vacancy Status': 'category',
+    'Price Range': 'category',
+}
+HEAT_POINT_COLUMNS = ['latitude', 'longitude', 'weight']
+
+
+def _volume(values):
+    return pd.to_numeric(values, errors='coerce').fillna(0).astype(np.int32)
+
+
+def _dates(values, date_format):
+    dates = pd.to_datetime(values, format=date_format, errors='coerce')
+    # Fall back to per-value parsing only if the file doesn't follow its usual format
+    if dates.isna().any():
+        dates = pd.to_datetime(values, format='mixed', errors='coerce')
+    return dates
+
+
+# "HH:MM" durations as whole minutes
+def duration_minutes(values):
+    parts = values.astype(str).str.split(':', n=1, expand=True)
+    hours = pd.to_numeric(parts[0], errors='coerce')
+    minutes = pd.to_numeric(parts[1], errors='coerce') if parts.shape[1] > 1 else 0
+    return (hours * 60 + minutes).fillna(0).astype(np.int16)
+
+
+# Business data (full_year_business_data.csv schema) with dates parsed, the duration of stay in minutes
+# ('Duration of Stay (min)') and the peak time as an ordered Morning < Afternoon < Evening category
+def read_business_data(source=BUSINESS_DATA_FILE):
+    df = pd.read_csv(source, dtype=BUSINESS_DTYPES)
+    df['Date'] = _dates(df['Date'], '%Y-%m-%d')
+    df['Foot Traffic Volume'] = _volume(df['Foot Traffic Volume'])
+    df.insert(df.columns.get_loc('Duration of Stay'), 'Duration of Stay (min)', duration_minutes(df['Duration of Stay']))
+    df = df.drop(columns=['Duration of Stay'])
+    df['Peak Foot Traffic Time'] = pd.Categorical(df['Peak Foot Traffic Time'], categories=PEAK_TIMES, ordered=True)
+    return df
+
+
+# Daily corridor traffic (sanjosefoottrafficvolume.csv schema) with dates parsed and days as an ordered category
+def read_foot_traffic(source=FOOT_TRAFFIC_FILE):
+    df = pd.read_csv(source, dtype=FOOT_TRAFFIC_DTYPES)
+    df['Day'] = pd.Categorical(df['Day'], categories=DAY_ORDER, ordered=True)
+    df['Date'] = _dates(df['Date'], '%m/%d/%Y')
+    df['Foot Traffic Volume'] = _volume(df['Foot Traffic Volume'])
+    return df
+
+
+# Plaza listings (sanjosedataset.csv schema) with surrounding whitespace stripped from every text column
+def read_plaza_listings(source=PLAZA_FILE):
+    df = pd.read_csv(source, dtype=PLAZA_DTYPES)
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].str.strip().astype('category')
+        elif not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = df[column].str.strip()
+    return df
+
+
+# Uploaded heat map points: latitude, longitude and weight as float32
+def read_heat_points(source):
+    return pd.read_csv(source, usecols=HEAT_POINT_COLUMNS, dtype={column: 'float32' for column in HEAT_POINT_COLUMNS})
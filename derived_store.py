@@ -0,0 +1,217 @@
+import collections
+import hashlib
+import io
+import os
+import pickle
+import threading
+
+# Default directory for artifacts derived from the CSV files (rollups, cubes, indexes)
+CACHE_DIR = ".cache"
+
+# Bytes just before the end of the already-ingested part of a file that must be unchanged for new rows
+# to be treated as appended (see load_incremental)
+APPEND_CHECK_BYTES = 4096
+
+# An incrementally maintained store is written back once the rows ingested since it was last written reach this
+# fraction of the ones it already covers, so writing it costs a constant amount per appended row on average
+SNAPSHOT_GROWTH = 0.25
+
+
+# Cheap signature of a file (size + modification time) used to skip re-hashing unchanged files
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# Content hash of a file, read in chunks so large files don't have to fit in memory
+def file_hash(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Path of the on-disk store for an artifact derived from a source file
+def store_path(file_path, kind, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{name}.{kind}.pkl")
+
+
+# Stored payload of a derived artifact, or None if there is none or it can't be read
+def read_store(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+# Load an artifact derived from file_path, calling build(file_path) and saving the result only when
+# the file's content (or the artifact version) has changed since the stored copy was built
+def load_derived(file_path, kind, version, build, cache_dir=CACHE_DIR):
+    path = store_path(file_path, kind, cache_dir)
+    signature = file_signature(file_path)
+
+    stored = read_store(path)
+    if stored is not None and stored.get('version') == version:
+        # Same size and mtime: trust the store without reading the source file
+        if stored.get('signature') == signature:
+            return stored['value']
+
+        # File was touched but its content is identical: refresh the signature only
+        content_hash = file_hash(file_path)
+        if stored.get('hash') == content_hash:
+            stored['signature'] = signature
+            write_store(path, stored)
+            return stored['value']
+    else:
+        content_hash = file_hash(file_path)
+
+    value = build(file_path)
+    write_store(path, {
+        'version': version,
+        'signature': signature,
+        'hash': content_hash,
+        'value': value,
+    })
+    return value
+
+
+# Write the store atomically so a crashed rerun never leaves a half-written file behind
+def write_store(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+# Fingerprint of the first `end` bytes of a file from its header line and the bytes just before `end`.
+# It stays the same while rows are only appended after `end`, and reading it costs the same for any file size.
+def prefix_fingerprint(file_path, end, check_bytes=APPEND_CHECK_BYTES):
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        f.seek(max(end - check_bytes, 0))
+        last = f.read(min(end, check_bytes))
+    return hashlib.sha256(header + b"\0" + last).hexdigest()
+
+
+# CSV rows from byte offset start to the current end of the file, with the file's header line in front so they
+# parse like the whole file. Returns the rows, the offset just past the last one read and whether that offset is
+# at the end of a line. A full read (start 0) takes every row, including a last one without a line break. Reading
+# appended rows leaves out an incomplete last line, which may still be being written, for the next load.
+def read_rows(file_path, start=0):
+    with open(file_path, "rb") as f:
+        header = f.readline() if start > 0 else b""
+        f.seek(start)
+        data = f.read()
+    if start > 0:
+        data = data[:data.rfind(b"\n") + 1]
+    return io.BytesIO(header + data), start + len(data), not data or data.endswith(b"\n")
+
+
+# Whether rows appended at offset start on a line of their own; after a last line without a line break, the next
+# bytes must be one, or that line has been changed rather than followed by new rows
+def _continues_line(file_path, offset):
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        return f.read(1) in (b"", b"\n", b"\r")
+
+
+# Chunks of an incrementally maintained store with a new chunk added at the end. A chunk is merged into the one
+# before it (merge(previous, last)) once that one is no bigger by size(chunk), which keeps the number of chunks
+# logarithmic in the history and merges every item a logarithmic number of times over its life. Older chunks are
+# shared with the given list, which is left untouched.
+def append_chunk(chunks, chunk, size, merge):
+    chunks = chunks + [chunk]
+    while len(chunks) > 1 and size(chunks[-2]) <= size(chunks[-1]):
+        chunks[-2:] = [merge(chunks[-2], chunks[-1])]
+    return chunks
+
+
+# Values derived from the chunks of an incrementally maintained store (an index per chunk, say), carried over from
+# one version of the store to the next: build(chunk, earlier) only runs for the chunks that are new or were merged
+# since the last call with the same key, and gets the values of the chunks before it.
+class ChunkMemo:
+    def __init__(self, build):
+        self.build = build
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key, chunks):
+        with self._lock:
+            # Chunks only change at the end, so the values kept are those of the chunks both versions start with
+            previous = self._entries.get(key, [])
+            kept = 0
+            while kept < min(len(previous), len(chunks)) and previous[kept][0] is chunks[kept]:
+                kept += 1
+            entries = previous[:kept]
+            for chunk in chunks[kept:]:
+                entries.append((chunk, self.build(chunk, [value for _, value in entries])))
+            self._entries[key] = entries
+            return [value for _, value in entries]
+
+
+_payloads = {}
+_payload_locks = collections.defaultdict(threading.Lock)
+_payload_locks_lock = threading.Lock()
+
+
+# Load an artifact derived from an append-only CSV file. ingest(source, value) folds the CSV rows in source
+# into value (None for a full build) and returns the new value.
+#
+# The store remembers how far into the file it has read. When the file has grown since then and the header and the
+# bytes just before that offset are unchanged, only the appended rows are read and ingested. Any other change (the
+# file shrank, was rewritten, its unterminated last row was extended, or `version` changed) rebuilds from the whole
+# file. The latest payload is kept in memory, and the store on disk is only rewritten once it lags SNAPSHOT_GROWTH
+# behind; a new process reads it back and ingests the rows appended since. Together with an ingest whose cost
+# depends on the new rows only, a refresh then costs as much as the new data rather than the whole history.
+def load_incremental(file_path, kind, version, ingest, cache_dir=CACHE_DIR):
+    path = store_path(file_path, kind, cache_dir)
+    with _payload_locks_lock:
+        lock = _payload_locks[path]
+    with lock:
+        signature = file_signature(file_path)
+        stored = _payloads.get(path)
+        if stored is None:
+            stored = read_store(path)
+            if stored is not None:
+                stored = dict(stored, snapshot_offset=stored.get('offset'))
+        if stored is None or stored.get('version') != version:
+            stored = None
+
+        if stored is not None and stored['signature'] == signature:
+            _payloads[path] = stored
+            return stored['value']
+
+        offset = stored['offset'] if stored is not None else None
+        if offset is not None and signature[0] >= offset and \
+                prefix_fingerprint(file_path, offset) == stored['fingerprint'] and \
+                (stored.get('terminated', True) or _continues_line(file_path, offset)):
+            source, end, terminated = read_rows(file_path, offset)
+            if end > offset:
+                value = ingest(source, stored['value'])
+            else:
+                value, terminated = stored['value'], stored.get('terminated', True)
+            snapshot_offset = stored['snapshot_offset']
+        else:
+            source, end, terminated = read_rows(file_path)
+            value = ingest(source, None)
+            snapshot_offset = None
+
+        stored = {
+            'version': version,
+            'signature': signature,
+            'offset': end,
+            'fingerprint': prefix_fingerprint(file_path, end),
+            'terminated': terminated,
+            'value': value,
+        }
+        if snapshot_offset is None or end - snapshot_offset > SNAPSHOT_GROWTH * snapshot_offset:
+            write_store(path, stored)
+            snapshot_offset = end
+        _payloads[path] = dict(stored, snapshot_offset=snapshot_offset)
+        return value
@@ -1,97 +1,122 @@
+import asyncio
+import contextlib
 import streamlit as st
 import pandas as pd
-import openai
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mtick
-import seaborn as sns
-
-# Set your OpenAI API key (replace with your actual API key)
-openai.api_key = "OPENAI_API_KEY"
+import app_data
+from datasets import PLAZA_FILE
+import llm_gateway
+import perf_metrics
+from llm_prompts import market_details_messages
+from chart_cache import get_chart_cache
+from footflow_core import (FOOD_TYPES, REQUIRED_COLUMNS, RESTAURANT_TYPES, STARTUP_COSTS, format_dollars,
+                           match_plazas, plaza_search, traffic_charts, traffic_summary)
+from thumbnail_cache import ThumbnailCache
 
 # Set page config
 st.set_page_config(page_title="Foot Flow", layout="wide")
+perf_metrics.start_run("footFlow")
+
+# Complete listings and the inverted index over their cuisine/format tags, built once per listings file
+@perf_metrics.cache_resource
+def load_plaza_search(columns, file_path=PLAZA_FILE):
+    return plaza_search(app_data.plaza_listings(file_path), columns)
+
+# Plazas shown per page of the results table
+RESULTS_PER_PAGE = 10
 
-# Load Data
-@st.cache_data
-def load_data(file_path="sanjosedataset.csv"):
-    data = pd.read_csv(file_path)
-    return data
+# Downscaled listing images, fetched once and shared by every session
+@perf_metrics.cache_resource
+def get_thumbnail_cache():
+    return ThumbnailCache()
 
-@st.cache_data
-def load_foot_traffic_data(file_path="sanjosefoottrafficvolume.csv"):
-    foot_traffic_data = pd.read_csv(file_path)
-    return foot_traffic_data
+# Number of plazas whose market details are fetched in the background at the same time
+PREFETCH_CONCURRENCY = 4
 
 # Function to get detailed market information using OpenAI
-def get_market_details(center_name):
+async def fetch_market_details(center_name, limit=None):
+    import openai  # Loaded by the gateway anyway once a request is made
+
     try:
         # Enhanced prompt for gathering more comprehensive details
-        prompt = f"""
-        Provide a detailed analysis of the market for the plaza called '{center_name}'. 
-        Include the following information:
-        1. Pros and cons of the plaza.
-        2. Accessibility issues (e.g., parking, public transport access).
-        3. Demographics of the types of people or groups who frequent the plaza (e.g., families, young professionals, tourists).
-        4. Additional factors or details that a new restaurant owner should consider before deciding to open their business in this plaza, such as foot traffic trends, local competition, and general atmosphere.
-        """
+        messages = market_details_messages(center_name)
 
         # Use the chat-based model with the correct endpoint
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # Updated model for chat-based completions
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,  # Increase token limit to get detailed responses
-            temperature=0.7  # Set temperature for more diverse responses
-        )
-        
-        return response['choices'][0]['message']['content'].strip()  # Return the detailed text
+        async with limit or contextlib.nullcontext():
+            return await llm_gateway.get_gateway().chat(
+                messages,
+                model="gpt-3.5-turbo",  # Updated model for chat-based completions
+                max_tokens=500,  # Increase token limit to get detailed responses
+                temperature=0.7  # Set temperature for more diverse responses
+            )
 
     except openai.error.OpenAIError as e:
         return f"An OpenAI error occurred: {str(e)}"
     except Exception as e:
         return f"An unexpected error occurred: {str(e)}"
 
+def get_market_details(center_name):
+    return llm_gateway.run(fetch_market_details(center_name))
+
+# Cancel any market details still being fetched for a previous filter
+def cancel_market_details_prefetch():
+    for future in st.session_state.get('market_details_futures', {}).values():
+        future.cancel()
+    st.session_state['market_details_futures'] = {}
+
+# Start fetching market details for every filtered plaza in the background, a few at a time
+def prefetch_market_details(center_names):
+    cancel_market_details_prefetch()
+    limit = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+    st.session_state['market_details_futures'] = {
+        center_name: llm_gateway.submit(fetch_market_details(center_name, limit))
+        for center_name in center_names
+    }
+
+# Use the prefetched result when there is one, otherwise fetch it now
+def get_prefetched_market_details(center_name):
+    future = st.session_state.get('market_details_futures', {}).get(center_name)
+    if future is None or future.cancelled():
+        return get_market_details(center_name)
+    return future.result()
+
 # Display title and description
 st.title("Foot Flow: Analyzing San Jose Foot Traffic for New Restaurants")
 st.write("Explore high-foot-traffic areas in San Jose that best match your restaurant's needs. "
          "Use the options below to narrow down locations based on restaurant type and food preferences.")
 
-# Load data directly from sanjosedataset.csv
-data = load_data()
+# Load data directly from sanjosedataset.csv (typed and shared with the other pages)
+data = app_data.plaza_listings()
 
-# Load foot traffic data
-foot_traffic_data = load_foot_traffic_data()
+# Load foot traffic rollups
+foot_traffic_rollups = app_data.foot_traffic_rollups()
+perf_metrics.checkpoint("load data")
 
 # Filter required columns
-required_columns = ['Location Name', 'Address', 'Cuisine Compatibility', 'Image URL', 'Average Store Size (sq ft)', 'Average Lease Rate ($/sq ft)', 'Price Range', 'Vacancy Status']
+required_columns = REQUIRED_COLUMNS
 if not all(column in data.columns for column in required_columns):
     st.error(f"Dataset is missing one or more required columns: {', '.join(required_columns)}")
 else:
-    data = data[required_columns]
+    data, plaza_index = load_plaza_search(tuple(required_columns))
 
     # Create columns for dropdown menus
     col1, col2, col3 = st.columns(3)
 
     # What Kind of Restaurant Selectbox
     with col1:
-        restaurant_type = st.selectbox("What kind of restaurant do you want to open?", 
-                                        ["Fast Food", "Casual Dining", "Fine Dining", "Cafe", "Buffet", "Food Truck", "Other"])
+        restaurant_type = st.selectbox("What kind of restaurant do you want to open?", RESTAURANT_TYPES)
 
     # What Kind of Food Multi-Select
     with col2:
-        food_types = st.multiselect("What kind of food will you serve?", 
-                                    ["Italian", "Mexican", "Chinese", "Indian", "Japanese", "American", "Mediterranean", "Vegan", "Fusion", "Other"])
+        food_types = st.multiselect("What kind of food will you serve?", FOOD_TYPES)
 
     # Estimated Startup Cost Dropdown
     with col3:
-        startup_costs = st.selectbox("Select your estimated startup costs:", 
-                                     ["<$10,000", "$10,000-$50,000", "$50,000-$100,000", "$100,000+"])
+        startup_costs = st.selectbox("Select your estimated startup costs:", STARTUP_COSTS)
 
     # Square footage input
     # Replace square footage input with a slider
     square_footage = st.slider("Select desired square footage (sq²):", min_value=100, max_value=10000, step=100)
+    perf_metrics.checkpoint("inputs")
 
 
     # Session state for filtered data
@@ -100,47 +125,50 @@ else:
 
     # Submit button
     if st.button("Submit"):
-        # Clean and filter data based on restaurant type and food types
-        filtered_data = data.dropna(subset=['Cuisine Compatibility'])  # Remove rows where 'Cuisine Compatibility' is NaN
-
-        # Apply the filtering logic to check if any selected restaurant type or food type is present in 'Cuisine Compatibility'
-        filtered_data = filtered_data[filtered_data['Cuisine Compatibility'].apply(
-            lambda x: restaurant_type.lower() in x.lower() or any(food.lower() in x.lower() for food in food_types))
-        ]
-
-        # If no matches are found after filtering
-        if filtered_data.empty:
+        # Plazas whose 'Cuisine Compatibility' tags match the restaurant type or any food type, best match first,
+        # one row per plaza with its monthly and yearly lease cost
+        unique_filtered_data = match_plazas(data, plaza_index, restaurant_type, food_types, square_footage)
+
+        # If no matches are found after filtering, drop the previous results and stop fetching their details
+        if unique_filtered_data.empty:
+            cancel_market_details_prefetch()
+            st.session_state['filtered_data'] = pd.DataFrame()
             st.write("No matching plazas found. Please adjust your selection criteria.")
         else:
-            # Process the filtered data
-            filtered_data = filtered_data.dropna().applymap(lambda x: x.strip() if isinstance(x, str) else x)
-
-            # Calculate monthly and yearly lease cost per location
-            filtered_data['Monthly Lease Cost'] = filtered_data['Average Lease Rate ($/sq ft)'] * square_footage
-            filtered_data['Yearly Lease Cost'] = filtered_data['Monthly Lease Cost'] * 12
-
             # Format the lease cost columns
-            filtered_data['Monthly Lease Cost'] = filtered_data['Monthly Lease Cost'].apply(lambda x: f"${x:,.0f}")
-            filtered_data['Yearly Lease Cost'] = filtered_data['Yearly Lease Cost'].apply(lambda x: f"${x:,.0f}")
-
-            # Ensure all plazas are shown by removing duplicate entries
-            unique_filtered_data = filtered_data.drop_duplicates(subset=['Location Name'])
-
-            # Reset index to avoid empty index rows in the display
-            unique_filtered_data.reset_index(drop=True, inplace=True)
+            unique_filtered_data['Monthly Lease Cost'] = unique_filtered_data['Monthly Lease Cost'].apply(format_dollars)
+            unique_filtered_data['Yearly Lease Cost'] = unique_filtered_data['Yearly Lease Cost'].apply(format_dollars)
 
             # Store in session state
             st.session_state['filtered_data'] = unique_filtered_data
 
-    # Render the table only if data exists
-    if not st.session_state['filtered_data'].empty:
-        markdown_table = "| Image | Center Name | Address | Price Range | Monthly Lease Cost | Yearly Lease Cost | Vacancy Status |\n"
-        markdown_table += "|:-----:|:-----------:|:-------:|:-----------:|:------------------:|:-----------------:|:--------------:|\n"
+            # Fetch details for the new results in the background so picking a plaza is instant
+            prefetch_market_details(unique_filtered_data['Location Name'].unique())
+        perf_metrics.checkpoint("plaza search")
 
-        for index, row in st.session_state['filtered_data'].iterrows():
-            markdown_table += f"| <img src='{row['Image URL']}' alt='{row['Location Name']}' width='150' height='150' /> | {row['Location Name']} | {row['Address']} | {row['Price Range']} | {row['Monthly Lease Cost']} | {row['Yearly Lease Cost']} | {row['Vacancy Status']} |\n"
+    # Render the table only if data exists, one page at a time with locally cached thumbnails
+    if not st.session_state['filtered_data'].empty:
+        results = st.session_state['filtered_data']
+        page_count = (len(results) - 1) // RESULTS_PER_PAGE + 1
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1) if page_count > 1 else 1
+        page_rows = results.iloc[(page - 1) * RESULTS_PER_PAGE:page * RESULTS_PER_PAGE]
+
+        thumbnails = get_thumbnail_cache()
+        images = thumbnails.get_many(page_rows['Image URL'])
+        thumbnails.prefetch(results['Image URL'].iloc[page * RESULTS_PER_PAGE:(page + 1) * RESULTS_PER_PAGE])
+
+        markdown_rows = [
+            "| Image | Center Name | Address | Price Range | Monthly Lease Cost | Yearly Lease Cost | Vacancy Status |",
+            "|:-----:|:-----------:|:-------:|:-----------:|:------------------:|:-----------------:|:--------------:|",
+        ]
+        for row, image in zip(page_rows.to_dict('records'), images):
+            markdown_rows.append(
+                f"| <img src='{thumbnails.src(row['Image URL'], image)}' alt='{row['Location Name']}' width='150' height='150' /> "
+                f"| {row['Location Name']} | {row['Address']} | {row['Price Range']} | {row['Monthly Lease Cost']} "
+                f"| {row['Yearly Lease Cost']} | {row['Vacancy Status']} |")
 
-        st.markdown(markdown_table, unsafe_allow_html=True)
+        st.markdown("\n".join(markdown_rows) + "\n", unsafe_allow_html=True)
+        perf_metrics.checkpoint("results table")
 
     # Ensure the 'Location Name' column is present in filtered data before continuing
     if 'Location Name' not in st.session_state['filtered_data'].columns:
@@ -160,7 +188,8 @@ else:
             )
 
         if st.session_state['selected_place']:
-            details = get_market_details(st.session_state['selected_place'])
+            with st.spinner("Loading market details..."), perf_metrics.stage("market details"):
+                details = get_prefetched_market_details(st.session_state['selected_place'])
             st.write(f"### Detailed Information about {st.session_state['selected_place']}")
             st.write(details)
 
@@ -169,85 +198,35 @@ else:
         ### HERE
 
          # Foot Traffic Data for the selected plaza
-        foot_traffic_plaza = foot_traffic_data[foot_traffic_data['Business Corridor'] == selected_place]
+        foot_traffic_plaza = foot_traffic_rollups.get(selected_place)
 
-        if foot_traffic_plaza.empty:
+        if foot_traffic_plaza is None:
             st.write(f"No foot traffic data available for {selected_place}.")
         else:
-            # 1. Foot Traffic by Day per Week
-            foot_traffic_grouped_day = foot_traffic_plaza.groupby('Day').agg({'Foot Traffic Volume': 'mean'}).reset_index()
-
-            # Define the correct order for days of the week (Monday to Sunday)
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            foot_traffic_grouped_day['Day'] = pd.Categorical(foot_traffic_grouped_day['Day'], categories=day_order, ordered=True)
+            # 1. Foot Traffic by Day per Week (sorted Monday to Sunday) and 2. by Weeks of the Month ('Week 1' to 'Week 4'),
+            # rendered once per plaza and data, then served from the shared chart cache
+            for png in traffic_charts(get_chart_cache(), foot_traffic_plaza, selected_place).values():
+                st.image(png, width="stretch")
 
-            # Sort days by the correct order
-            foot_traffic_grouped_day = foot_traffic_grouped_day.sort_values('Day')
-
-            # Plot Foot Traffic by Day
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.barplot(data=foot_traffic_grouped_day, x='Day', y='Foot Traffic Volume', ax=ax)
-            ax.set_title(f"Foot Traffic by Day for {selected_place}")
-            ax.set_xlabel('Day of the Week')
-            ax.set_ylabel('Average Foot Traffic Volume')
-
-            # Format y-axis with commas for readability
-            ax.get_yaxis().set_major_formatter(mtick.FuncFormatter(lambda x, loc: "{:,}".format(int(x))))
-
-            st.pyplot(fig)
-
-            # 2. Foot Traffic by Weeks of the Month
-            # Foot Traffic by Weeks of the Month
-            # Convert 'Date' to datetime and extract the week number for the month
-            foot_traffic_plaza['Date'] = pd.to_datetime(foot_traffic_plaza['Date'])
-            foot_traffic_plaza['Week of Month'] = (foot_traffic_plaza['Date'].dt.day - 1) // 7 + 1  # Week number in the month
-
-            # Restrict week numbers to 4 (i.e., make sure Week 5 does not appear)
-            foot_traffic_plaza['Week of Month'] = foot_traffic_plaza['Week of Month'].apply(lambda x: min(x, 4))
-
-            # Group by the week of the month and sum foot traffic volumes
-            foot_traffic_grouped_week = foot_traffic_plaza.groupby('Week of Month').agg({'Foot Traffic Volume': 'sum'}).reset_index()
-
-            # Map the week numbers to 'Week 1', 'Week 2', 'Week 3', 'Week 4'
-            foot_traffic_grouped_week['Week of Month'] = foot_traffic_grouped_week['Week of Month'].apply(lambda x: f"Week {x}")
-
-            # Plot Foot Traffic by Week of the Month
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.lineplot(data=foot_traffic_grouped_week, x='Week of Month', y='Foot Traffic Volume', ax=ax)
-            ax.set_title(f"Overall Foot Traffic by Week of the Month for {selected_place}")
-            ax.set_xlabel('Week of the Month')
-            ax.set_ylabel('Total Foot Traffic Volume')
-
-            # Format y-axis with commas for readability
-            ax.get_yaxis().set_major_formatter(mtick.FuncFormatter(lambda x, loc: "{:,}".format(int(x))))
-
-            st.pyplot(fig)
-
-            # 3. Calculate Total Foot Traffic Per Year (Text Summary)
-            foot_traffic_plaza['Year'] = foot_traffic_plaza['Date'].dt.year
-            foot_traffic_grouped_year = foot_traffic_plaza.groupby('Year').agg({'Foot Traffic Volume': 'sum'}).reset_index()
-
-            # Calculate the total foot traffic per year and display as a text summary
-            total_traffic_per_year = foot_traffic_grouped_year['Foot Traffic Volume'].sum()
-
-            # Calculate the total foot traffic per week and overall average per week
-            foot_traffic_plaza['Week of Year'] = foot_traffic_plaza['Date'].dt.isocalendar().week
-            foot_traffic_grouped_week_year = foot_traffic_plaza.groupby('Week of Year').agg({'Foot Traffic Volume': 'sum'}).reset_index()
-
-            # Calculate Overall Average Foot Traffic Per Week
-            avg_traffic_per_week = foot_traffic_grouped_week_year['Foot Traffic Volume'].mean().round().astype(int)
-
-            # Section Title for the Overall Graphs
+            # 3. Totals and averages precomputed by the rollup store
             st.subheader("Overall Foot Traffic Insights")
-
-            # **Overall Average Foot Traffic Per Day**: Calculate and display the average daily foot traffic
-            avg_traffic_per_day = foot_traffic_grouped_day['Foot Traffic Volume'].mean().round().astype(int)
-            st.write(f"**Overall Average Foot Traffic Per Day:** {avg_traffic_per_day:,} people")  # Formatting with commas
-
-            # **Overall Average Foot Traffic Per Week**: Calculate and display the average weekly foot traffic
-            st.write(f"**Overall Average Foot Traffic Per Week:** {avg_traffic_per_week:,} people")  # Formatting with commas
-
-            # **Total Foot Traffic Per Year**: Sum of all foot traffic volumes for the year
-            st.write(f"**Total Foot Traffic Per Year:** {total_traffic_per_year:,} people")  # Formatting with commas
-
-# THIS CODE WAS GENERATED BY CHATGBT
+            for label, value in traffic_summary(foot_traffic_plaza).items():
+                st.write(f"**{label}:** {value:,} people")  # Formatting with commas
+            perf_metrics.checkpoint("charts")
+
+            # 4. Any date range, with rolling averages and the week-over-week change up to its last day, answered
+            # from the corridor's running totals instead of summing its rows
+            traffic_index = app_data.corridor_traffic_index()
+            if selected_place in traffic_index:
+                st.subheader("Foot Traffic by Date Range")
+                date_range = st.date_input("Date range", value=(traffic_index.first.date(), traffic_index.last.date()),
+                                           min_value=traffic_index.first.date(), max_value=traffic_index.last.date())
+
+                # The picker returns one date while the range is being chosen
+                range_start, range_end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[-1])
+                for column, (label, value) in zip(st.columns(4), traffic_index.summary(selected_place, range_start,
+                                                                                       range_end).items()):
+                    column.metric(label, value)
+                perf_metrics.checkpoint("date range")
+
+perf_metrics.finish_run()
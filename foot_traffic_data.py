@@ -1,60 +1,51 @@
-import pandas as pd
-import numpy as np
-import random
 import openai
+import llm_gateway
+from llm_prompts import predict_needs_prompt
+from synthetic_data import generate_restaurant_traffic
 
 # Set up OpenAI API key
 openai.api_key = "your_openai_api_key"
 
-# Generate random restaurant names and zip codes
-restaurant_names = ["Burger Haven", "Pizza Palace", "Taco Town", "Sushi Spot", "Grill House", 
-                    "Pasta Place", "Bistro Bites", "Steak Station", "Salad Central", "Wrap World"]
-zip_codes = ["10001", "90001", "60601", "30301", "80201", "94101", "33101", "75201", "98101", "85001"]
-
-# Generate sample data for a month (30 days)
-dates = pd.date_range(start="2023-10-01", end="2023-10-30")
-days = dates.strftime("%A")  # Days of the week
-foot_traffic_volume = [random.randint(50, 500) for _ in range(len(dates))]  # Random foot traffic numbers
-inventory_used = [round(traffic * random.uniform(0.3, 0.6)) for traffic in foot_traffic_volume]  # Approximate inventory
-staffing_hours = [round(traffic * random.uniform(0.05, 0.15), 2) for traffic in foot_traffic_volume]  # Approximate staffing hours
-restaurant_name = [random.choice(restaurant_names) for _ in range(len(dates))]  # Random restaurant names
-zip_code = [random.choice(zip_codes) for _ in range(len(dates))]  # Random zip codes
-
-# Create DataFrame
-data = pd.DataFrame({
-    "Date": dates,
-    "Day": days,
-    "Restaurant Name": restaurant_name,
-    "Zip Code": zip_code,
-    "Foot Traffic Volume": foot_traffic_volume,
-    "Inventory Used": inventory_used,
-    "Staffing Hours": staffing_hours
-})
-
-# Save to CSV (optional)
-data.to_csv("sample_foot_traffic_data.csv", index=False)
-
-# Display sample data
-print("Sample Data:")
-print(data.head())
+
+# Sample data for a month (30 days) of a few restaurants, seeded and generated locally with no network use.
+# For load testing at scale use synthetic_data.py, which writes the same schema as sharded files.
+def generate_sample_data(n_restaurants=10, start="2023-10-01", days=30, seed=0):
+    return generate_restaurant_traffic(n_restaurants=n_restaurants, start=start, days=days, seed=seed)
 
 # Function to use OpenAI for predicting inventory and staffing needs
 def predict_needs(restaurant, foot_traffic):
     # Generate OpenAI prompt
-    prompt = (f"For a restaurant named '{restaurant}' with an expected foot traffic volume of {foot_traffic}, "
-              "estimate the necessary inventory and staffing hours required.")
-    response = openai.Completion.create(
-        engine="text-davinci-003",
-        prompt=prompt,
+    prompt = predict_needs_prompt(restaurant, foot_traffic)
+    return llm_gateway.completion(
+        prompt,
+        model="text-davinci-003",
+        max_tokens=50
+    )
+
+# Score many rows at once: prompts go out concurrently through the gateway instead of one after another
+def predict_needs_batch(restaurants, foot_traffics):
+    prompts = [predict_needs_prompt(restaurant, foot_traffic) for restaurant, foot_traffic in zip(restaurants, foot_traffics)]
+    return llm_gateway.completion_batch(
+        prompts,
+        model="text-davinci-003",
+        return_exceptions=True,
         max_tokens=50
     )
-    return response.choices[0].text.strip()
-
-# Example of using OpenAI with generated data
-for i in range(5):  # Example with first 5 entries
-    restaurant = data["Restaurant Name"].iloc[i]
-    foot_traffic = data["Foot Traffic Volume"].iloc[i]
-    prediction = predict_needs(restaurant, foot_traffic)
-    print(f"Predictions for {restaurant} with Foot Traffic Volume of {foot_traffic}:")
-    print(prediction)
-    print("-" * 30)
+
+if __name__ == "__main__":
+    data = generate_sample_data()
+
+    # Save to CSV (optional)
+    data.to_csv("sample_foot_traffic_data.csv", index=False)
+
+    # Display sample data
+    print("Sample Data:")
+    print(data.head())
+
+    # Example of using OpenAI with generated data
+    sample = data.head(5)  # Example with first 5 entries
+    predictions = predict_needs_batch(sample["Restaurant Name"], sample["Foot Traffic Volume"])
+    for restaurant, foot_traffic, prediction in zip(sample["Restaurant Name"], sample["Foot Traffic Volume"], predictions):
+        print(f"Predictions for {restaurant} with Foot Traffic Volume of {foot_traffic}:")
+        print(prediction)
+        print("-" * 30)
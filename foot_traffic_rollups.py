@@ -0,0 +1,123 @@
+import pandas as pd
+
+from datasets import DAY_ORDER, FOOT_TRAFFIC_FILE, read_foot_traffic
+from derived_store import CACHE_DIR, append_chunk, load_incremental
+
+# Bump this whenever the shape of the stored rollups changes so old stores get rebuilt
+ROLLUP_VERSION = 6
+
+CORRIDOR = 'Business Corridor'
+VOLUME = 'Foot Traffic Volume'
+
+
+# Additive per-corridor aggregates of a block of rows: volume sums by weekday, week of the month, week of the year,
+# year and date (for the time index, see time_index.corridor_time_index), plus row counts by weekday for the daily
+# averages. Aggregates of two blocks combine with merge_aggregates (merge_by_date for the volume by date), so rows
+# appended later never need the history they are added to. Rows without a date (unparseable dates are read as NaT)
+# or without a corridor are left out.
+def aggregate_traffic(foot_traffic_data):
+    # Parse 'Date' once for the whole block instead of once per selected corridor (a no-op for read_foot_traffic frames)
+    dates = pd.to_datetime(foot_traffic_data['Date'], errors='coerce')
+    valid = dates.notna() & foot_traffic_data[CORRIDOR].notna()
+    foot_traffic_data, dates = foot_traffic_data[valid], dates[valid]
+
+    # Plain labels, so blocks whose corridor categories differ still line up when merged
+    corridor = foot_traffic_data[CORRIDOR].astype(str)
+    volume = foot_traffic_data[VOLUME].astype('int64')
+    day = pd.Series(pd.Categorical(foot_traffic_data['Day'], categories=DAY_ORDER, ordered=True),
+                    index=foot_traffic_data.index, name='Day')
+
+    # Week number in the month, restricted to 4 (i.e., make sure Week 5 does not appear)
+    keys = {
+        'by_day': day,
+        'by_week_of_month': ((dates.dt.day - 1) // 7 + 1).clip(upper=4).rename('Week of Month'),
+        'by_week_of_year': dates.dt.isocalendar().week.astype(int).rename('Week of Year'),
+        'by_year': dates.dt.year.rename('Year'),
+        'by_date': dates.dt.normalize().rename('Date'),
+    }
+    aggregates = {name: volume.groupby([corridor, key], observed=True).sum() for name, key in keys.items()}
+    aggregates['rows_by_day'] = volume.groupby([corridor, day], observed=True).size()
+    return aggregates
+
+
+# Aggregates of two consecutive blocks of rows
+def merge_aggregates(old, new):
+    return {name: old[name].add(new[name], fill_value=0).astype('int64') for name in old}
+
+
+# Volume by (corridor, date) of two consecutive chunks of rows
+def merge_by_date(old, new):
+    return pd.concat([old, new]).groupby(level=[0, 1]).sum().astype('int64')
+
+
+# Rollups of some corridors (the frames and summary figures the Foot Flow page shows) from the aggregates. Every
+# aggregate is cut down to those corridors and split into one frame per corridor in a single pass.
+def corridor_rollups(aggregates, corridors):
+    picked = {name: aggregate[aggregate.index.isin(corridors, level=0)] for name, aggregate in aggregates.items()}
+    by_week_of_month = picked['by_week_of_month']
+    frames = {
+        # 1. Average foot traffic by day of the week, sorted Monday to Sunday
+        'by_day': _by_corridor((picked['by_day'] / picked['rows_by_day']).sort_index(), 'Day'),
+        # 2. Total foot traffic by week of the month
+        'by_week_of_month': _by_corridor(by_week_of_month, 'Week of Month',
+                                         "Week " + by_week_of_month.index.get_level_values(1).astype(str)),
+        # 3. Total foot traffic by week of the year and by year
+        'by_week_of_year': _by_corridor(picked['by_week_of_year'], 'Week of Year'),
+        'by_year': _by_corridor(picked['by_year'], 'Year'),
+    }
+
+    rollups = {}
+    for corridor in corridors:
+        rollup = {name: by_corridor[corridor] for name, by_corridor in frames.items()}
+        # Text summary figures shown under the charts
+        rollup['avg_per_day'] = int(round(rollup['by_day'][VOLUME].mean()))
+        rollup['avg_per_week'] = int(round(rollup['by_week_of_year'][VOLUME].mean()))
+        rollup['total_per_year'] = int(rollup['by_year'][VOLUME].sum())
+        rollups[corridor] = rollup
+    return rollups
+
+
+# One frame per corridor of a (corridor, key) aggregate with the key (or the given labels of it) and the volume,
+# in the order of the aggregate
+def _by_corridor(aggregate, key, labels=None):
+    labels = aggregate.index.get_level_values(1) if labels is None else labels
+    values = aggregate.to_numpy()
+    return {corridor: pd.DataFrame({key: labels[positions], VOLUME: values[positions]})
+            for corridor, positions in aggregate.groupby(level=0, sort=False).indices.items()}
+
+
+# Compute every per-corridor aggregate the Foot Flow page needs in one vectorized pass
+def build_rollups(foot_traffic_data):
+    return ingest_rows(None, foot_traffic_data)['rollups']
+
+
+# Fold new rows into rollup state ({'aggregates', 'by_date', 'rollups'}); state None builds it from scratch.
+# The weekday, week and year aggregates have a bucket per corridor and weekday, week or year, so merging them costs
+# the same however long the history is. The volume by date grows with every day, so it is kept in chunks instead
+# (see derived_store.append_chunk) and the new rows only add a chunk of their own. Only the corridors that appear
+# in the new rows are recomputed, and the given state is left untouched so readers can keep using it.
+def ingest_rows(state, foot_traffic_data):
+    new = aggregate_traffic(foot_traffic_data)
+    by_date = new.pop('by_date')
+    if state is not None and by_date.empty:
+        return state
+
+    aggregates, by_date_chunks, rollups = new, [by_date], {}
+    if state is not None:
+        aggregates = merge_aggregates(state['aggregates'], new)
+        by_date_chunks = append_chunk(state['by_date'], by_date, len, merge_by_date)
+        rollups = dict(state['rollups'])
+
+    rollups.update(corridor_rollups(aggregates, new['rows_by_day'].index.unique(level=0)))
+    return {'aggregates': aggregates, 'by_date': by_date_chunks, 'rollups': dict(sorted(rollups.items()))}
+
+
+# Rollup state for a foot traffic file; rows appended since the last load are read and folded in on their own
+def load_rollup_state(file_path=FOOT_TRAFFIC_FILE, cache_dir=CACHE_DIR):
+    return load_incremental(file_path, 'rollups', ROLLUP_VERSION,
+                            lambda source, state: ingest_rows(state, read_foot_traffic(source)), cache_dir)
+
+
+# Per-corridor rollups for a foot traffic file, kept up to date with rows appended to it
+def load_rollups(file_path=FOOT_TRAFFIC_FILE, cache_dir=CACHE_DIR):
+    return load_rollup_state(file_path, cache_dir)['rollups']
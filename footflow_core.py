@@ -0,0 +1,163 @@
+# Foot Flow analysis without Streamlit: plaza search, lease costs, per-plaza foot traffic summaries, charts and
+# HTML reports. footFlow.py shows these in the app and footflow_reports.py writes them for every plaza in batch.
+import html
+import re
+
+from plaza_search import PlazaTagIndex
+
+# Listing columns the search, the results table and the reports use
+REQUIRED_COLUMNS = ['Location Name', 'Address', 'Cuisine Compatibility', 'Image URL', 'Average Store Size (sq ft)',
+                    'Average Lease Rate ($/sq ft)', 'Price Range', 'Vacancy Status']
+RESTAURANT_TYPES = ["Fast Food", "Casual Dining", "Fine Dining", "Cafe", "Buffet", "Food Truck", "Other"]
+FOOD_TYPES = ["Italian", "Mexican", "Chinese", "Indian", "Japanese", "American", "Mediterranean", "Vegan", "Fusion", "Other"]
+STARTUP_COSTS = ["<$10,000", "$10,000-$50,000", "$50,000-$100,000", "$100,000+"]
+
+
+# Complete listings and the inverted index over their cuisine/format tags
+def plaza_search(listings, columns=REQUIRED_COLUMNS):
+    listings = listings[list(columns)].dropna().reset_index(drop=True)
+    return listings, PlazaTagIndex(listings['Cuisine Compatibility'])
+
+
+# Monthly and yearly lease cost of a store of square_footage at every listing's average lease rate
+def with_lease_costs(listings, square_footage):
+    monthly = listings['Average Lease Rate ($/sq ft)'] * square_footage
+    return listings.assign(**{'Monthly Lease Cost': monthly, 'Yearly Lease Cost': monthly * 12})
+
+
+def format_dollars(value):
+    return f"${value:,.0f}"
+
+
+# Plazas whose tags match the restaurant type or any food type, best match first, one row per plaza,
+# with their match score and lease costs for square_footage
+def match_plazas(listings, plaza_index, restaurant_type, food_types, square_footage):
+    positions, match_scores = plaza_index.search([restaurant_type] + list(food_types))
+    matches = listings.iloc[positions].copy()
+    matches['Match Score'] = match_scores
+    matches = with_lease_costs(matches, square_footage)
+
+    # Ensure all plazas are shown by removing duplicate entries
+    return matches.drop_duplicates(subset=['Location Name']).reset_index(drop=True)
+
+
+# Summary figures of a plaza's foot traffic rollup (see foot_traffic_rollups), as shown under its charts
+def traffic_summary(rollup):
+    return {
+        'Overall Average Foot Traffic Per Day': rollup['avg_per_day'],
+        'Overall Average Foot Traffic Per Week': rollup['avg_per_week'],
+        'Total Foot Traffic Per Year': rollup['total_per_year'],
+    }
+
+
+# Chart drawers for the rendered-chart cache: each draws on the axes it's given and is keyed by its inputs.
+# Plotting libraries are only imported the first time a chart is actually drawn.
+def plot_traffic_by_day(ax, by_day, place):
+    import matplotlib.ticker as mtick
+    import seaborn as sns
+
+    sns.barplot(data=by_day, x='Day', y='Foot Traffic Volume', ax=ax)
+    ax.set_title(f"Foot Traffic by Day for {place}")
+    ax.set_xlabel('Day of the Week')
+    ax.set_ylabel('Average Foot Traffic Volume')
+
+    # Format y-axis with commas for readability
+    ax.get_yaxis().set_major_formatter(mtick.FuncFormatter(lambda x, loc: "{:,}".format(int(x))))
+
+
+def plot_traffic_by_week(ax, by_week, place):
+    import matplotlib.ticker as mtick
+    import seaborn as sns
+
+    sns.lineplot(data=by_week, x='Week of Month', y='Foot Traffic Volume', ax=ax)
+    ax.set_title(f"Overall Foot Traffic by Week of the Month for {place}")
+    ax.set_xlabel('Week of the Month')
+    ax.set_ylabel('Total Foot Traffic Volume')
+
+    # Format y-axis with commas for readability
+    ax.get_yaxis().set_major_formatter(mtick.FuncFormatter(lambda x, loc: "{:,}".format(int(x))))
+
+
+# PNG bytes of a plaza's two foot traffic charts, rendered through a ChartCache
+def traffic_charts(charts, rollup, place):
+    return {
+        'by_day': charts.render(plot_traffic_by_day, rollup['by_day'], place),
+        'by_week_of_month': charts.render(plot_traffic_by_week, rollup['by_week_of_month'], place),
+    }
+
+
+# File-name friendly version of a plaza or restaurant type name
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-") or "unnamed"
+
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 60em; color: #222; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #ccc; padding: 0.4em 0.8em; text-align: left; }}
+img.chart {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+
+def _table(rows):
+    cells = "".join(f"<tr><th>{html.escape(str(key))}</th><td>{html.escape(str(value))}</td></tr>"
+                    for key, value in rows.items())
+    return f"<table>{cells}</table>"
+
+
+# Standalone HTML report for opening one kind of restaurant of square_footage at a plaza. plaza is a listing row
+# (dict), match_score its tag match for the restaurant type (0 when not listed as compatible), rollup its foot
+# traffic rollup or None, and chart_paths the paths of its chart images relative to the report.
+def plaza_report_html(plaza, restaurant_type, square_footage, match_score, rollup=None, chart_paths=None):
+    monthly = plaza['Average Lease Rate ($/sq ft)'] * square_footage
+    sections = [
+        f"<p>{html.escape(plaza['Address'])}</p>",
+        "<h2>Listing</h2>",
+        _table({
+            'Restaurant type': restaurant_type,
+            'Compatibility': (f"Listed as compatible (match score {match_score:g})" if match_score
+                              else "Not listed as compatible"),
+            'Cuisine compatibility': plaza['Cuisine Compatibility'],
+            'Price range': plaza['Price Range'],
+            'Vacancy status': plaza['Vacancy Status'],
+            'Average store size': f"{plaza['Average Store Size (sq ft)']:,.0f} sq ft",
+        }),
+        f"<h2>Lease Cost for {square_footage:,} sq ft</h2>",
+        _table({
+            'Average lease rate': f"${plaza['Average Lease Rate ($/sq ft)']:,.2f} per sq ft",
+            'Monthly lease cost': format_dollars(monthly),
+            'Yearly lease cost': format_dollars(monthly * 12),
+        }),
+        "<h2>Foot Traffic</h2>",
+    ]
+    if rollup is None:
+        sections.append(f"<p>No foot traffic data available for {html.escape(plaza['Location Name'])}.</p>")
+    else:
+        sections.append(_table({label: f"{value:,} people" for label, value in traffic_summary(rollup).items()}))
+        for path in (chart_paths or {}).values():
+            sections.append(f'<img class="chart" src="{html.escape(path)}" alt="">')
+
+    title = f"{plaza['Location Name']}: {restaurant_type}, {square_footage:,} sq ft"
+    return REPORT_TEMPLATE.format(title=html.escape(title), body="\n".join(sections))
+
+
+# Index page linking every report; reports is a list of (plaza name, restaurant type, square footage, path)
+def report_index_html(reports):
+    rows = "".join(
+        f"<tr><td>{html.escape(plaza)}</td><td>{html.escape(restaurant_type)}</td><td>{square_footage:,}</td>"
+        f"<td><a href=\"{html.escape(path)}\">report</a></td></tr>"
+        for plaza, restaurant_type, square_footage, path in reports)
+    body = f"<table><tr><th>Plaza</th><th>Restaurant type</th><th>Sq ft</th><th></th></tr>{rows}</table>"
+    return REPORT_TEMPLATE.format(title="Foot Flow Plaza Reports", body=body)
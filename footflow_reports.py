@@ -0,0 +1,98 @@
+# Nightly Foot Flow report pack: an HTML report for every plaza x restaurant type x square footage
+#
+#   python footflow_reports.py --out reports/
+#   python footflow_reports.py --out reports/ --square-footage 500 1500 3000 --workers 8
+#
+# The listings, their tag index and the foot traffic rollups are loaded once, here, from the persisted stores.
+# Plazas are then split across a process pool. Each worker gets one plaza's listing, rollup and match scores,
+# draws its charts once and writes the reports for every restaurant type and square footage from them.
+#
+#   <out>/index.html                                     links to every report
+#   <out>/<plaza>/by_day.png, by_week_of_month.png       the plaza's charts, shared by its reports
+#   <out>/<plaza>/<restaurant type>-<sq ft>sqft.html
+import argparse
+import concurrent.futures
+import os
+import time
+
+import numpy as np
+
+from asset_store import write_atomic
+from chart_cache import get_chart_cache
+from datasets import FOOT_TRAFFIC_FILE, PLAZA_FILE, read_plaza_listings
+from foot_traffic_rollups import load_rollups
+from footflow_core import (RESTAURANT_TYPES, plaza_report_html, plaza_search, report_index_html, slug,
+                           traffic_charts)
+
+DEFAULT_SQUARE_FOOTAGE = [500, 1000, 2500, 5000, 10000]
+
+
+# Write every report for one plaza; returns (plaza name, restaurant type, square footage, path under out_dir)
+def write_plaza_reports(out_dir, plaza_dir, plaza, rollup, match_scores, square_footages):
+    os.makedirs(os.path.join(out_dir, plaza_dir), exist_ok=True)
+
+    chart_paths = {}
+    if rollup is not None:
+        for name, png in traffic_charts(get_chart_cache(), rollup, plaza['Location Name']).items():
+            write_atomic(os.path.join(out_dir, plaza_dir, f"{name}.png"), png)
+            chart_paths[name] = f"{name}.png"
+
+    written = []
+    for restaurant_type, match_score in match_scores.items():
+        for square_footage in square_footages:
+            name = f"{slug(restaurant_type)}-{square_footage}sqft.html"
+            report = plaza_report_html(plaza, restaurant_type, square_footage, match_score, rollup, chart_paths)
+            write_atomic(os.path.join(out_dir, plaza_dir, name), report.encode("utf-8"))
+            written.append((plaza['Location Name'], restaurant_type, square_footage, f"{plaza_dir}/{name}"))
+    return written
+
+
+# Generate the whole report pack into out_dir; returns the number of reports written
+def generate_reports(out_dir, restaurant_types=RESTAURANT_TYPES, square_footages=DEFAULT_SQUARE_FOOTAGE,
+                     listings_file=PLAZA_FILE, traffic_file=FOOT_TRAFFIC_FILE, workers=None):
+    listings, plaza_index = plaza_search(read_plaza_listings(listings_file))
+    rollups = load_rollups(traffic_file)
+
+    # Match score of every plaza for every restaurant type, 0 when its tags don't list the type
+    scores = {}
+    for restaurant_type in restaurant_types:
+        positions, match_scores = plaza_index.search([restaurant_type])
+        row_scores = np.zeros(plaza_index.size)
+        row_scores[positions] = match_scores
+        scores[restaurant_type] = row_scores
+
+    os.makedirs(out_dir, exist_ok=True)
+    # One report set per plaza, even if it is listed more than once
+    plazas = listings.drop_duplicates(subset=['Location Name'])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i, (row, plaza) in enumerate(zip(plazas.index, plazas.to_dict('records'))):
+            name = plaza['Location Name']
+            match_scores = {restaurant_type: float(row_scores[row]) for restaurant_type, row_scores in scores.items()}
+            futures.append(pool.submit(write_plaza_reports, out_dir, f"{i:03d}-{slug(name)}", plaza,
+                                       rollups.get(name), match_scores, list(square_footages)))
+        reports = [report for future in futures for report in future.result()]
+
+    write_atomic(os.path.join(out_dir, "index.html"), report_index_html(reports).encode("utf-8"))
+    return len(reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write Foot Flow HTML reports for every plaza, restaurant type "
+                                                 "and square footage.")
+    parser.add_argument("--out", default="reports", help="Output directory")
+    parser.add_argument("--restaurant-types", nargs="+", default=RESTAURANT_TYPES)
+    parser.add_argument("--square-footage", type=int, nargs="+", default=DEFAULT_SQUARE_FOOTAGE)
+    parser.add_argument("--listings", default=PLAZA_FILE, help="Plaza listings CSV")
+    parser.add_argument("--traffic", default=FOOT_TRAFFIC_FILE, help="Daily corridor foot traffic CSV")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = generate_reports(args.out, args.restaurant_types, args.square_footage, args.listings, args.traffic,
+                             args.workers)
+    print(f"Wrote {count} reports to {args.out} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
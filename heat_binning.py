@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# Zoom levels a heat map pyramid is built for (Leaflet zoom: 0 = whole world, 18 = street level)
+MIN_ZOOM = 8
+MAX_ZOOM = 18
+
+# About how many screen pixels one cell covers; smaller means finer detail and more cells
+CELL_PIXELS = 8
+
+# Upper bound on the cells shipped to the browser for one view
+MAX_CELLS = 4000
+
+
+# Cell size in degrees at a zoom level; it halves with every zoom step so cells nest across levels
+def cell_size(zoom):
+    return 360.0 / (256 * 2 ** zoom) * CELL_PIXELS
+
+
+# Aggregate points into weighted grid cells for every zoom level in one vectorized pass per level.
+# Each level is a frame of cell centroid (lat, lon), summed weight and point count.
+def build_pyramid(lat, lon, weight, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    weight = np.nan_to_num(np.asarray(weight, dtype=np.float64))
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+
+    size = cell_size(max_zoom)
+    cells = pd.DataFrame({
+        'ix': np.floor((lon[valid] + 180.0) / size).astype(np.int64),
+        'iy': np.floor((lat[valid] + 90.0) / size).astype(np.int64),
+        'lat_sum': lat[valid],
+        'lon_sum': lon[valid],
+        'weight': weight[valid],
+        'count': np.ones(valid.sum(), dtype=np.int64),
+    })
+
+    pyramid = {}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        # Raw points only feed the finest level; every coarser level merges 2x2 cells of the one below
+        cells = cells.groupby(['ix', 'iy'], sort=False, as_index=False).sum()
+        pyramid[zoom] = pd.DataFrame({
+            'lat': cells['lat_sum'] / cells['count'],
+            'lon': cells['lon_sum'] / cells['count'],
+            'weight': cells['weight'],
+            'count': cells['count'],
+        })
+        cells = cells.assign(ix=cells['ix'] // 2, iy=cells['iy'] // 2)
+
+    return pyramid
+
+
+# Same as build_pyramid for a DataFrame with latitude, longitude and weight columns
+def build_pyramid_from_frame(data, lat_column='Latitude', lon_column='Longitude', weight_column='Foot Traffic Volume',
+                             **kwargs):
+    return build_pyramid(data[lat_column].to_numpy(), data[lon_column].to_numpy(), data[weight_column].to_numpy(),
+                         **kwargs)
+
+
+# Cells to draw for a view: the level matching the zoom, clipped to the (padded) bounds,
+# falling back to coarser levels until no more than max_cells remain
+def cells_for_view(pyramid, zoom, bounds=None, max_cells=MAX_CELLS, padding=0.25):
+    zooms = sorted(pyramid)
+    zoom = min(max(int(zoom), zooms[0]), zooms[-1])
+
+    for level in range(zoom, zooms[0] - 1, -1):
+        cells = pyramid[level]
+        if bounds is not None:
+            south, west, north, east = bounds
+            pad_lat = (north - south) * padding
+            pad_lon = (east - west) * padding
+            inside = (cells['lat'].between(south - pad_lat, north + pad_lat)
+                      & cells['lon'].between(west - pad_lon, east + pad_lon))
+            cells = cells[inside]
+        if len(cells) <= max_cells:
+            return cells
+
+    # Even the coarsest level is too dense for this view: keep the heaviest cells
+    return cells.nlargest(max_cells, 'weight')
+
+
+# [[lat, lon, weight], ...] list for folium.plugins.HeatMap
+def heat_data(cells):
+    return cells[['lat', 'lon', 'weight']].to_numpy().tolist()
+
+
+# (south, west, north, east) from the bounds st_folium returns, or None before the first interaction
+def view_bounds(map_state):
+    bounds = (map_state or {}).get('bounds') or {}
+    south_west = bounds.get('_southWest') or {}
+    north_east = bounds.get('_northEast') or {}
+    if south_west.get('lat') is None or north_east.get('lat') is None:
+        return None
+    return south_west['lat'], south_west['lng'], north_east['lat'], north_east['lng']
+
+
+# Center, zoom and bounds to draw next, following the user's last pan/zoom when there is one
+def view_from_state(map_state, default_center, default_zoom):
+    zoom = (map_state or {}).get('zoom') or default_zoom
+    bounds = view_bounds(map_state)
+    if bounds is None:
+        return default_center, zoom, None
+    south, west, north, east = bounds
+    return [(south + north) / 2, (west + east) / 2], zoom, bounds
@@ -1,53 +1,32 @@
 import streamlit as st
-import openai
-import pandas as pd
-import numpy as np
-import seaborn as sns
+import app_data
+import llm_gateway
+import perf_metrics
+from chart_cache import get_chart_cache
+from llm_prompts import foot_traffic_insight_messages
+from traffic_forecast import forecast
 
-# Set up OpenAI API key
-openai.api_key = "api-key"
+perf_metrics.start_run("inventory_guide_2")
 
 # OpenAI function to generate initial insights with GPT-3.5-turbo
 def generate_foot_traffic_insight(month, location="San Jose"):
-    messages = [
-        {
-            "role": "system",
-            "content": "You are a helpful assistant knowledgeable in restaurant data and foot traffic patterns."
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Provide estimated daily foot traffic patterns for a new restaurant in {location} "
-                f"for the month of {month}. Include factors like weekends, weekday differences, "
-                f"and suggest average traffic numbers."
-            )
-        }
-    ]
-    
-    response = openai.ChatCompletion.create(
+    messages = foot_traffic_insight_messages(month, location)
+    return llm_gateway.chat_completion(
+        messages,
         model="gpt-3.5-turbo",
-        messages=messages,
         max_tokens=150
     )
-    return response['choices'][0]['message']['content']
 
-# Generate simulated data based on OpenAI's suggestion
-def generate_foot_traffic_data(suggestion, month):
-    # Parse the suggestion to get an estimated traffic range
-    avg_traffic_weekday = 200  # Assume an average (adjustable)
-    avg_traffic_weekend = 300  # Assume a higher average for weekends
+# Forecast daily foot traffic and inventory for a corridor over the selected month from the fitted model
+def generate_foot_traffic_data(corridor, month):
+    data = forecast(app_data.forecast_model(), start=f"2024-{month}-01", periods=30, corridors=[corridor])
+    return data.drop(columns=['Business Corridor'])
 
-    # Create date range for the selected month
-    dates = pd.date_range(start=f"2024-{month}-01", periods=30, freq='D')
-    foot_traffic_data = []
+# Day x date heatmap of one forecast column, drawn for the rendered-chart cache
+def plot_heatmap(ax, pivot, cmap, label):
+    import seaborn as sns
 
-    for date in dates:
-        day = date.strftime("%A")
-        traffic = np.random.normal(avg_traffic_weekday if day in ["Monday", "Tuesday", "Wednesday", "Thursday"] else avg_traffic_weekend, 50)
-        inventory_needed = traffic * np.random.uniform(0.4, 0.6)
-        foot_traffic_data.append([date, day, max(50, int(traffic)), int(inventory_needed)])
-
-    return pd.DataFrame(foot_traffic_data, columns=["Date", "Day", "Foot Traffic Volume", "Inventory Needed"])
+    sns.heatmap(pivot, cmap=cmap, annot=True, fmt="d", cbar_kws={'label': label}, ax=ax)
 
 # Streamlit app
 st.title("San Jose Restaurant Foot Traffic and Inventory Estimation")
@@ -55,25 +34,32 @@ st.title("San Jose Restaurant Foot Traffic and Inventory Estimation")
 # User input for month selection
 month = st.selectbox("Select month for analysis:", ["10", "11", "12"])  # Use October, November, December as options
 
-# Generate insights and data
+# User input for the business corridor the forecast is for
+corridor = st.selectbox("Select business corridor:", app_data.forecast_model()['corridors'])
+
+# Generate insights
 if st.button("Generate Foot Traffic Insights"):
-    suggestion = generate_foot_traffic_insight(month)
+    with perf_metrics.stage("insights"):
+        suggestion = generate_foot_traffic_insight(month)
     st.write("OpenAI's Estimated Foot Traffic Insights:")
     st.write(suggestion)
 
-    # Generate simulated data
-    data = generate_foot_traffic_data(suggestion, month)
-    st.write("Generated Foot Traffic Data:")
-    st.dataframe(data)
+# Forecast data (no LLM round-trip needed)
+data = generate_foot_traffic_data(corridor, month)
+perf_metrics.checkpoint("forecast")
+st.write("Forecast Foot Traffic Data:")
+st.dataframe(data)
 
-    # Plot heatmap of foot traffic
-    st.subheader("Heatmap of Foot Traffic Volume")
-    traffic_pivot = data.pivot(index="Day", columns="Date", values="Foot Traffic Volume").fillna(0).astype(int)
-    sns.heatmap(traffic_pivot, cmap="YlGnBu", annot=True, fmt="d", cbar_kws={'label': 'Foot Traffic Volume'})
-    st.pyplot()
+# Plot heatmap of foot traffic
+st.subheader("Heatmap of Foot Traffic Volume")
+traffic_pivot = data.pivot(index="Day", columns="Date", values="Foot Traffic Volume").fillna(0).astype(int)
+st.image(get_chart_cache().render(plot_heatmap, traffic_pivot, "YlGnBu", 'Foot Traffic Volume', figsize=(16, 4)),
+         width="stretch")
 
-    # Plot heatmap of inventory needed
-    st.subheader("Heatmap of Inventory Needed")
-    inventory_pivot = data.pivot(index="Day", columns="Date", values="Inventory Needed").fillna(0).astype(int)
-    sns.heatmap(inventory_pivot, cmap="OrRd", annot=True, fmt="d", cbar_kws={'label': 'Inventory Needed'})
-    st.pyplot()
\ No newline at end of file
+# Plot heatmap of inventory needed
+st.subheader("Heatmap of Inventory Needed")
+inventory_pivot = data.pivot(index="Day", columns="Date", values="Inventory Needed").fillna(0).astype(int)
+st.image(get_chart_cache().render(plot_heatmap, inventory_pivot, "OrRd", 'Inventory Needed', figsize=(16, 4)),
+         width="stretch")
+perf_metrics.checkpoint("heatmaps")
+perf_metrics.finish_run()
@@ -0,0 +1,141 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Location and limits of the shared on-disk response cache
+CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(".cache", "llm_cache.sqlite3"))
+MAX_BYTES = 64 * 1024 * 1024  # Evict least recently used entries beyond 64 MB
+DEFAULT_TTL = 7 * 24 * 60 * 60  # Keep answers for a week unless told otherwise
+
+
+# Collapse whitespace so reformatted prompts (indentation, trailing spaces) share one entry
+def normalize_prompt(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# On-disk LLM response cache with size-bounded LRU eviction and per-entry TTL
+class LLMCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    # One short-lived connection per operation keeps the cache safe across Streamlit threads and processes
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Key by model + normalized prompt/messages + the remaining request parameters
+    @staticmethod
+    def make_key(model, prompt, params=None):
+        if isinstance(prompt, str):
+            prompt = normalize_prompt(prompt)
+        else:
+            prompt = [{**message, 'content': normalize_prompt(message['content'])} for message in prompt]
+        payload = json.dumps({'model': model, 'prompt': prompt, 'params': params or {}}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # Return the cached value for a key, or None when it is missing or expired
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    # Store a value, then evict expired and least recently used entries until the cache fits max_bytes
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        size = len(value.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl, now),
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM responses WHERE key != ? ORDER BY last_access LIMIT 64", (key,)
+                ).fetchall()
+                if not oldest:
+                    break
+                for old_key, old_size in oldest:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+                    if total <= self.max_bytes:
+                        break
+
+    # Return the cached value or compute it with call() and store it (errors are never cached)
+    def get_or_call(self, model, prompt, params, call, ttl=None):
+        key = self.make_key(model, prompt, params)
+        value = self.get(key)
+        if value is None:
+            value = call()
+            self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    # Hit/miss counters for this process plus the current size of the shared cache
+    def stats(self):
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+# Process-wide cache shared by every page
+def get_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
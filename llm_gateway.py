@@ -0,0 +1,343 @@
+import asyncio
+import base64
+import os
+import queue
+import random
+import threading
+import time
+
+import llm_cache
+import perf_metrics
+
+# Every OpenAI request of the pages goes through this gateway, and every answer is kept in the on-disk llm_cache
+# shared by all sessions and processes, so a prompt already answered is served again without a request.
+
+# Gateway limits, overridable per deployment
+MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 8))  # Requests in flight at once
+RATE_PER_SECOND = float(os.getenv('LLM_RATE_PER_SECOND', 3))  # Sustained request rate
+BURST = int(os.getenv('LLM_BURST', 6))  # Requests allowed back to back before the rate applies
+MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 5))
+
+# Request kind reported to perf_metrics for each openai resource
+REQUEST_KINDS = {
+    'ChatCompletion': 'chat',
+    'Completion': 'completion',
+    'Image': 'image',
+}
+
+# Errors worth retrying (names in openai.error): rate limits, overloaded or flaky servers and dropped connections
+RETRYABLE_ERRORS = (
+    'RateLimitError',
+    'ServiceUnavailableError',
+    'APIError',
+    'Timeout',
+    'TryAgain',
+    'APIConnectionError',
+)
+
+
+# openai is imported on the first request, so pages that never call the API don't pay for importing it.
+# The API key comes from the OPENAI_API_KEY environment variable, which the openai package reads itself.
+def _openai():
+    import openai
+    return openai
+
+
+def retryable_errors():
+    error = _openai().error
+    return tuple(getattr(error, name) for name in RETRYABLE_ERRORS)
+
+
+# Token bucket limiting how fast requests leave the process
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Shared asyncio gateway in front of OpenAI: cache, single-flight, rate limit, bounded concurrency and retries
+class LLMGateway:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, rate_per_second=RATE_PER_SECOND, burst=BURST,
+                 max_retries=MAX_RETRIES, backoff_base=1.0, backoff_cap=30.0, cache=None,
+                 api_base=None, api_key=None):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.cache = cache
+        # Optional endpoint override, e.g. a local fake OpenAI server
+        self.api_base = api_base
+        self.api_key = api_key
+
+        self.requests_sent = 0
+        self.retries = 0
+        self.coalesced = 0
+        self._semaphore = None
+        self._bucket = None
+        self._inflight = {}
+
+    # asyncio primitives are created lazily on the loop that first uses the gateway
+    def _limits(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = TokenBucket(self.rate_per_second, self.burst)
+        return self._semaphore, self._bucket
+
+    def _cache(self):
+        return self.cache if self.cache is not None else llm_cache.get_cache()
+
+    # Cached chat completion returning the stripped reply text
+    async def chat(self, messages, model="gpt-3.5-turbo", ttl=None, **params):
+        async def call():
+            response = await self._send('ChatCompletion', model=model, messages=messages, **params)
+            return response['choices'][0]['message']['content'].strip()
+
+        return await self._cached(model, messages, params, ttl, call)
+
+    # Cached text completion returning the stripped completion text
+    async def complete(self, prompt, model="gpt-3.5-turbo-instruct", ttl=None, **params):
+        async def call():
+            response = await self._send('Completion', model=model, prompt=prompt, **params)
+            return response['choices'][0]['text'].strip()
+
+        return await self._cached(model, prompt, params, ttl, call)
+
+    # Stream a chat reply piece by piece; cached replies come back as a single piece.
+    # Streams are not coalesced, but the full reply is cached once the stream completes.
+    async def chat_stream(self, messages, model="gpt-3.5-turbo", ttl=None, **params):
+        start = time.perf_counter()
+        cache = self._cache()
+        key = cache.make_key(model, messages, params)
+        value = await asyncio.to_thread(cache.get, key)
+        if value is not None:
+            perf_metrics.record_llm('stream', model, time.perf_counter() - start, cached=True)
+            yield value
+            return
+
+        response = await self._send('ChatCompletion', model=model, messages=messages, stream=True, **params)
+        pieces = []
+        async for chunk in response:
+            piece = chunk['choices'][0]['delta'].get('content')
+            if piece:
+                pieces.append(piece)
+                yield piece
+        perf_metrics.record_llm('stream', model, time.perf_counter() - start, cached=False)
+        await asyncio.to_thread(cache.set, key, "".join(pieces).strip(), ttl)
+
+    # Generate an image and return its PNG bytes (callers are expected to persist them, see asset_store.py)
+    async def generate_image(self, prompt, size="1024x1024"):
+        response = await self._send('Image', prompt=prompt, n=1, size=size, response_format="b64_json")
+        return base64.b64decode(response['data'][0]['b64_json'])
+
+    # Run many completions concurrently; results keep the order of prompts.
+    # With return_exceptions=True a failed prompt yields its exception instead of failing the batch.
+    async def complete_many(self, prompts, model="gpt-3.5-turbo-instruct", return_exceptions=False, **params):
+        return await asyncio.gather(*(self.complete(prompt, model=model, **params) for prompt in prompts),
+                                    return_exceptions=return_exceptions)
+
+    async def chat_many(self, messages_list, model="gpt-3.5-turbo", return_exceptions=False, **params):
+        return await asyncio.gather(*(self.chat(messages, model=model, **params) for messages in messages_list),
+                                    return_exceptions=return_exceptions)
+
+    # Serve from the cache, otherwise make sure only one identical request is in flight at a time
+    async def _cached(self, model, prompt, params, ttl, call):
+        start = time.perf_counter()
+        cache = self._cache()
+        key = cache.make_key(model, prompt, params)
+        value = await asyncio.to_thread(cache.get, key)
+        if value is not None:
+            kind = 'chat' if isinstance(prompt, list) else 'completion'
+            perf_metrics.record_llm(kind, model, time.perf_counter() - start, cached=True)
+            return value
+
+        entry = self._inflight.get(key)
+        if entry is not None:
+            self.coalesced += 1
+        else:
+            entry = {'waiters': 0}
+
+            async def fetch():
+                try:
+                    result = await call()
+                    await asyncio.to_thread(cache.set, key, result, ttl)
+                    return result
+                finally:
+                    self._forget(key, entry)
+
+            entry['task'] = asyncio.ensure_future(fetch())
+            self._inflight[key] = entry
+
+        # Shield so one cancelled caller doesn't cancel the request for everyone else waiting on it;
+        # the request itself is only cancelled once its last waiter has gone away. It stops being shared at that
+        # moment, so a caller arriving before the cancellation has run starts a new request instead of joining it.
+        task = entry['task']
+        entry['waiters'] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry['waiters'] -= 1
+            if entry['waiters'] == 0 and not task.done():
+                self._forget(key, entry)
+                task.cancel()
+
+    # Stop sharing an in-flight request, unless a newer request for the same key has taken its place
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    # Send one request to an openai resource (by name) under the concurrency cap and rate limit,
+    # retrying transient errors with backoff
+    async def _send(self, resource, **kwargs):
+        if self.api_base is not None:
+            kwargs['api_base'] = self.api_base
+        if self.api_key is not None:
+            kwargs['api_key'] = self.api_key
+
+        api = getattr(_openai(), resource)
+        retryable = retryable_errors()
+        semaphore, bucket = self._limits()
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            async with semaphore:
+                await bucket.acquire()
+                self.requests_sent += 1
+                try:
+                    response = await api.acreate(**kwargs)
+                    # Streams are recorded by chat_stream once the last piece has arrived
+                    if not kwargs.get('stream'):
+                        usage = response.get('usage') or {}
+                        perf_metrics.record_llm(REQUEST_KINDS.get(resource, 'other'), kwargs.get('model', 'dall-e'),
+                                                time.perf_counter() - start, cached=False,
+                                                prompt_tokens=usage.get('prompt_tokens', 0),
+                                                completion_tokens=usage.get('completion_tokens', 0))
+                    return response
+                except retryable as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    # Honour Retry-After when the server sends it, otherwise exponential backoff with full jitter
+    def _retry_delay(self, error, attempt):
+        headers = getattr(error, 'headers', None) or {}
+        retry_after = headers.get('retry-after') or headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        return {
+            'requests_sent': self.requests_sent,
+            'retries': self.retries,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._inflight),
+        }
+
+
+_loop = None
+_gateway = None
+_lock = threading.Lock()
+
+
+# One background event loop per process, so every Streamlit session shares the same limits and in-flight requests
+def get_loop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-gateway", daemon=True).start()
+        return _loop
+
+
+def get_gateway():
+    global _gateway
+    with _lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+# Schedule a coroutine on the gateway loop and return its concurrent.futures.Future
+# (bound to the caller's perf_metrics rerun, so LLM metrics recorded on the loop count towards that page)
+def submit(coro):
+    return asyncio.run_coroutine_threadsafe(perf_metrics.bind(coro), get_loop())
+
+
+# Run a coroutine on the gateway loop and block until it finishes (for synchronous page code)
+def run(coro):
+    return submit(coro).result()
+
+
+# Synchronous entry points used by the pages
+def chat_completion(messages, model="gpt-3.5-turbo", ttl=None, **params):
+    return run(get_gateway().chat(messages, model=model, ttl=ttl, **params))
+
+
+def completion(prompt, model="gpt-3.5-turbo-instruct", ttl=None, **params):
+    return run(get_gateway().complete(prompt, model=model, ttl=ttl, **params))
+
+
+def completion_batch(prompts, model="gpt-3.5-turbo-instruct", return_exceptions=False, **params):
+    return run(get_gateway().complete_many(prompts, model=model, return_exceptions=return_exceptions, **params))
+
+
+def chat_completion_batch(messages_list, model="gpt-3.5-turbo", return_exceptions=False, **params):
+    return run(get_gateway().chat_many(messages_list, model=model, return_exceptions=return_exceptions, **params))
+
+
+def generate_image(prompt, size="1024x1024"):
+    return run(get_gateway().generate_image(prompt, size=size))
+
+
+# Iterate over a streamed chat reply from synchronous code (e.g. st.write_stream)
+def chat_completion_stream(messages, model="gpt-3.5-turbo", ttl=None, **params):
+    pieces = queue.Queue()
+    done = object()
+
+    async def pump():
+        end = done
+        try:
+            async for piece in get_gateway().chat_stream(messages, model=model, ttl=ttl, **params):
+                pieces.put(piece)
+        except BaseException as e:
+            end = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            # Always end the stream, cancelled (not an Exception) or not, so the reader never waits forever
+            pieces.put(end)
+
+    future = submit(pump())
+    try:
+        while True:
+            piece = pieces.get()
+            if piece is done:
+                return
+            if isinstance(piece, BaseException):
+                raise piece
+            yield piece
+    finally:
+        # Stop the request if the caller stops reading early
+        future.cancel()
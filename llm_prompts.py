@@ -0,0 +1,81 @@
+# Prompt builders shared by the pages and by warm_llm_cache.py, so warmed entries match live requests exactly
+
+SYSTEM_ASSISTANT = "You are a helpful assistant."
+
+SYSTEM_RESTAURANT_ADVISOR = (
+    "You are a knowledgeable assistant for new restaurant owners in San Jose, helping them understand space "
+    "requirements, seating capacity, and equipment needs. Respond concisely with information about restaurant "
+    "capacity planning, equipment needs (such as refrigeration, ovens, seating, tables), and general tips for a "
+    "successful restaurant setup."
+)
+
+SYSTEM_FOOT_TRAFFIC = "You are a helpful assistant knowledgeable in restaurant data and foot traffic patterns."
+
+
+# footFlow.py: detailed market analysis for a plaza
+def market_details_messages(center_name):
+    prompt = f"""
+        Provide a detailed analysis of the market for the plaza called '{center_name}'.
+        Include the following information:
+        1. Pros and cons of the plaza.
+        2. Accessibility issues (e.g., parking, public transport access).
+        3. Demographics of the types of people or groups who frequent the plaza (e.g., families, young professionals, tourists).
+        4. Additional factors or details that a new restaurant owner should consider before deciding to open their business in this plaza, such as foot traffic trends, local competition, and general atmosphere.
+        """
+    return [
+        {"role": "system", "content": SYSTEM_ASSISTANT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+# areaInsights.py: insights for a zip code and business type
+def area_insights_prompt(zip_code, business_type, foot_traffic_volume):
+    return (f"Provide detailed insights for the area with zip code {zip_code}, focusing on the business type "
+            f"'{business_type}' with a foot traffic volume of {foot_traffic_volume}.")
+
+
+# inventory_guide_2.py: estimated daily foot traffic for a month
+def foot_traffic_insight_messages(month, location="San Jose"):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_FOOT_TRAFFIC
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Provide estimated daily foot traffic patterns for a new restaurant in {location} "
+                f"for the month of {month}. Include factors like weekends, weekday differences, "
+                f"and suggest average traffic numbers."
+            )
+        }
+    ]
+
+
+# chatbot.py: a restaurant setup question, after the conversation so far (see conversation_memory) and with
+# the local data rows most relevant to it (see retrieval_index)
+def chatbot_messages(user_input, history=(), context=()):
+    system = SYSTEM_RESTAURANT_ADVISOR
+    if context:
+        system += ("\n\nRelevant San Jose data (use it where it helps, and don't make up figures it doesn't give):\n"
+                   + "\n".join(f"- {row}" for row in context))
+    return [{"role": "system", "content": system}] + list(history) + [{"role": "user", "content": user_input}]
+
+
+# chatbot.py: fold older chat turns into a short running summary
+def conversation_summary_messages(summary, messages):
+    conversation = "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in messages)
+    return [
+        {"role": "system", "content": SYSTEM_ASSISTANT},
+        {"role": "user", "content": (
+            "Update the summary of a conversation between a new restaurant owner in San Jose and an advisor. "
+            "Keep the owner's plans, constraints and any figures already given, in at most three sentences.\n\n"
+            f"Current summary: {summary or '(none)'}\n\nNew messages:\n{conversation}"
+        )}
+    ]
+
+
+# foot_traffic_data.py: inventory and staffing estimate for a restaurant
+def predict_needs_prompt(restaurant, foot_traffic):
+    return (f"For a restaurant named '{restaurant}' with an expected foot traffic volume of {foot_traffic}, "
+            "estimate the necessary inventory and staffing hours required.")
@@ -1,17 +1,12 @@
 import streamlit as st
-import pandas as pd
-import folium
-from streamlit_folium import st_folium
-from folium.plugins import HeatMap
+import perf_metrics
+from upload_ingest import ingest_business_csv, top_zip_codes
+from spatial_index import SpatialIndex
+from heat_binning import build_pyramid_from_frame, cells_for_view, heat_data, view_from_state
 
 # Set page config
 st.set_page_config(page_title="Foot Traffic Heat Map", layout="wide")
-
-# Load Data
-@st.cache_data
-def load_data(file_path):
-    data = pd.read_csv(file_path)
-    return data
+perf_metrics.start_run("mainPage")
 
 # Display app title
 st.title("Foot Traffic Heat Map")
@@ -22,20 +17,32 @@ st.write("This Streamlit app visualizes foot traffic volume using a heat map. Up
 # Input for the data file (upload CSV or choose a sample file path)
 uploaded_file = st.file_uploader("Choose a CSV file with latitude, longitude, and weight columns", type="csv")
 if uploaded_file:
-    data = pd.read_csv(uploaded_file)
-
-    # Filter necessary columns
-    data = data[['Latitude', 'Longitude', 'Foot Traffic Volume', 'Zip Code', 'Business Type']]
+    # Stream the upload in chunks once per file; reruns reuse the compact result from the session
+    if st.session_state.get('ingested_file_id') != uploaded_file.file_id:
+        progress = st.progress(0.0, text="Reading upload...")
+        uploaded_file.seek(0)
+        points, totals = ingest_business_csv(uploaded_file, total_bytes=uploaded_file.size,
+                                             on_progress=lambda fraction: progress.progress(fraction, text="Reading upload..."))
+        progress.empty()
+
+        # Heat map cells for every zoom level, binned once per upload
+        pyramid = build_pyramid_from_frame(points, 'Latitude', 'Longitude', 'Foot Traffic Volume')
+
+        # Spatial index for traffic inside the current map view
+        index = SpatialIndex(points['Latitude'], points['Longitude'], points['Foot Traffic Volume'])
+        st.session_state['ingested_file_id'] = uploaded_file.file_id
+        st.session_state['ingested_upload'] = (points, totals, pyramid, index)
+    data, totals, pyramid, index = st.session_state['ingested_upload']
+    perf_metrics.checkpoint("ingest upload")
 
     # Find most and least popular zip codes for restaurants
-    restaurants = data[data['Business Type'] == 'Restaurant']
-    most_popular_restaurants = restaurants.groupby('Zip Code')['Foot Traffic Volume'].sum().nlargest(5).reset_index()
-    least_popular_restaurants = restaurants.groupby('Zip Code')['Foot Traffic Volume'].sum().nsmallest(5).reset_index()
+    most_popular_restaurants = top_zip_codes(totals, 'Restaurant', largest=True)
+    least_popular_restaurants = top_zip_codes(totals, 'Restaurant', largest=False)
 
     # Find most and least popular zip codes for stores
-    stores = data[data['Business Type'] == 'Store']
-    most_popular_stores = stores.groupby('Zip Code')['Foot Traffic Volume'].sum().nlargest(5).reset_index()
-    least_popular_stores = stores.groupby('Zip Code')['Foot Traffic Volume'].sum().nsmallest(5).reset_index()
+    most_popular_stores = top_zip_codes(totals, 'Store', largest=True)
+    least_popular_stores = top_zip_codes(totals, 'Store', largest=False)
+    perf_metrics.checkpoint("top zip codes")
 
     # Display the results
     st.write("### Top 5 Most Popular Zip Codes for Restaurants")
@@ -49,18 +56,31 @@ if uploaded_file:
 
     st.write("### Top 5 Least Popular Zip Codes for Stores")
     st.table(least_popular_stores)
+    perf_metrics.checkpoint("tables")
 
-    # Define the map centered around the average location
-    m = folium.Map(location=[data['Latitude'].mean(), data['Longitude'].mean()], zoom_start=14)
+    # Map libraries are only imported once there is an upload to draw
+    import folium
+    from folium.plugins import HeatMap
+    from streamlit_folium import st_folium
 
-    # Add HeatMap layer
-    heat_data = [[row['Latitude'], row['Longitude'], row['Foot Traffic Volume']] for index, row in data.iterrows()]
-    HeatMap(heat_data).add_to(m)
+    # Define the map centered around the average location, then follow the user's last pan/zoom
+    center, zoom, bounds = view_from_state(st.session_state.get('heat_map'),
+                                           [data['Latitude'].mean(), data['Longitude'].mean()], 14)
+    m = folium.Map(location=center, zoom_start=zoom)
+
+    # Add HeatMap layer with only the binned cells that fit the current view
+    HeatMap(heat_data(cells_for_view(pyramid, zoom, bounds))).add_to(m)
+    perf_metrics.checkpoint("heat map cells")
 
     # Display map with Streamlit and add a title
     st.write("### Foot Traffic Heat Map")
-    st_folium(m, width=900, height=600)
+    st_folium(m, width=900, height=600, key='heat_map', returned_objects=['zoom', 'bounds'])
+    if bounds is not None:
+        st.write(f"**Foot traffic in the current view:** {int(index.bbox_total(*bounds)):,} people")
+    perf_metrics.checkpoint("render map")
 else:
     st.write("Please upload a CSV file to display the heat map.")
 
+perf_metrics.finish_run()
+
 # This code is generated by ChatGBT & Microsoft CoPilot
@@ -0,0 +1,280 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Where finished reruns are exported, e.g. PERF_METRICS_FILE=.cache/perf_metrics.jsonl (off when unset): a ".prom"
+# path is rewritten with Prometheus text counters, anything else gets one JSON line appended per rerun
+METRICS_FILE = os.getenv('PERF_METRICS_FILE', '')
+# Size at which the JSON lines file is moved to "<path>.1" (replacing the previous one) and started afresh
+METRICS_FILE_MAX_BYTES = int(os.getenv('PERF_METRICS_FILE_MAX_BYTES', 10 * 1024 * 1024))
+
+# Show the sidebar panel on every page (otherwise add ?perf=1 to the page URL)
+SHOW_PANEL = os.getenv('PERF_PANEL', '') not in ('', '0')
+
+
+# Metrics of one page rerun: stage timings, cache hits/misses and LLM calls
+class Run:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self._start = self._mark = time.perf_counter()
+        self.seconds = None
+        self.stages = {}
+        self.cache = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self.llm_calls = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_cache(self, name, hit):
+        with self._lock:
+            self.cache[name]['hits' if hit else 'misses'] += 1
+
+    def add_llm(self, call):
+        with self._lock:
+            self.llm_calls.append(call)
+
+    def llm_summary(self):
+        with self._lock:
+            calls = list(self.llm_calls)
+        return {
+            'calls': len(calls),
+            'cached': sum(call['cached'] for call in calls),
+            'seconds': round(sum(call['seconds'] for call in calls), 6),
+            'prompt_tokens': sum(call['prompt_tokens'] for call in calls),
+            'completion_tokens': sum(call['completion_tokens'] for call in calls),
+        }
+
+    def to_dict(self):
+        with self._lock:
+            stages = {name: round(seconds, 6) for name, seconds in self.stages.items()}
+            cache = {name: dict(counts) for name, counts in self.cache.items()}
+            calls = list(self.llm_calls)
+        return {
+            'timestamp': self.started,
+            'page': self.page,
+            'seconds': None if self.seconds is None else round(self.seconds, 6),
+            'stages': stages,
+            'cache': cache,
+            'llm': {**self.llm_summary(), 'requests': calls},
+        }
+
+
+_current_run = contextvars.ContextVar('perf_run', default=None)
+
+# Process-wide counters for the Prometheus export, keyed by (metric, labels)
+_totals = defaultdict(float)
+_totals_lock = threading.Lock()
+_export_lock = threading.Lock()
+
+
+def current_run():
+    return _current_run.get()
+
+
+def _count(metric, value=1.0, **labels):
+    with _totals_lock:
+        _totals[(metric, tuple(sorted(labels.items())))] += value
+
+
+# Start collecting metrics for a page rerun; call at the top of the page, before other Streamlit calls
+# that may stop the script. A rerun that never reached finish_run() is exported when the next one starts.
+def start_run(page):
+    import streamlit as st
+
+    previous = st.session_state.get('_perf_run')
+    if previous is not None and previous.seconds is None:
+        _export(previous)
+    run = Run(page)
+    st.session_state['_perf_run'] = run
+    _current_run.set(run)
+    return run
+
+
+# Close the current rerun: export it and, when enabled, show it in the sidebar
+def finish_run():
+    run = current_run()
+    if run is None or run.seconds is not None:
+        return
+    run.seconds = time.perf_counter() - run._start
+    _export(run)
+    if panel_enabled():
+        render_panel(run)
+
+
+def _add_stage(run, name, seconds):
+    run.add_stage(name, seconds)
+    _count('page_stage_seconds_total', seconds, page=run.page, stage=name)
+    _count('page_stage_runs_total', page=run.page, stage=name)
+
+
+# Attribute the time since the previous checkpoint (or the start of the rerun) to a named stage,
+# so a page script can be split into stages without re-indenting it
+def checkpoint(name):
+    run = current_run()
+    if run is None:
+        return
+    now = time.perf_counter()
+    _add_stage(run, name, now - run._mark)
+    run._mark = now
+
+
+# Time a block as a named stage of the current rerun
+@contextlib.contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run = current_run()
+        if run is not None:
+            now = time.perf_counter()
+            _add_stage(run, name, now - start)
+            run._mark = now
+
+
+def record_cache(name, hit):
+    run = current_run()
+    if run is not None:
+        run.add_cache(name, hit)
+    _count('cache_hits_total' if hit else 'cache_misses_total', function=name)
+
+
+# One LLM request: kind is chat/completion/stream/image, cached when served without calling the API;
+# tokens are the usage reported by the API (streams don't report it)
+def record_llm(kind, model, seconds, cached, prompt_tokens=0, completion_tokens=0):
+    run = current_run()
+    if run is not None:
+        run.add_llm({'kind': kind, 'model': model, 'seconds': round(seconds, 6), 'cached': cached,
+                     'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens})
+    _count('llm_requests_total', kind=kind, model=model, cached=str(cached).lower())
+    _count('llm_seconds_total', seconds, kind=kind, model=model)
+    _count('llm_tokens_total', prompt_tokens, model=model, type='prompt')
+    _count('llm_tokens_total', completion_tokens, model=model, type='completion')
+
+
+# Wrap a coroutine so metrics it records on the gateway loop are attributed to the caller's rerun
+def bind(coro):
+    run = current_run()
+    if run is None:
+        return coro
+
+    async def bound():
+        _current_run.set(run)
+        return await coro
+
+    return bound()
+
+
+def _cached(decorator, func, kwargs):
+    name = func.__qualname__
+    computing = threading.local()
+
+    @functools.wraps(func)
+    def compute(*args, **inner_kwargs):
+        computing.miss = True
+        return func(*args, **inner_kwargs)
+
+    cached = decorator(compute, **kwargs)
+
+    @functools.wraps(func)
+    def call(*args, **inner_kwargs):
+        computing.miss = False
+        result = cached(*args, **inner_kwargs)
+        record_cache(name, hit=not computing.miss)
+        return result
+
+    call.clear = cached.clear
+    return call
+
+
+# Drop-in replacements for st.cache_data / st.cache_resource that count hits and misses per function
+def cache_data(func=None, **kwargs):
+    import streamlit as st
+
+    if func is None:
+        return lambda func: _cached(st.cache_data, func, kwargs)
+    return _cached(st.cache_data, func, kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    import streamlit as st
+
+    if func is None:
+        return lambda func: _cached(st.cache_resource, func, kwargs)
+    return _cached(st.cache_resource, func, kwargs)
+
+
+def panel_enabled():
+    import streamlit as st
+
+    return SHOW_PANEL or st.query_params.get('perf') not in (None, '', '0')
+
+
+# Sidebar summary of a rerun: stage timings, cache hits/misses and LLM latency/tokens
+def render_panel(run):
+    import streamlit as st
+
+    data = run.to_dict()
+    with st.sidebar.expander("Performance", expanded=True):
+        st.write(f"**Rerun:** {data['seconds']:.3f} s")
+        if data['stages']:
+            st.table({'Stage': list(data['stages']), 'Seconds': [f"{s:.3f}" for s in data['stages'].values()]})
+        if data['cache']:
+            st.table({'Cached function': list(data['cache']),
+                      'Hits': [counts['hits'] for counts in data['cache'].values()],
+                      'Misses': [counts['misses'] for counts in data['cache'].values()]})
+        llm = data['llm']
+        if llm['calls']:
+            st.write(f"**LLM:** {llm['calls']} call(s), {llm['cached']} cached, {llm['seconds']:.2f} s, "
+                     f"{llm['prompt_tokens']:,} prompt + {llm['completion_tokens']:,} completion tokens")
+
+
+def _export(run, path=None):
+    path = METRICS_FILE if path is None else path
+    if not path:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _count('page_runs_total', page=run.page)
+    if run.seconds is not None:
+        _count('page_seconds_total', run.seconds, page=run.page)
+    with _export_lock:
+        if path.endswith(".prom"):
+            write_prometheus(path)
+        else:
+            if os.path.exists(path) and os.path.getsize(path) >= METRICS_FILE_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, "a") as f:
+                f.write(json.dumps(run.to_dict()) + "\n")
+
+
+# Label value in Prometheus text format (backslash, double quote and line feed escaped)
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Rewrite the Prometheus text file with the process-wide counters
+def write_prometheus(path):
+    with _totals_lock:
+        totals = sorted(_totals.items())
+    lines = []
+    for metric in sorted({metric for (metric, _), _ in totals}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in totals:
+            if name == metric:
+                label_text = ",".join(f'{key}="{_label_value(val)}"' for key, val in labels)
+                lines.append(f"{metric}{{{label_text}}} {value:g}")
+    # Unique per process and thread, so concurrent writers never share a temporary file
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,63 @@
+import re
+import unicodedata
+
+import numpy as np
+
+
+# Lowercase, strip accents and a plural "s" so "Cafés" and "cafe" index to the same token
+def normalize_token(word):
+    word = unicodedata.normalize("NFKD", word.lower())
+    word = "".join(char for char in word if not unicodedata.combining(char))
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [normalize_token(word) for word in re.findall(r"[^\W_]+", text)]
+
+
+# Inverted index from tag tokens to listings, built once per listings file.
+# A listing's tag column is split on commas; a search term matches a listing when every token of
+# the term appears in one of its tags, and listings are ranked by how many terms they match.
+class PlazaTagIndex:
+    def __init__(self, tags, separator=","):
+        tag_rows = []
+        postings = {}
+        for row, text in enumerate(tags):
+            if not isinstance(text, str):
+                continue
+            for tag in text.split(separator):
+                tag_id = len(tag_rows)
+                tag_rows.append(row)
+                for token in set(tokenize(tag)):
+                    postings.setdefault(token, []).append(tag_id)
+
+        self.size = len(tags)
+        self.tag_rows = np.asarray(tag_rows, dtype=np.int64)
+        self.postings = {token: np.asarray(ids, dtype=np.int64) for token, ids in postings.items()}
+
+    # Rows whose tags match a single search term
+    def match(self, term):
+        tokens = set(tokenize(term))
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+
+        # Intersect the shortest posting lists first
+        lists = sorted((self.postings.get(token) for token in tokens), key=lambda ids: -1 if ids is None else len(ids))
+        if lists[0] is None:
+            return np.empty(0, dtype=np.int64)
+        tag_ids = lists[0]
+        for ids in lists[1:]:
+            tag_ids = np.intersect1d(tag_ids, ids, assume_unique=True)
+        return np.unique(self.tag_rows[tag_ids])
+
+    # Rows matching at least one term, best match first (ties keep listing order), with their scores
+    def search(self, terms, weights=None):
+        weights = weights or [1] * len(terms)
+        scores = np.zeros(self.size)
+        for term, weight in zip(terms, weights):
+            scores[self.match(term)] += weight
+        rows = np.flatnonzero(scores)
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+
+# Top-k aisles per time bucket over a (time x aisle) matrix, or a stack of them (store x time x aisle).
+# Returns (aisle indices, foot traffic) with shape (..., time, k), highest traffic first.
+def top_k_aisles(matrix, k=1):
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n_aisles = matrix.shape[-1]
+    k = min(k, n_aisles)
+
+    # Missing readings never win a placement (same as idxmax skipping NaN)
+    scores = np.where(np.isnan(matrix), -np.inf, matrix)
+
+    if k == 1:
+        # argmax keeps the first aisle on ties, matching DataFrame.idxmax
+        indices = scores.argmax(axis=-1)[..., np.newaxis]
+    else:
+        # Partition out the k best aisles in linear time, then order just those k
+        indices = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(scores, indices, axis=-1), axis=-1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=-1)
+
+    return indices, np.take_along_axis(matrix, indices, axis=-1)
+
+
+# Stack several stores' (time x aisle) frames into one (store x time x aisle) array.
+# Stores must share the same aisles and number of time buckets.
+def stack_stores(frames, aisle_columns):
+    return np.stack([frame[aisle_columns].to_numpy(dtype=np.float64) for frame in frames])
+
+
+# Long-format promotion placements (time, rank, aisle, foot traffic) for one store's heat data
+def promotion_placement(df, time_column='timestamp', aisle_columns=None, k=1):
+    if aisle_columns is None:
+        aisle_columns = df.drop(columns=[time_column]).select_dtypes('number').columns
+    aisle_columns = np.asarray(aisle_columns)
+
+    indices, values = top_k_aisles(df[aisle_columns].to_numpy(), k)
+    n_times, k = indices.shape
+
+    return pd.DataFrame({
+        time_column: np.repeat(df[time_column].to_numpy(), k),
+        'rank': np.tile(np.arange(1, k + 1), n_times),
+        'aisle': aisle_columns[indices.ravel()],
+        'foot_traffic': values.ravel(),
+    })
+
+
+# Same as promotion_placement for many stores at once; stores is a dict of store name -> heat data frame
+def promotion_placement_by_store(stores, time_column='timestamp', aisle_columns=None, k=1):
+    names = list(stores)
+    frames = [stores[name] for name in names]
+    if aisle_columns is None:
+        aisle_columns = frames[0].drop(columns=[time_column]).select_dtypes('number').columns
+    aisle_columns = np.asarray(aisle_columns)
+
+    indices, values = top_k_aisles(stack_stores(frames, aisle_columns), k)
+    n_stores, n_times, k = indices.shape
+
+    return pd.DataFrame({
+        'store': np.repeat(names, n_times * k),
+        time_column: np.concatenate([np.repeat(frame[time_column].to_numpy(), k) for frame in frames]),
+        'rank': np.tile(np.arange(1, k + 1), n_stores * n_times),
+        'aisle': aisle_columns[indices.ravel()],
+        'foot_traffic': values.ravel(),
+    })
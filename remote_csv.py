@@ -0,0 +1,143 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import requests
+
+# Where downloaded snapshots and their HTTP validators are kept
+CACHE_DIR = os.path.join(".cache", "remote")
+REQUEST_TIMEOUT = 10  # Seconds before giving up on the remote server
+REVALIDATE_AFTER = 5 * 60  # Seconds a snapshot is used before asking the server whether it changed
+FAILURE_BACKOFF = 30  # Seconds before asking again after a failed check, doubled per failure in a row
+MAX_FAILURE_BACKOFF = 30 * 60
+
+
+# Local copy of a remote CSV, revalidated in the background with ETag / If-Modified-Since
+class RemoteCSV:
+    def __init__(self, url, cache_dir=CACHE_DIR, timeout=REQUEST_TIMEOUT, revalidate_after=REVALIDATE_AFTER,
+                 failure_backoff=FAILURE_BACKOFF, read_csv_kwargs=None):
+        self.url = url
+        self.timeout = timeout
+        self.revalidate_after = revalidate_after
+        self.failure_backoff = failure_backoff
+        self.read_csv_kwargs = read_csv_kwargs or {}
+
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(cache_dir, exist_ok=True)
+        self.data_path = os.path.join(cache_dir, f"{name}.csv")
+        self.meta_path = os.path.join(cache_dir, f"{name}.json")
+
+        self.last_error = None
+        self.failures = 0  # Revalidations failed in a row
+        self.failed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._frame = None
+        self._frame_hash = None
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta):
+        tmp_path = f"{self.meta_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    # Ask the server whether the file changed; download and store it when it did.
+    # Returns True when a new snapshot was written.
+    def revalidate(self):
+        meta = self._read_meta()
+        headers = {}
+        if os.path.exists(self.data_path):
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        meta['checked_at'] = time.time()
+
+        if response.status_code == 304:
+            self._write_meta(meta)
+            return False
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Failed to load data: {response.status_code}", response=response)
+
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+        changed = content_hash != meta.get('sha256') or not os.path.exists(self.data_path)
+        if changed:
+            tmp_path = f"{self.data_path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self.data_path)
+
+        meta.update({
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': content_hash,
+        })
+        self._write_meta(meta)
+        return changed
+
+    # Revalidate on a background thread, at most one at a time; failures keep the last good snapshot
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            self._refresh_thread = threading.Thread(target=self._safe_revalidate, name="remote-csv", daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    # Network errors and failures to store the snapshot (requests' errors are OSErrors too) are kept in last_error
+    def _safe_revalidate(self):
+        try:
+            self.revalidate()
+        except OSError as e:
+            self.last_error = e
+            self.failures += 1
+            self.failed_at = time.time()
+        else:
+            self.last_error = None
+            self.failures = 0
+
+    # A snapshot older than revalidate_after is checked again, but after failed checks (e.g. offline) only once
+    # the backoff since the last one has passed, so reruns don't each wait out another timeout
+    def _revalidation_due(self, meta):
+        now = time.time()
+        if now - meta.get('checked_at', 0) <= self.revalidate_after:
+            return False
+        backoff = min(self.failure_backoff * 2 ** (self.failures - 1), MAX_FAILURE_BACKOFF) if self.failures else 0
+        return now - self.failed_at >= backoff
+
+    # Return the current snapshot as a DataFrame (shared, do not mutate), reparsing only when its content changed.
+    # Only the very first load blocks on the network; without a snapshot a failed fetch raises.
+    def load(self):
+        meta = self._read_meta()
+        if not os.path.exists(self.data_path):
+            self.revalidate()
+            meta = self._read_meta()
+        elif self._revalidation_due(meta):
+            self.refresh_in_background()
+
+        with self._lock:
+            if self._frame is None or self._frame_hash != meta.get('sha256'):
+                with open(self.data_path, "rb") as f:
+                    content = f.read()
+                self._frame = pd.read_csv(io.BytesIO(content), **self.read_csv_kwargs)
+                self._frame_hash = hashlib.sha256(content).hexdigest()
+            return self._frame
+
+    # True while serving a snapshot because the last revalidation failed (e.g. offline)
+    @property
+    def stale(self):
+        return self.last_error is not None
@@ -0,0 +1,95 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+from plaza_search import tokenize
+
+# Words that say nothing about which data row a question is about (as normalized by tokenize)
+STOP_WORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "doe", "for", "from", "how", "i", "in", "is", "it", "me", "my",
+    "of", "on", "or", "should", "that", "the", "there", "thi", "to", "wa", "what", "when", "where", "which", "who",
+    "why", "will", "with", "would", "you", "your",
+}
+
+
+# Okapi BM25 ranking over short text documents, built in memory with no external dependencies.
+# Tokens are normalized like the plaza tag index (lowercase, accents and plural "s" stripped).
+class BM25Index:
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+
+        postings = {}
+        lengths = np.zeros(len(self.documents))
+        for doc_id, text in enumerate(self.documents):
+            tokens = tokenize(text)
+            lengths[doc_id] = len(tokens)
+            for token, count in collections.Counter(tokens).items():
+                ids, counts = postings.setdefault(token, ([], []))
+                ids.append(doc_id)
+                counts.append(count)
+
+        n_documents = max(len(self.documents), 1)
+        self.postings = {}
+        for token, (ids, counts) in postings.items():
+            idf = np.log(1 + (n_documents - len(ids) + 0.5) / (len(ids) + 0.5))
+            self.postings[token] = (np.asarray(ids, dtype=np.int64), np.asarray(counts, dtype=np.float64), idf)
+
+        # Per-document length normalization of the term frequency
+        average_length = lengths.mean() if len(lengths) else 1.0
+        self.norm = k1 * (1 - b + b * lengths / max(average_length, 1.0))
+
+    # Best k documents for a free-text query, highest score first; documents sharing no token with it are left out.
+    # Returns (positions, scores).
+    def search(self, query, k=5):
+        scores = np.zeros(len(self.documents))
+        for token in set(tokenize(query)) - STOP_WORDS:
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            ids, counts, idf = posting
+            scores[ids] += idf * counts * (self.k1 + 1) / (counts + self.norm[ids])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = np.argsort(-scores[matched], kind="stable")
+        return matched[order], scores[matched[order]]
+
+    # Text of the best k documents for a query
+    def top_documents(self, query, k=5):
+        positions, _ = self.search(query, k)
+        return [self.documents[position] for position in positions]
+
+
+# One short sentence per plaza listing, corridor foot traffic rollup and (business type, zip code) total (from the
+# time index of the pairs, see time_index), phrased so that questions about a place, a cuisine or a zip code find
+# the rows that answer them
+def knowledge_documents(listings, rollups, type_zip_index):
+    documents = []
+    for plaza in listings.to_dict('records'):
+        documents.append(
+            f"{plaza['Location Name']} plaza at {plaza['Address']}. Suited to: {plaza['Cuisine Compatibility']}. "
+            f"Average store size {plaza['Average Store Size (sq ft)']:,.0f} sq ft, lease "
+            f"${plaza['Average Lease Rate ($/sq ft)']:,.2f} per sq ft per month, price range {plaza['Price Range']}, "
+            f"vacancy: {plaza['Vacancy Status']}.")
+
+    for corridor, rollup in rollups.items():
+        by_day = rollup['by_day'].set_index('Day')['Foot Traffic Volume']
+        documents.append(
+            f"Foot traffic at {corridor}: about {rollup['avg_per_day']:,} people per day, "
+            f"{rollup['avg_per_week']:,} per week and {rollup['total_per_year']:,} per year; busiest day "
+            f"{by_day.idxmax()}, quietest day {by_day.idxmin()}.")
+
+    totals = pd.DataFrame({'sum': type_zip_index.totals(), 'mean': type_zip_index.means()}).sort_index()
+    for (business_type, zip_code), row in totals.iterrows():
+        documents.append(
+            f"{business_type} businesses in San Jose zip code {zip_code}: {row['sum']:,.0f} visits in total, "
+            f"{row['mean']:,.0f} per day on average.")
+    return documents
+
+
+# BM25 index over the plaza listings, the corridor foot traffic rollups and the business traffic by type and zip code
+def build_knowledge_index(listings, rollups, type_zip_index):
+    return BM25Index(knowledge_documents(listings, rollups, type_zip_index))
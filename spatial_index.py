@@ -0,0 +1,161 @@
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_000.0
+METERS_PER_DEGREE = 111_320.0
+
+# Grid cell edge in meters; cells grow automatically when the data would need more than MAX_CELLS
+CELL_SIZE_M = 250.0
+MAX_CELLS = 4_000_000
+
+
+# Great-circle distance in meters from one point to arrays of points
+def haversine(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# Uniform grid index over latitude/longitude points for radius, bounding box and k-nearest queries.
+# Points are sorted by cell so every row of grid cells is one contiguous slice; build once per dataset.
+class SpatialIndex:
+    def __init__(self, lats, lons, weights=None, cell_size_m=CELL_SIZE_M):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        n = len(self.lats)
+
+        valid = ~(np.isnan(self.lats) | np.isnan(self.lons))
+        self.lat_min = self.lats[valid].min() if valid.any() else 0.0
+        self.lon_min = self.lons[valid].min() if valid.any() else 0.0
+        lat_max = self.lats[valid].max() if valid.any() else 0.0
+        lon_max = self.lons[valid].max() if valid.any() else 0.0
+
+        # Equirectangular projection around the data, accurate enough to pick candidate cells
+        mid_lat = np.radians((self.lat_min + lat_max) / 2)
+        self.m_per_deg_lat = METERS_PER_DEGREE
+        self.m_per_deg_lon = max(METERS_PER_DEGREE * np.cos(mid_lat), 1.0)
+
+        width_m = (lon_max - self.lon_min) * self.m_per_deg_lon
+        height_m = (lat_max - self.lat_min) * self.m_per_deg_lat
+        self.cell_size = max(cell_size_m, np.sqrt(width_m * height_m / MAX_CELLS))
+        self.n_cols = int(width_m // self.cell_size) + 1
+        self.n_rows = int(height_m // self.cell_size) + 1
+
+        cols, rows = self._cell(self.lats, self.lons)
+        cell_ids = np.where(valid, rows * self.n_cols + cols, self.n_rows * self.n_cols)
+        self.order = np.argsort(cell_ids, kind="stable")[:valid.sum()]
+
+        # cell_start[c]:cell_start[c + 1] are the positions in self.order of the points in cell c
+        counts = np.bincount(cell_ids[valid], minlength=self.n_rows * self.n_cols)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+        # Per-cell weight totals let bounding box sums skip cells that are fully inside
+        if self.weights is not None:
+            self.cell_weight = np.bincount(cell_ids[valid], weights=self.weights[valid],
+                                           minlength=self.n_rows * self.n_cols)
+        self.size = n
+
+    def _cell(self, lats, lons):
+        cols = np.floor((np.asarray(lons) - self.lon_min) * self.m_per_deg_lon / self.cell_size)
+        rows = np.floor((np.asarray(lats) - self.lat_min) * self.m_per_deg_lat / self.cell_size)
+        cols = np.clip(np.nan_to_num(cols), 0, self.n_cols - 1).astype(np.int64)
+        rows = np.clip(np.nan_to_num(rows), 0, self.n_rows - 1).astype(np.int64)
+        return cols, rows
+
+    # Point indices in the block of cells covering [south, north] x [west, east]
+    def _candidates(self, south, west, north, east):
+        col0, row0 = self._cell(south, west)
+        col1, row1 = self._cell(north, east)
+        return self._candidates_in_cells(row0, row1, col0, col1)
+
+    # Point indices in rows row0..row1 and columns col0..col1 of the grid (one slice per row)
+    def _candidates_in_cells(self, row0, row1, col0, col1):
+        slices = [self.order[self.cell_start[row * self.n_cols + col0]:self.cell_start[row * self.n_cols + col1 + 1]]
+                  for row in range(int(row0), int(row1) + 1)]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    # Indices and distances (meters, ascending) of every point within radius_m of (lat, lon)
+    def within_radius(self, lat, lon, radius_m):
+        dlat = radius_m / self.m_per_deg_lat
+        dlon = radius_m / self.m_per_deg_lon
+        candidates = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        distances = haversine(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= radius_m
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    # Indices of every point inside a latitude/longitude bounding box
+    def in_bbox(self, south, west, north, east):
+        candidates = self._candidates(south, west, north, east)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        return candidates[inside]
+
+    # Sum of weights inside a bounding box: interior cells come from the per-cell totals,
+    # only points in the border cells are checked one by one
+    def bbox_total(self, south, west, north, east):
+        if self.weights is None:
+            raise ValueError("bbox_total needs an index built with weights")
+        col0, row0 = self._cell(south, west)
+        col1, row1 = self._cell(north, east)
+        total = 0.0
+        if row1 - row0 >= 2 and col1 - col0 >= 2:
+            grid = self.cell_weight.reshape(self.n_rows, self.n_cols)
+            total += grid[row0 + 1:row1, col0 + 1:col1].sum()
+            border = [
+                self._candidates_in_cells(row0, row0, col0, col1),
+                self._candidates_in_cells(row1, row1, col0, col1),
+                self._candidates_in_cells(row0 + 1, row1 - 1, col0, col0),
+                self._candidates_in_cells(row0 + 1, row1 - 1, col1, col1),
+            ]
+            candidates = np.concatenate(border)
+        else:
+            candidates = self._candidates(south, west, north, east)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        return total + self.weights[candidates[inside]].sum()
+
+    # Indices and distances (meters, ascending) of the k points nearest to (lat, lon);
+    # the search radius doubles until the k-th neighbour is known to be inside it
+    def nearest(self, lat, lon, k=5):
+        k = min(k, len(self.order))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius = self.cell_size
+        extent = (self.n_rows + self.n_cols) * self.cell_size + haversine(
+            lat, lon, self.lat_min, self.lon_min)
+        while True:
+            indices, distances = self.within_radius(lat, lon, radius)
+            if len(indices) >= k or radius > extent:
+                return indices[:k], distances[:k]
+            radius *= 2
+
+
+# Spatial index over points kept in chunks, from one SpatialIndex per chunk: parts are (index, offset, positions)
+# with the offset of the chunk's first point in the numbering of all points and, for an index over some of the
+# chunk's points, their positions in the chunk (None when it covers all of them). Queries return positions in that
+# numbering, so a new chunk is indexed on its own and the indexes of the others are kept as they are.
+class ChunkedSpatialIndex:
+    def __init__(self, parts):
+        self.parts = parts
+
+    def _numbered(self, found):
+        indices = [offset + (part_indices if positions is None else positions[part_indices])
+                   for (_, offset, positions), (part_indices, _) in zip(self.parts, found)]
+        distances = [part_distances for _, part_distances in found]
+        if not indices:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        indices, distances = np.concatenate(indices), np.concatenate(distances)
+        order = np.argsort(distances, kind="stable")
+        return indices[order], distances[order]
+
+    # Positions and distances (meters, ascending) of every point within radius_m of (lat, lon)
+    def within_radius(self, lat, lon, radius_m):
+        return self._numbered([index.within_radius(lat, lon, radius_m) for index, _, _ in self.parts])
+
+    # Positions and distances (meters, ascending) of the k points nearest to (lat, lon)
+    def nearest(self, lat, lon, k=5):
+        indices, distances = self._numbered([index.nearest(lat, lon, k) for index, _, _ in self.parts])
+        return indices[:k], distances[:k]
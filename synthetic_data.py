@@ -0,0 +1,299 @@
+# Seeded, vectorized synthetic datasets in the schemas the pages read, for load testing without the network
+#
+#   python synthetic_data.py business --businesses 5000 --zip-codes 1000 --days 1095 --shards 64 --out data/
+#   python synthetic_data.py corridor --corridors 2000 --days 1095 --out data/
+#   python synthetic_data.py restaurant --restaurants 1000 --days 365 --out data/
+#   python synthetic_data.py aisle --stores 500 --aisles 11 --days 90 --out data/
+#
+# Every entity (business, corridor, restaurant, retail store) gets a fixed level, location and profile derived from the
+# seed alone; daily rows apply weekday and yearly seasonality plus noise on top. Shards split the entities,
+# and shard i draws its noise from (seed, i), so the same seed and shard count always give the same files.
+import argparse
+import concurrent.futures
+import os
+
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+BUSINESS_TYPES = np.array(["Restaurant", "Store"])
+PEAK_TIMES = np.array(["Morning", "Afternoon", "Evening"])
+
+# Real San Jose zip codes come first; larger requests continue with other California codes
+SAN_JOSE_ZIP_CODES = [95110, 95111, 95112, 95113, 95116, 95117, 95118, 95119, 95120, 95121, 95122, 95123,
+                      95124, 95125, 95126, 95127, 95128, 95129, 95130, 95131, 95132, 95133, 95134, 95135,
+                      95136, 95138, 95139, 95148]
+SAN_JOSE_CENTER = (37.3382, -121.8863)
+
+NAME_PREFIXES = ["Taste", "Deli", "Urban", "Golden", "Corner", "Fresh", "Happy", "Silver", "Sunny", "Royal",
+                 "Little", "Green", "Blue", "Garden", "Harbor", "Maple"]
+NAME_SUFFIXES = ["Corner", "Delight", "Bistro", "Market", "Grill", "Kitchen", "Cafe", "Shop", "House", "Spot",
+                 "Palace", "Station", "Central", "World", "Haven", "Town"]
+STORE_KINDS = ["Market", "Mart", "Goods", "Grocery", "Outlet", "Supply"]
+CORRIDOR_KINDS = ["Plaza", "Shopping Center", "Village Square", "Mall", "Market Center", "Row"]
+STREET_KINDS = ["Ave", "Rd", "Blvd", "St", "Expy", "Way"]
+
+# Relative traffic by weekday (Monday first) and amplitude of the yearly cycle, peaking in late December
+WEEKDAY_PROFILE = np.array([0.90, 0.92, 0.95, 1.00, 1.12, 1.20, 1.05])
+SEASONAL_AMPLITUDE = 0.15
+# Relative in-store traffic per hour of the day: closed overnight, lunch and after-work peaks
+HOURLY_PROFILE = np.array([0.02, 0.01, 0.01, 0.01, 0.01, 0.02, 0.05, 0.15, 0.35, 0.55, 0.70, 0.85,
+                           1.00, 0.90, 0.70, 0.65, 0.75, 0.95, 1.00, 0.80, 0.55, 0.35, 0.15, 0.05])
+
+SHARD_ROWS = 2_000_000  # Target rows per shard when the shard count isn't given
+
+
+def _names(n, words_a, words_b):
+    i = np.arange(n)
+    a = np.asarray(words_a)[i % len(words_a)]
+    b = np.asarray(words_b)[(i // len(words_a)) % len(words_b)]
+    names = np.char.add(np.char.add(a, " "), b)
+    # Once every pair is used, later entities get a branch number
+    branch = i // (len(words_a) * len(words_b))
+    return np.where(branch > 0, np.char.add(np.char.add(names, " #"), (branch + 1).astype(str)), names)
+
+
+def _zip_codes(n):
+    extra = np.setdiff1d(np.arange(90001, 100000), SAN_JOSE_ZIP_CODES)
+    if n > len(SAN_JOSE_ZIP_CODES) + len(extra):
+        raise ValueError(f"At most {len(SAN_JOSE_ZIP_CODES) + len(extra)} zip codes are available")
+    return np.concatenate([SAN_JOSE_ZIP_CODES, extra[:max(n - len(SAN_JOSE_ZIP_CODES), 0)]])
+
+
+def _daily_factor(dates, rng, n_entities, noise):
+    dates = pd.DatetimeIndex(dates)
+    season = 1 + SEASONAL_AMPLITUDE * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 355) / 365.25)
+    factor = WEEKDAY_PROFILE[dates.dayofweek.to_numpy()] * season
+    return factor[np.newaxis, :] * rng.lognormal(0, noise, size=(n_entities, len(dates)))
+
+
+# Fixed attributes of every business: name, type, zip code, location, traffic level and peak time
+def business_entities(n_businesses, n_zip_codes=len(SAN_JOSE_ZIP_CODES), seed=0):
+    rng = np.random.default_rng([seed, 0])
+    zip_codes = _zip_codes(n_zip_codes)
+    # Zip centroids spread around San Jose, businesses scattered around their zip's centroid
+    zip_lat = SAN_JOSE_CENTER[0] + rng.normal(0, 0.05 + 0.002 * np.sqrt(n_zip_codes), n_zip_codes)
+    zip_lon = SAN_JOSE_CENTER[1] + rng.normal(0, 0.05 + 0.002 * np.sqrt(n_zip_codes), n_zip_codes)
+    zip_idx = rng.integers(0, n_zip_codes, n_businesses)
+    return pd.DataFrame({
+        'Business Name': _names(n_businesses, NAME_PREFIXES, NAME_SUFFIXES),
+        'Business Type': BUSINESS_TYPES[rng.integers(0, len(BUSINESS_TYPES), n_businesses)],
+        'Zip Code': zip_codes[zip_idx],
+        'Latitude': (zip_lat[zip_idx] + rng.normal(0, 0.01, n_businesses)).round(6),
+        'Longitude': (zip_lon[zip_idx] + rng.normal(0, 0.01, n_businesses)).round(6),
+        'level': rng.uniform(120, 380, n_businesses),
+        'peak': rng.integers(0, len(PEAK_TIMES), n_businesses),
+    })
+
+
+# Rows in the schema of full_year_business_data.csv: one per business per day, ordered by date
+def generate_business_data(n_businesses=1000, n_zip_codes=len(SAN_JOSE_ZIP_CODES), start="2024-01-01", days=366,
+                           seed=0, entities=None, shard=0):
+    entities = business_entities(n_businesses, n_zip_codes, seed) if entities is None else entities
+    rng = np.random.default_rng([seed, 1, shard])
+    dates = pd.date_range(start=start, periods=days, freq='D')
+    n = len(entities)
+
+    volume = np.clip(np.rint(entities['level'].to_numpy()[:, np.newaxis] * _daily_factor(dates, rng, n, 0.2)),
+                     50, 500).astype(np.int64)
+    # Date-major order like the real file; entity attributes are repeated by index, strings formatted once
+    date_idx = np.repeat(np.arange(days), n)
+    entity_idx = np.tile(np.arange(n), days)
+    minutes = np.clip(np.rint(rng.gamma(1.5, 25, n * days)), 1, 179).astype(np.int64)
+    durations = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(180)])
+    peak = np.where(rng.random(n * days) < 0.8, entities['peak'].to_numpy()[entity_idx],
+                    rng.integers(0, len(PEAK_TIMES), n * days))
+
+    return pd.DataFrame({
+        'Date': dates.strftime("%Y-%m-%d").to_numpy()[date_idx],
+        'Business Name': entities['Business Name'].to_numpy()[entity_idx],
+        'Business Type': entities['Business Type'].to_numpy()[entity_idx],
+        'Zip Code': entities['Zip Code'].to_numpy()[entity_idx],
+        'Latitude': entities['Latitude'].to_numpy()[entity_idx],
+        'Longitude': entities['Longitude'].to_numpy()[entity_idx],
+        'Foot Traffic Volume': volume.T.ravel(),
+        'Duration of Stay': durations[minutes],
+        'Peak Foot Traffic Time': PEAK_TIMES[peak],
+        'Traffic Trend (Week)': rng.uniform(-10, 10, n * days).round(2),
+        'Traffic Trend (Month)': rng.uniform(-20, 20, n * days).round(2),
+    })
+
+
+# Fixed attributes of every corridor: name, address and traffic level
+def corridor_entities(n_corridors, seed=0):
+    rng = np.random.default_rng([seed, 0])
+    names = _names(n_corridors, NAME_PREFIXES, CORRIDOR_KINDS)
+    streets = _names(n_corridors, NAME_PREFIXES[::-1], STREET_KINDS)
+    numbers = rng.integers(100, 6000, n_corridors).astype(str)
+    zip_codes = np.asarray(SAN_JOSE_ZIP_CODES)[rng.integers(0, len(SAN_JOSE_ZIP_CODES), n_corridors)].astype(str)
+    addresses = np.char.add(np.char.add(np.char.add(np.char.add(numbers, " "), streets), ", San Jose, CA "), zip_codes)
+    return pd.DataFrame({
+        'Business Corridor': names,
+        'Address': addresses,
+        'level': rng.uniform(1500, 4000, n_corridors),
+    })
+
+
+# Rows in the schema of sanjosefoottrafficvolume.csv: one per corridor per day, grouped by corridor
+def generate_corridor_traffic(n_corridors=33, start="2023-01-01", days=365, seed=0, entities=None, shard=0):
+    entities = corridor_entities(n_corridors, seed) if entities is None else entities
+    rng = np.random.default_rng([seed, 2, shard])
+    dates = pd.date_range(start=start, periods=days, freq='D')
+    n = len(entities)
+
+    volume = np.clip(np.rint(entities['level'].to_numpy()[:, np.newaxis] * _daily_factor(dates, rng, n, 0.25)),
+                     500, 4999).astype(np.int64)
+    entity_idx = np.repeat(np.arange(n), days)
+    date_idx = np.tile(np.arange(days), n)
+    date_text = (dates.month.astype(str) + "/" + dates.day.astype(str) + "/" + dates.year.astype(str)).to_numpy()
+
+    return pd.DataFrame({
+        'Business Corridor': entities['Business Corridor'].to_numpy()[entity_idx],
+        'Address': entities['Address'].to_numpy()[entity_idx],
+        'Day': DAY_NAMES[dates.dayofweek.to_numpy()][date_idx],
+        'Date': date_text[date_idx],
+        'Foot Traffic Volume': volume.ravel(),
+    })
+
+
+# Fixed attributes of every restaurant: name, zip code and traffic level
+def restaurant_entities(n_restaurants, n_zip_codes=len(SAN_JOSE_ZIP_CODES), seed=0):
+    rng = np.random.default_rng([seed, 0])
+    return pd.DataFrame({
+        'Restaurant Name': _names(n_restaurants, NAME_PREFIXES, NAME_SUFFIXES),
+        'Zip Code': _zip_codes(n_zip_codes)[rng.integers(0, n_zip_codes, n_restaurants)].astype(str),
+        'level': rng.uniform(120, 380, n_restaurants),
+    })
+
+
+# Rows in the schema of foot_traffic_data.py's sample: traffic, inventory and staffing per restaurant per day
+def generate_restaurant_traffic(n_restaurants=10, n_zip_codes=len(SAN_JOSE_ZIP_CODES), start="2023-10-01", days=30,
+                                seed=0, entities=None, shard=0):
+    entities = restaurant_entities(n_restaurants, n_zip_codes, seed) if entities is None else entities
+    rng = np.random.default_rng([seed, 3, shard])
+    dates = pd.date_range(start=start, periods=days, freq='D')
+    n = len(entities)
+
+    volume = np.clip(np.rint(entities['level'].to_numpy()[:, np.newaxis] * _daily_factor(dates, rng, n, 0.2)),
+                     50, 500).astype(np.int64).T.ravel()
+    date_idx = np.repeat(np.arange(days), n)
+    entity_idx = np.tile(np.arange(n), days)
+
+    return pd.DataFrame({
+        'Date': dates[date_idx],
+        'Day': DAY_NAMES[dates.dayofweek.to_numpy()][date_idx],
+        'Restaurant Name': entities['Restaurant Name'].to_numpy()[entity_idx],
+        'Zip Code': entities['Zip Code'].to_numpy()[entity_idx],
+        'Foot Traffic Volume': volume,
+        'Inventory Used': np.rint(volume * rng.uniform(0.3, 0.6, len(volume))).astype(np.int64),
+        'Staffing Hours': (volume * rng.uniform(0.05, 0.15, len(volume))).round(2),
+    })
+
+
+# Fixed attributes of every retail store: name, traffic level and how popular each aisle is
+def store_entities(n_stores, n_aisles=11, seed=0):
+    rng = np.random.default_rng([seed, 0])
+    popularity = rng.dirichlet(np.full(n_aisles, 2.0), n_stores) * n_aisles
+    entities = pd.DataFrame({
+        'Store': _names(n_stores, NAME_PREFIXES, STORE_KINDS),
+        'level': rng.uniform(5, 40, n_stores),
+    })
+    for aisle in range(n_aisles):
+        entities[f'popularity {aisle}'] = popularity[:, aisle]
+    return entities
+
+
+# Hourly aisle heat data in the schema of Feature2's heatmapData.csv plus the store name: one row per store per hour
+# ('Store', 'timestamp', 'Aisle 0' .. 'Aisle n-1'), grouped by store
+def generate_aisle_traffic(n_stores=100, n_aisles=11, start="2024-10-27", days=28, seed=0, entities=None, shard=0):
+    entities = store_entities(n_stores, n_aisles, seed) if entities is None else entities
+    rng = np.random.default_rng([seed, 4, shard])
+    dates = pd.date_range(start=start, periods=days, freq='D')
+    hours = pd.date_range(start=start, periods=days * 24, freq='h')
+    n = len(entities)
+
+    popularity = entities[[f'popularity {aisle}' for aisle in range(n_aisles)]].to_numpy()
+    # (store, hour) traffic: daily factor spread over the hours of each day, then split across aisles
+    hourly = np.repeat(_daily_factor(dates, rng, n, 0.2), 24, axis=1) * np.tile(HOURLY_PROFILE, days)
+    volume = (entities['level'].to_numpy()[:, np.newaxis, np.newaxis] * hourly[:, :, np.newaxis]
+              * popularity[:, np.newaxis, :] * rng.lognormal(0, 0.3, size=(n, len(hours), n_aisles)))
+
+    rows = pd.DataFrame(np.rint(volume).astype(np.int64).reshape(n * len(hours), n_aisles),
+                        columns=[f'Aisle {aisle}' for aisle in range(n_aisles)])
+    rows.insert(0, 'timestamp', np.tile(hours.to_numpy(), n))
+    rows.insert(0, 'Store', np.repeat(entities['Store'].to_numpy(), len(hours)))
+    return rows
+
+
+# kind -> (entity table builder, row generator, entity count parameter)
+GENERATORS = {
+    'business': (business_entities, generate_business_data, 'n_businesses'),
+    'corridor': (corridor_entities, generate_corridor_traffic, 'n_corridors'),
+    'restaurant': (restaurant_entities, generate_restaurant_traffic, 'n_restaurants'),
+    'aisle': (store_entities, generate_aisle_traffic, 'n_stores'),
+}
+
+
+def _write_shard(kind, shard, bounds, params, path):
+    make_entities, generate, count = GENERATORS[kind]
+    entity_params = {key: value for key, value in params.items() if key in ('n_zip_codes', 'n_aisles', 'seed')}
+    entities = make_entities(params[count], **entity_params).iloc[bounds[0]:bounds[1]]
+    generate(**params, entities=entities, shard=shard).to_csv(path, index=False)
+    return path
+
+
+# Write a dataset as CSV shards (each a subset of the entities over every day) from a process pool.
+# Returns the shard paths in order; concatenating them gives the whole dataset.
+def write_shards(kind, out_dir, shards=None, workers=None, **params):
+    _, _, count = GENERATORS[kind]
+    n_entities = params[count]
+    if shards is None:
+        rows = n_entities * params.get('days', 365) * (24 if kind == 'aisle' else 1)
+        shards = max(1, min(n_entities, -(-rows // SHARD_ROWS)))
+    edges = np.linspace(0, n_entities, shards + 1).astype(int)
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"{kind}-{i:05d}.csv") for i in range(shards)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_write_shard, kind, i, (edges[i], edges[i + 1]), params, path)
+                   for i, path in enumerate(paths)]
+        for future in futures:
+            future.result()
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic datasets without any network use.")
+    parser.add_argument("kind", choices=list(GENERATORS))
+    parser.add_argument("--out", default="synthetic", help="Output directory for the CSV shards")
+    parser.add_argument("--businesses", type=int, default=1000)
+    parser.add_argument("--corridors", type=int, default=33)
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--stores", type=int, default=100)
+    parser.add_argument("--aisles", type=int, default=11)
+    parser.add_argument("--zip-codes", type=int, default=len(SAN_JOSE_ZIP_CODES))
+    parser.add_argument("--start", help="First date (default: the start date of the matching real file)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shards", type=int, help=f"Number of files (default: about {SHARD_ROWS:,} rows each)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    params = {'days': args.days, 'seed': args.seed}
+    if args.start:
+        params['start'] = args.start
+    if args.kind == 'business':
+        params.update(n_businesses=args.businesses, n_zip_codes=args.zip_codes)
+    elif args.kind == 'corridor':
+        params.update(n_corridors=args.corridors)
+    elif args.kind == 'aisle':
+        params.update(n_stores=args.stores, n_aisles=args.aisles)
+    else:
+        params.update(n_restaurants=args.restaurants, n_zip_codes=args.zip_codes)
+
+    paths = write_shards(args.kind, args.out, shards=args.shards, workers=args.workers, **params)
+    print(f"Wrote {len(paths)} shard(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import base64
+import http.server
+import io
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+# The app's modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Local HTTP stand-in for a remote server. respond(request) gets the handler (path, headers, and the request body
+# as request.body) and returns (status, headers, body); every request is recorded in server.requests.
+class StubServer:
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.body = self.rfile.read(length) if length else b""
+                stub.requests.append(self)
+                status, headers, body = stub.respond(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if isinstance(body, bytes):
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    # An iterable of pieces is streamed until the connection closes
+                    self.end_headers()
+                    for piece in body:
+                        self.wfile.write(piece)
+                        self.wfile.flush()
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(respond):
+        servers.append(StubServer(respond))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def json_response(payload, status=200, headers=None):
+    return status, {'Content-Type': 'application/json', **(headers or {})}, json.dumps(payload).encode()
+
+
+# Local stand-in for the OpenAI API: answers chat and text completions by echoing the last message or prompt,
+# after `delay` seconds, and turns away the first `rate_limited` requests with 429 and a Retry-After header.
+# Streamed chat requests get their reply as server-sent events, one word at a time, and image requests a small PNG.
+# Request bodies are recorded, decoded, in server.bodies.
+@pytest.fixture
+def fake_openai(stub_server):
+    import time
+
+    from PIL import Image
+
+    settings = {'delay': 0.0, 'rate_limited': 0}
+    bodies = []
+    image = io.BytesIO()
+    Image.new("RGB", (64, 64), (120, 90, 60)).save(image, format="PNG")
+
+    def respond(request):
+        body = json.loads(request.body or b"{}")
+        bodies.append(body)
+        if settings['rate_limited'] > 0:
+            settings['rate_limited'] -= 1
+            return json_response({'error': {'message': "Rate limit reached", 'type': 'requests'}}, 429,
+                                 {'Retry-After': '0'})
+        time.sleep(settings['delay'])
+
+        if request.path.endswith('/images/generations'):
+            return json_response({'data': [{'b64_json': base64.b64encode(image.getvalue()).decode('ascii')}]})
+        if request.path.endswith('/chat/completions'):
+            reply = f"Reply to: {body['messages'][-1]['content']}"
+            if body.get('stream'):
+                events = [{'choices': [{'delta': {'content': word}, 'index': 0}]}
+                          for word in reply.split(" ")[:1] + [" " + word for word in reply.split(" ")[1:]]]
+                pieces = [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+                return 200, {'Content-Type': 'text/event-stream'}, pieces
+            return json_response({'object': 'chat.completion',
+                                  'choices': [{'message': {'role': 'assistant', 'content': reply}, 'index': 0}],
+                                  'usage': {'prompt_tokens': 5, 'completion_tokens': 5}})
+        return json_response({'object': 'text_completion',
+                              'choices': [{'text': f" Completion of: {body['prompt']}", 'index': 0}],
+                              'usage': {'prompt_tokens': 5, 'completion_tokens': 5}})
+
+    server = stub_server(respond)
+    server.settings = settings
+    server.bodies = bodies
+    server.api_base = f"{server.url}/v1"
+    return server
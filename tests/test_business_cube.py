@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import derived_store
+from business_cube import (build_cube, business_rows, chunk_spatial_indexes, combine_spatial_indexes, daily_traffic,
+                           load_cube, rows_at)
+from datasets import read_business_data
+from synthetic_data import generate_business_data
+from time_index import business_time_indexes
+
+
+def test_appended_rows_match_a_full_build(tmp_path):
+    csv_file, cache_dir = tmp_path / "business.csv", str(tmp_path / "cache")
+    lines = generate_business_data(n_businesses=40, n_zip_codes=5, seed=3).to_csv(index=False).splitlines(keepends=True)
+    csv_file.write_text("".join(lines[:2000]))
+    derived_store._payloads.clear()
+    load_cube(str(csv_file), cache_dir)
+
+    for start in range(2000, len(lines), 1500):
+        with open(csv_file, "a") as f:
+            f.write("".join(lines[start:start + 1500]))
+        cube = load_cube(str(csv_file), cache_dir)
+
+    # Chunks stay few, each merged into the one before it once that one is no bigger
+    sizes = [len(chunk['rows']) for chunk in cube['chunks']]
+    assert sizes == sorted(sizes, reverse=True) and 1 < len(sizes) < 5
+
+    full = build_cube(read_business_data(str(csv_file)))
+    assert daily_traffic(cube).equals(daily_traffic(full))
+    assert cube['by_type_zip'].equals(full['by_type_zip'])
+    assert cube['top_type_by_zip'].equals(full['top_type_by_zip'])
+    for business_type in full['business_types']:
+        for zip_code in full['zip_codes']:
+            pd.testing.assert_frame_equal(business_rows(cube, business_type, zip_code),
+                                          business_rows(full, business_type, zip_code))
+
+    # Days some rows of which came in a later chunk count once in the averages
+    indexes, full_indexes = business_time_indexes(cube), business_time_indexes(full)
+    for name, index in indexes.items():
+        pd.testing.assert_series_equal(index.totals().sort_index(), full_indexes[name].totals().sort_index())
+        pd.testing.assert_series_equal(index.means().sort_index(), full_indexes[name].means().sort_index())
+
+    # Positions found in the chunks' spatial indexes read the same rows as in a single index
+    everything, by_type = combine_spatial_indexes(cube, [chunk_spatial_indexes(chunk) for chunk in cube['chunks']])
+    positions, distances = everything.within_radius(37.33, -121.88, 3000)
+    full_everything, _ = combine_spatial_indexes(full, [chunk_spatial_indexes(chunk) for chunk in full['chunks']])
+    full_positions, full_distances = full_everything.within_radius(37.33, -121.88, 3000)
+    assert np.allclose(distances, full_distances)
+    assert sorted(rows_at(cube, positions)['Foot Traffic Volume']) == \
+        sorted(rows_at(full, full_positions)['Foot Traffic Volume'])
+    business_type = full['business_types'][0]
+    nearest, _ = by_type[business_type].nearest(37.33, -121.88, k=5)
+    assert len(nearest) == 5 and (rows_at(cube, nearest)['Business Type'] == business_type).all()
+
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import asset_store
+import llm_gateway
+from conversation_memory import CHARS_PER_TOKEN, MEMORY_TOKENS
+from llm_cache import LLMCache
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# The chatbot page end to end, with every OpenAI request sent to the local fake server
+@pytest.fixture
+def chatbot(fake_openai, tmp_path, monkeypatch):
+    monkeypatch.chdir(REPO_DIR)
+    monkeypatch.setattr(llm_gateway, "_gateway", llm_gateway.LLMGateway(
+        cache=LLMCache(path=str(tmp_path / "llm.sqlite3")), api_base=fake_openai.api_base, api_key="test-key"))
+    monkeypatch.setattr(asset_store, "get_image_store",
+                        lambda: asset_store.ImageAssetStore(directory=str(tmp_path / "images")))
+    return AppTest.from_file(os.path.join(REPO_DIR, "chatbot.py"), default_timeout=60).run()
+
+
+def test_long_chats_keep_the_prompt_bounded_and_grounded(chatbot, fake_openai):
+    assert not chatbot.exception
+    for i in range(12):
+        chatbot.text_input[0].set_value(f"Question {i}: what about the lease and foot traffic at Eastridge "
+                                        f"for a {i + 1},000 sq ft cafe? " * 3).run()
+        assert not chatbot.exception
+
+    replies = [body for body in fake_openai.bodies if body.get('stream')]
+    assert len(replies) == 12
+    assert chatbot.session_state['memory'].summary
+
+    # Older turns are folded into the summary, so the history sent never outgrows the memory budget
+    sizes = [sum(len(message['content']) for message in body['messages']) for body in replies]
+    assert max(sizes) - sizes[0] <= MEMORY_TOKENS * CHARS_PER_TOKEN
+    assert chatbot.session_state['memory'].tokens() <= MEMORY_TOKENS
+
+    # Every question is sent with the local data rows that match it
+    assert all("Eastridge" in body['messages'][0]['content'] for body in replies)
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+import derived_store
+from derived_store import ChunkMemo, append_chunk, load_incremental, read_rows
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    return tmp_path / "traffic.csv"
+
+
+# Loads the values of the 'n' column of the file, with a count of the ingest calls
+def load(csv_file, calls=None):
+    def ingest(source, value):
+        if calls is not None:
+            calls.append(value is None)
+        return (value or []) + pd.read_csv(source)['n'].tolist()
+
+    return load_incremental(str(csv_file), 'values', 1, ingest, str(csv_file.parent / "cache"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_payloads():
+    derived_store._payloads.clear()
+
+
+def test_full_read_keeps_a_last_row_without_line_break(csv_file):
+    csv_file.write_bytes(b"n\n1\n2")
+    source, end, terminated = read_rows(str(csv_file))
+    assert pd.read_csv(source)['n'].tolist() == [1, 2]
+    assert (end, terminated) == (5, False)
+    assert load(csv_file) == [1, 2]
+
+
+def test_rows_appended_after_an_unterminated_row_are_ingested_on_their_own(csv_file):
+    csv_file.write_bytes(b"n\n1\n2")
+    assert load(csv_file) == [1, 2]
+
+    calls = []
+    with open(csv_file, "ab") as f:
+        f.write(b"\n3\n")
+    assert load(csv_file, calls) == [1, 2, 3]
+    assert calls == [False]
+
+
+def test_an_extended_unterminated_row_rebuilds(csv_file):
+    csv_file.write_bytes(b"n\n1\n2")
+    assert load(csv_file) == [1, 2]
+
+    calls = []
+    with open(csv_file, "ab") as f:
+        f.write(b"5\n6\n")
+    assert load(csv_file, calls) == [1, 25, 6]
+    assert calls == [True]
+
+
+def test_an_appended_row_still_being_written_waits_for_its_line_break(csv_file):
+    csv_file.write_bytes(b"n\n1\n")
+    assert load(csv_file) == [1]
+    with open(csv_file, "ab") as f:
+        f.write(b"2\n3")
+    assert load(csv_file) == [1, 2]
+    with open(csv_file, "ab") as f:
+        f.write(b"4\n")
+    assert load(csv_file) == [1, 2, 34]
+
+
+def test_store_is_rewritten_only_as_the_history_grows(csv_file, monkeypatch):
+    csv_file.write_bytes(b"n\n" + b"".join(b"%d\n" % i for i in range(1000)))
+    load(csv_file)
+
+    writes = []
+    monkeypatch.setattr(derived_store, "write_store", lambda path, payload: writes.append(payload['offset']))
+    for i in range(1000, 1010):
+        with open(csv_file, "ab") as f:
+            f.write(b"%d\n" % i)
+        assert load(csv_file)[-1] == i
+    assert writes == []
+
+    # A new process reads the older store back and catches up with the rows appended since
+    derived_store._payloads.clear()
+    assert load(csv_file) == list(range(1010))
+
+
+def test_chunk_values_are_only_built_for_new_and_merged_chunks():
+    built = []
+    memo = ChunkMemo(lambda chunk, earlier: built.append(list(chunk)) or sum(chunk) + sum(earlier))
+    chunks = []
+    for item in [4, 3, 2, 1]:
+        chunks = append_chunk(chunks, [item], len, lambda previous, last: previous + last)
+        values = memo('numbers', chunks)
+
+    # [4] + [3], then [2] on its own, then [2] + [1] and [4, 3] + [2, 1]
+    assert chunks == [[4, 3, 2, 1]] and values == [10]
+    assert built == [[4], [4, 3], [2], [4, 3, 2, 1]]
+    assert memo('numbers', chunks) == [10] and len(built) == 4
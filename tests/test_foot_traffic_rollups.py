@@ -0,0 +1,52 @@
+import pandas as pd
+
+import derived_store
+from datasets import read_foot_traffic
+from foot_traffic_rollups import build_rollups, ingest_rows, load_rollup_state
+from synthetic_data import generate_corridor_traffic
+from time_index import corridor_time_index
+
+HEADER = "Business Corridor,Address,Day,Date,Foot Traffic Volume\n"
+
+
+def test_rows_with_an_unparseable_date_are_left_out(tmp_path):
+    csv_file, cache_dir = tmp_path / "traffic.csv", str(tmp_path / "cache")
+    csv_file.write_text(HEADER + "Santana Row,377 Santana Row,Sunday,1/1/2023,956\n"
+                                 "Santana Row,377 Santana Row,Monday,1/2/2023,3235\n")
+    derived_store._payloads.clear()
+    load_rollup_state(str(csv_file), cache_dir)
+
+    with open(csv_file, "a") as f:
+        f.write("Santana Row,377 Santana Row,Tuesday,not a date,500\n"
+                "Japantown,Jackson St,Tuesday,??,70\n"
+                "Japantown,Jackson St,Wednesday,1/4/2023,80\n")
+    state = load_rollup_state(str(csv_file), cache_dir)
+
+    assert set(state['rollups']) == {'Santana Row', 'Japantown'}
+    assert state['rollups']['Santana Row']['total_per_year'] == 956 + 3235
+    assert state['rollups']['Japantown']['total_per_year'] == 80
+    full = build_rollups(read_foot_traffic(str(csv_file)))
+    for corridor, rollup in full.items():
+        for name, value in rollup.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(state['rollups'][corridor][name], value)
+            else:
+                assert state['rollups'][corridor][name] == value
+
+
+def test_days_appended_one_at_a_time_only_add_small_chunks():
+    rows = generate_corridor_traffic(n_corridors=5, days=60, seed=2).sort_values('Date', kind='stable')
+    state = None
+    for _, day in rows.groupby('Date'):
+        state = ingest_rows(state, day)
+
+    # One day of every corridor is a chunk of 5 entries; chunks merge once the one before them is no bigger
+    sizes = [len(chunk) for chunk in state['by_date']]
+    assert sizes == sorted(sizes, reverse=True) and sum(sizes) == 300 and len(sizes) <= 6
+
+    full = ingest_rows(None, rows)
+    index, full_index = corridor_time_index(state['by_date']), corridor_time_index(full['by_date'])
+    pd.testing.assert_series_equal(index.totals().sort_index(), full_index.totals().sort_index())
+    pd.testing.assert_series_equal(index.means().sort_index(), full_index.means().sort_index())
+    for name, aggregate in full['aggregates'].items():
+        pd.testing.assert_series_equal(state['aggregates'][name], aggregate, check_dtype=False)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from llm_cache import LLMCache
+import llm_gateway
+from llm_gateway import LLMGateway
+
+MESSAGES = [{'role': 'user', 'content': "Which plaza suits a cafe?"}]
+
+
+@pytest.fixture
+def gateway(fake_openai, tmp_path):
+    return LLMGateway(cache=LLMCache(path=str(tmp_path / "llm.sqlite3")), api_base=fake_openai.api_base,
+                      api_key="test-key", backoff_base=0.01)
+
+
+def test_rate_limited_requests_are_retried(fake_openai, gateway):
+    fake_openai.settings['rate_limited'] = 2
+    assert asyncio.run(gateway.complete("Foot traffic in 95112")) == "Completion of: Foot traffic in 95112"
+    assert gateway.retries == 2
+    assert len(fake_openai.requests) == 3
+
+
+def test_identical_requests_are_coalesced_and_cached(fake_openai, gateway):
+    fake_openai.settings['delay'] = 0.3
+
+    async def ask_five_times():
+        return await asyncio.gather(*(gateway.chat(MESSAGES) for _ in range(5)))
+
+    assert asyncio.run(ask_five_times()) == ["Reply to: Which plaza suits a cafe?"] * 5
+    assert gateway.coalesced == 4
+    assert len(fake_openai.requests) == 1
+
+    assert asyncio.run(gateway.chat(MESSAGES)) == "Reply to: Which plaza suits a cafe?"
+    assert len(fake_openai.requests) == 1
+
+
+def test_caller_arriving_after_the_last_waiter_left_gets_its_own_request(gateway):
+    calls = []
+
+    # A request that takes a while to wind down once cancelled, like a connection being closed
+    async def call():
+        calls.append(len(calls))
+        try:
+            await asyncio.sleep(0.2)
+            return f"reply {calls[-1]}"
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.1)
+            raise
+
+    async def cancel_then_ask_again():
+        first = asyncio.ensure_future(gateway._cached("model", "prompt", {}, None, call))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.wait([first])
+        # The abandoned request is still winding down but no longer shared
+        assert gateway.stats()['in_flight'] == 0
+        return await gateway._cached("model", "prompt", {}, None, call)
+
+    assert asyncio.run(cancel_then_ask_again()) == "reply 1"
+    assert gateway.coalesced == 0
+
+
+def test_streamed_replies_arrive_in_pieces(fake_openai, gateway):
+    async def collect():
+        return [piece async for piece in gateway.chat_stream(MESSAGES)]
+
+    pieces = asyncio.run(collect())
+    assert len(pieces) > 1 and "".join(pieces) == "Reply to: Which plaza suits a cafe?"
+
+
+def test_a_cancelled_stream_ends_the_reading_thread(gateway, monkeypatch):
+    async def cancelled_stream(messages, **params):
+        yield "Half a"
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(gateway, "chat_stream", cancelled_stream)
+    monkeypatch.setattr(llm_gateway, "_gateway", gateway)
+    pieces, raised = [], []
+
+    def read():
+        try:
+            pieces.extend(llm_gateway.chat_completion_stream(MESSAGES))
+        except BaseException as e:
+            raised.append(e)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+    assert not reader.is_alive()
+    assert pieces == ["Half a"] and isinstance(raised[0], asyncio.CancelledError)
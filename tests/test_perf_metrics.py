@@ -0,0 +1,46 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import perf_metrics
+
+
+def finished_run(page):
+    run = perf_metrics.Run(page)
+    run.seconds = 0.5
+    return run
+
+
+def test_export_is_off_unless_a_file_is_configured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(perf_metrics, "METRICS_FILE", "")
+    perf_metrics._export(finished_run("footFlow"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_json_lines_file_is_rotated_at_its_size_cap(tmp_path, monkeypatch):
+    path = tmp_path / "perf_metrics.jsonl"
+    monkeypatch.setattr(perf_metrics, "METRICS_FILE_MAX_BYTES", 1000)
+    for _ in range(20):
+        perf_metrics._export(finished_run("footFlow"), str(path))
+
+    assert path.stat().st_size < 1000 + len(json.dumps(finished_run("footFlow").to_dict())) + 1
+    assert (tmp_path / "perf_metrics.jsonl.1").exists()
+    assert json.loads(path.read_text().splitlines()[-1])['page'] == "footFlow"
+
+
+def test_prometheus_label_values_are_escaped(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf_metrics, "_totals", perf_metrics.defaultdict(float))
+    perf_metrics._count('llm_requests_total', model='fine-tuned "v2"\\n\nnext')
+    path = tmp_path / "metrics.prom"
+    perf_metrics.write_prometheus(str(path))
+    assert 'llm_requests_total{model="fine-tuned \\"v2\\"\\\\n\\nnext"} 1' in path.read_text().splitlines()
+
+
+def test_sessions_finishing_together_each_write_the_whole_prometheus_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf_metrics, "_totals", perf_metrics.defaultdict(float))
+    path = tmp_path / "metrics.prom"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: perf_metrics._export(finished_run("footFlow"), str(path)), range(200)))
+
+    assert [file.name for file in tmp_path.iterdir()] == ["metrics.prom"]
+    assert 'page_runs_total{page="footFlow"} 200' in path.read_text().splitlines()
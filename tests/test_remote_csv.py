@@ -0,0 +1,58 @@
+import pytest
+
+from remote_csv import RemoteCSV
+
+
+@pytest.fixture
+def csv_server(stub_server):
+    state = {'content': b"latitude,longitude,weight\n37.33,-121.89,5\n", 'etag': '"v1"'}
+
+    def respond(request):
+        if request.headers.get('If-None-Match') == state['etag']:
+            return 304, {'ETag': state['etag']}, b""
+        return 200, {'ETag': state['etag'], 'Content-Type': 'text/csv'}, state['content']
+
+    server = stub_server(respond)
+    server.state = state
+    return server
+
+
+def test_unchanged_file_is_revalidated_with_its_etag(csv_server, tmp_path):
+    remote = RemoteCSV(f"{csv_server.url}/heat.csv", cache_dir=str(tmp_path))
+    frame = remote.load()
+    assert frame['weight'].tolist() == [5]
+
+    assert remote.revalidate() is False
+    assert csv_server.requests[-1].headers['If-None-Match'] == '"v1"'
+    assert remote.load() is frame
+
+    csv_server.state.update(content=b"latitude,longitude,weight\n37.33,-121.89,7\n", etag='"v2"')
+    assert remote.revalidate() is True
+    assert remote.load()['weight'].tolist() == [7]
+
+
+def test_offline_serves_the_last_snapshot_and_backs_off(csv_server, tmp_path):
+    remote = RemoteCSV(f"{csv_server.url}/heat.csv", cache_dir=str(tmp_path), revalidate_after=0,
+                       failure_backoff=60)
+    remote.load()
+    csv_server.close()
+
+    remote.refresh_in_background().join()
+    assert remote.stale and remote.failures == 1
+
+    # Within the backoff no new check is started, and the snapshot keeps being served
+    thread = remote._refresh_thread
+    assert remote.load()['weight'].tolist() == [5]
+    assert remote._refresh_thread is thread
+
+
+def test_failure_to_store_the_snapshot_is_recorded(csv_server, tmp_path, monkeypatch):
+    remote = RemoteCSV(f"{csv_server.url}/heat.csv", cache_dir=str(tmp_path))
+    remote.load()
+
+    def disk_full(meta):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(remote, "_write_meta", disk_full)
+    remote.refresh_in_background().join()
+    assert isinstance(remote.last_error, OSError) and remote.failures == 1
@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image
+
+from thumbnail_cache import ThumbnailCache
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_images_are_fetched_once_and_downscaled(stub_server, tmp_path):
+    server = stub_server(lambda request: (200, {'Content-Type': 'image/png'}, png(800, 600)))
+    url = f"{server.url}/plaza.png"
+
+    thumbnails = ThumbnailCache(directory=str(tmp_path), size=150)
+    data = thumbnails.get_many([url] * 4)[0]
+    assert Image.open(io.BytesIO(data)).size == (150, 150)
+    assert thumbnails.get(url) == data
+
+    # A new cache (e.g. after a restart) serves the copy on disk
+    assert ThumbnailCache(directory=str(tmp_path), size=150).get(url) == data
+    assert len(server.requests) == 1
+
+
+def test_dead_links_fall_back_to_the_original_url(stub_server, tmp_path):
+    server = stub_server(lambda request: (404, {}, b"not found"))
+    url = f"{server.url}/missing.png"
+
+    thumbnails = ThumbnailCache(directory=str(tmp_path))
+    assert thumbnails.src(url) == url
+    assert thumbnails.src(url) == url
+    assert len(server.requests) == 1
@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from business_cube import build_cube
+from datasets import read_business_data
+from time_index import ChunkedTimeIndex, TimeIndex, business_time_indexes
+
+BUSINESS_CSV = """Date,Business Name,Business Type,Zip Code,Latitude,Longitude,Foot Traffic Volume,Duration of Stay,Peak Foot Traffic Time,Traffic Trend (Week),Traffic Trend (Month)
+2024-01-01,Taste Corner,Store,95116,37.39,-121.81,100,01:53,Morning,3.29,-5.64
+2024-01-02,Taste Corner,Store,95116,37.39,-121.81,200,01:53,Morning,3.29,-5.64
+not a date,Taste Corner,Store,95116,37.39,-121.81,999,01:53,Morning,3.29,-5.64
+2024-01-09,Deli Delight,Restaurant,95125,37.35,-121.87,50,00:08,Evening,9.59,15.52
+"""
+
+
+def test_range_totals_and_rolling_windows():
+    dates = pd.date_range('2024-01-01', periods=21)
+    index = TimeIndex(['a'] * 21, dates, np.arange(21))
+    assert index.total('a') == np.arange(21).sum()
+    assert index.total('a', '2024-01-03', '2024-01-05') == 2 + 3 + 4
+    assert index.rolling_mean('a', '2024-01-21', 7) == np.arange(14, 21).mean()
+    assert index.week_over_week('a', '2024-01-21') == (np.arange(14, 21).sum() / np.arange(7, 14).sum() - 1) * 100
+    assert index.total('missing') == 0
+    assert np.isnan(index.mean('a', '2030-01-01', '2030-02-01'))
+
+
+def test_readings_without_date_or_entity_are_left_out():
+    dates = pd.DatetimeIndex(['2024-01-01', pd.NaT, '2024-01-03', '2024-01-03'])
+    index = TimeIndex(pd.Index(['a', 'a', None, 'b']), dates, [1, 2, 3, 4])
+    assert list(index.entities) == ['a', 'b']
+    assert (index.first, index.last) == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+    assert index.total('a') == 1 and index.total('b') == 4
+
+
+def test_business_indexes_tolerate_unparseable_dates():
+    indexes = business_time_indexes(build_cube(read_business_data(io.StringIO(BUSINESS_CSV))))
+    assert indexes['business'].total(('Store', 95116, 'Taste Corner')) == 300
+    assert indexes['type_zip'].total(('Store', 95116), '2024-01-02', '2024-01-02') == 200
+    assert indexes['zip'].total(95125) == 50
+
+
+def test_chunks_count_a_day_with_readings_in_several_of_them_once():
+    first = TimeIndex(pd.Index(['a', 'a']), pd.DatetimeIndex(['2024-01-01', '2024-01-02']), [10, 20])
+    second = TimeIndex(pd.Index(['a', 'b']), pd.DatetimeIndex(['2024-01-02', '2024-01-03']), [30, 5], [first])
+    index = ChunkedTimeIndex([first, second])
+    assert list(index.entities) == ['a', 'b']
+    assert (index.first, index.last) == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+    assert index.total('a') == 60 and index.mean('a') == 30
+    assert index.total('a', '2024-01-02', '2024-01-02') == 50
+    assert index.means().to_dict() == {'a': 30.0, 'b': 5.0}
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from traffic_forecast import fit, forecast
+
+
+def corridor_traffic(volumes):
+    dates = pd.date_range('2023-01-02', periods=28)
+    return pd.DataFrame({
+        'Business Corridor': np.repeat(list(volumes), len(dates)),
+        'Date': np.tile(dates, len(volumes)),
+        'Foot Traffic Volume': np.concatenate([np.broadcast_to(v, len(dates)) for v in volumes.values()]),
+    })
+
+
+def test_forecast_follows_the_fitted_level():
+    traffic = forecast(fit(corridor_traffic({'Busy': 1000.0})), '2023-02-06', 7)
+    assert (traffic['Foot Traffic Volume'] == 1000).all()
+    assert (traffic['Inventory Needed'] == 500).all()
+
+
+def test_corridors_without_traffic_forecast_zero():
+    model = fit(corridor_traffic({'Busy': 1000.0, 'Closed': 0.0, 'Unknown': np.nan}))
+    traffic = forecast(model, '2023-02-06', 7).set_index('Business Corridor')
+    for corridor in ['Closed', 'Unknown']:
+        assert (traffic.loc[corridor, 'Foot Traffic Volume'] == 0).all()
+        assert (traffic.loc[corridor, 'Inventory Needed'] == 0).all()
+    assert (traffic.loc['Busy', 'Foot Traffic Volume'] == 1000).all()
+
+
+def test_readings_with_an_unparseable_date_are_left_out():
+    traffic = corridor_traffic({'Busy': 1000.0})
+    traffic['Date'] = traffic['Date'].astype(object)
+    traffic.loc[3, ['Date', 'Foot Traffic Volume']] = ['not a date', 50_000.0]
+    traffic.loc[4, 'Date'] = pd.NaT
+    forecasts = forecast(fit(traffic), '2023-02-06', 7)
+    assert (forecasts['Foot Traffic Volume'] == 1000).all()
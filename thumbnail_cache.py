@@ -0,0 +1,95 @@
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import io
+import os
+import threading
+
+import requests
+from PIL import Image
+
+from asset_store import write_atomic
+
+# Where downscaled listing images are kept
+THUMBNAIL_DIR = os.path.join(".cache", "thumbnails")
+THUMBNAIL_SIZE = 150  # Square thumbnail edge in pixels, matching the results table
+REQUEST_TIMEOUT = 10
+MAX_MEMORY_ITEMS = 256
+FETCH_WORKERS = 8
+
+
+# Fetch each remote image once, downscale it and serve the small copy from memory or disk
+class ThumbnailCache:
+    def __init__(self, directory=THUMBNAIL_DIR, size=THUMBNAIL_SIZE, timeout=REQUEST_TIMEOUT,
+                 max_memory_items=MAX_MEMORY_ITEMS, workers=FETCH_WORKERS):
+        self.directory = directory
+        self.size = size
+        self.timeout = timeout
+        self.max_memory_items = max_memory_items
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._session = requests.Session()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(f"{self.size}\n{url}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    # JPEG thumbnail bytes for an image URL, or None when the image cannot be fetched or decoded
+    def get(self, url):
+        with self._lock:
+            if url in self._memory:
+                self._memory.move_to_end(url)
+                return self._memory[url]
+
+        path = self._path(url)
+        with self._key_locks[path]:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+            else:
+                # Failures are remembered in memory too, so a dead link doesn't cost a timeout on every rerun
+                data = self._fetch(url)
+                if data is not None:
+                    write_atomic(path, data)
+
+        with self._lock:
+            self._memory[url] = data
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+        return data
+
+    def _fetch(self, url):
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content)).convert("RGB")
+        except (requests.RequestException, OSError):
+            return None
+
+        # Crop to a centered square, then downscale, so thumbnails aren't distorted like a stretched <img>
+        edge = min(image.size)
+        left, top = (image.width - edge) // 2, (image.height - edge) // 2
+        image = image.crop((left, top, left + edge, top + edge)).resize((self.size, self.size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80, optimize=True)
+        return buffer.getvalue()
+
+    # Thumbnails for many URLs, fetched concurrently; result order follows urls
+    def get_many(self, urls):
+        return list(self._pool.map(self.get, urls))
+
+    # Start fetching thumbnails in the background (e.g. for the next page) without waiting
+    def prefetch(self, urls):
+        for url in urls:
+            self._pool.submit(self.get, url)
+
+    # Inline data URI for a thumbnail, falling back to the original URL when it couldn't be cached
+    def src(self, url, data=None):
+        data = self.get(url) if data is None else data
+        if data is None:
+            return url
+        return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
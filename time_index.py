@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from derived_store import ChunkMemo
+
+DAY = pd.Timedelta(days=1)
+
+
+# Daily traffic of many entities (businesses, corridors, zip codes, ...) as running totals over one dense daily
+# axis. Every entity keeps the cumulative volume and the cumulative number of days with a reading up to each day,
+# so the total or the average of any date range is the difference of two entries, whatever the length of the range.
+class TimeIndex:
+    # keys labels the entity of every reading (values of an Index, a MultiIndex for compound keys), dates its day
+    # and values its volume; readings of the same entity and day are added up. Readings without a date (unparseable
+    # dates are read as NaT) or without a complete entity label are left out. A day that one of the `earlier`
+    # indexes already has a reading for isn't counted as a day with a reading again (see ChunkedTimeIndex).
+    def __init__(self, keys, dates, values, earlier=()):
+        keys = keys if isinstance(keys, pd.Index) else pd.Index(keys)
+        dates = pd.DatetimeIndex(dates).normalize()
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+
+        labelled = keys.to_frame().notna().all(axis=1).to_numpy() if isinstance(keys, pd.MultiIndex) else keys.notna()
+        valid = np.asarray(labelled) & ~np.asarray(dates.isna())
+        keys, dates, values = keys[valid], dates[valid], values[valid]
+
+        codes, entities = keys.factorize()
+        self.entities = entities.set_names(keys.names)
+
+        if len(dates):
+            self.first, self.last = dates.min(), dates.max()
+        else:
+            self.first = self.last = pd.Timestamp.today().normalize()
+        days = (self.last - self.first) // DAY + 1
+        offsets = np.asarray((dates - self.first) // DAY, dtype=np.int64)
+
+        volume = np.zeros((len(self.entities), days))
+        np.add.at(volume, (codes, offsets), values)
+        counted = np.ones(len(codes), dtype=bool)
+        for index in earlier:
+            counted &= ~index.has_readings(keys, dates)
+        readings = np.zeros((len(self.entities), days), dtype=np.int64)
+        np.add.at(readings, (codes[counted], offsets[counted]), 1)
+
+        # Column d holds the running totals of the days before first + d, so column 0 is all zeros
+        self.volume = np.zeros((len(self.entities), days + 1))
+        np.cumsum(volume, axis=1, out=self.volume[:, 1:])
+        self.days_with_readings = np.zeros((len(self.entities), days + 1), dtype=np.int64)
+        np.cumsum(readings > 0, axis=1, out=self.days_with_readings[:, 1:])
+
+    def __contains__(self, entity):
+        return entity in self.entities
+
+    # Whether the entity of every reading (keys and dates as for the constructor) has a reading on its day
+    def has_readings(self, keys, dates):
+        rows = self.entities.get_indexer(keys)
+        offsets = np.asarray((dates - self.first) // DAY, dtype=np.int64)
+        found = (rows >= 0) & (offsets >= 0) & (offsets < self.volume.shape[1] - 1)
+        rows, offsets = rows[found], offsets[found]
+        had = np.zeros(len(found), dtype=bool)
+        had[found] = self.days_with_readings[rows, offsets + 1] > self.days_with_readings[rows, offsets]
+        return had
+
+    # Columns of the running totals bounding the days from start to end (both included, None for open-ended),
+    # clipped to the axis
+    def _columns(self, start=None, end=None):
+        days = self.volume.shape[1] - 1
+        lo = 0 if start is None else min(days, max(0, (pd.Timestamp(start).normalize() - self.first) // DAY))
+        hi = days if end is None else min(days, max(lo, (pd.Timestamp(end).normalize() - self.first) // DAY + 1))
+        return lo, hi
+
+    # Start of the window of `days` days ending at end (the last day when None)
+    def _window_start(self, end, days):
+        return (self.last if end is None else pd.Timestamp(end).normalize()) - (days - 1) * DAY
+
+    # Total volume and number of days with a reading of one entity from start to end
+    def _sums(self, entity, start=None, end=None):
+        if entity not in self.entities:
+            return 0.0, 0
+        row = self.entities.get_loc(entity)
+        lo, hi = self._columns(start, end)
+        return (self.volume[row, hi] - self.volume[row, lo],
+                self.days_with_readings[row, hi] - self.days_with_readings[row, lo])
+
+    # Total volume and number of days with a reading of every entity from start to end, indexed like the entities
+    def _all_sums(self, start=None, end=None):
+        lo, hi = self._columns(start, end)
+        return (pd.Series(self.volume[:, hi] - self.volume[:, lo], index=self.entities),
+                pd.Series(self.days_with_readings[:, hi] - self.days_with_readings[:, lo], index=self.entities))
+
+    # Total volume of one entity from start to end; 0 for an entity without readings
+    def total(self, entity, start=None, end=None):
+        return float(self._sums(entity, start, end)[0])
+
+    # Average volume per day with a reading from start to end; NaN when there is none
+    def mean(self, entity, start=None, end=None):
+        volume, days = self._sums(entity, start, end)
+        return float(volume / days) if days else np.nan
+
+    # Average over the `days` days ending at end, e.g. the rolling 7-day and 28-day averages
+    def rolling_mean(self, entity, end=None, days=7):
+        return self.mean(entity, self._window_start(end, days), end)
+
+    # Percent change of the total of the week ending at end over the week before it; NaN when that week had none
+    def week_over_week(self, entity, end=None):
+        start = self._window_start(end, 7)
+        previous = self.total(entity, start - 7 * DAY, start - DAY)
+        return (self.total(entity, start, end) / previous - 1) * 100 if previous else np.nan
+
+    # Total volume of every entity from start to end, indexed like the entities
+    def totals(self, start=None, end=None):
+        return self._all_sums(start, end)[0]
+
+    # Average volume per day with a reading of every entity from start to end; NaN for those without one
+    def means(self, start=None, end=None):
+        volume, days = self._all_sums(start, end)
+        return volume / days.where(days > 0)
+
+    # Range total, rolling 7-day and 28-day averages and week-over-week change of one entity (the windows end
+    # at end), labelled and formatted as the pages show them
+    def summary(self, entity, start=None, end=None):
+        return {
+            'Total in range': _format_count(self.total(entity, start, end)),
+            'Rolling 7-day average': _format_count(self.rolling_mean(entity, end, 7)),
+            'Rolling 28-day average': _format_count(self.rolling_mean(entity, end, 28)),
+            'Week over week': _format_change(self.week_over_week(entity, end)),
+        }
+
+
+# Time index over readings kept in chunks (see derived_store.append_chunk), from one TimeIndex per chunk, each built
+# with the chunks before it as `earlier`. Queries add up the answers of the chunks, so a new chunk is indexed on its
+# own and the indexes of the others are kept as they are.
+class ChunkedTimeIndex(TimeIndex):
+    def __init__(self, parts):
+        self.parts = [part for part in parts if len(part.entities)]
+        if not self.parts:
+            self.parts = list(parts[:1]) or [TimeIndex(pd.Index([]), pd.DatetimeIndex([]), [])]
+        entities = self.parts[0].entities
+        for part in self.parts[1:]:
+            entities = entities.append(part.entities[~part.entities.isin(entities)])
+        self.entities = entities
+        self.first = min(part.first for part in self.parts)
+        self.last = max(part.last for part in self.parts)
+
+    def _sums(self, entity, start=None, end=None):
+        sums = [part._sums(entity, start, end) for part in self.parts]
+        return sum(volume for volume, _ in sums), sum(days for _, days in sums)
+
+    def _all_sums(self, start=None, end=None):
+        volume, days = pd.Series(0.0, index=self.entities), pd.Series(0, index=self.entities)
+        for part in self.parts:
+            part_volume, part_days = part._all_sums(start, end)
+            volume = volume.add(part_volume, fill_value=0)
+            days = days.add(part_days, fill_value=0)
+        return volume.reindex(self.entities), days.reindex(self.entities).astype(np.int64)
+
+
+def _format_count(value):
+    return "n/a" if np.isnan(value) else f"{value:,.0f}"
+
+
+def _format_change(value):
+    return "n/a" if np.isnan(value) else f"{value:+.1f}%"
+
+
+# Time indexes of one chunk of the business traffic cube (see business_cube): one per business (type, zip code and
+# name, so businesses sharing a name stay apart), one per (business type, zip code) and one per zip code
+def business_chunk_indexes(chunk, earlier=()):
+    rows = chunk['rows'].reset_index(drop=True)
+    daily = chunk['daily']['volume']
+    dates = daily.index.get_level_values('Date')
+    earlier = {name: [indexes[name] for indexes in earlier] for name in ('business', 'type_zip', 'zip')}
+    return {
+        'business': TimeIndex(pd.MultiIndex.from_frame(rows[['Business Type', 'Zip Code', 'Business Name']]),
+                              rows['Date'], rows['Foot Traffic Volume'], earlier['business']),
+        'type_zip': TimeIndex(daily.index.droplevel('Date'), dates, daily, earlier['type_zip']),
+        'zip': TimeIndex(daily.index.get_level_values('Zip Code'), dates, daily, earlier['zip']),
+    }
+
+
+# Business, (business type, zip code) and zip code time indexes over the whole cube from the indexes of its chunks
+def combine_business_indexes(parts):
+    return {name: ChunkedTimeIndex([indexes[name] for indexes in parts]) for name in ('business', 'type_zip', 'zip')}
+
+
+def business_time_indexes(cube):
+    return combine_business_indexes(ChunkMemo(business_chunk_indexes)(None, cube['chunks']))
+
+
+# Time index of one chunk of corridor traffic by date (see foot_traffic_rollups)
+def corridor_chunk_index(by_date, earlier=()):
+    return TimeIndex(by_date.index.get_level_values(0), by_date.index.get_level_values('Date'), by_date, earlier)
+
+
+# Time index per business corridor over the chunks of corridor traffic by date
+def corridor_time_index(by_date_chunks):
+    return ChunkedTimeIndex(ChunkMemo(corridor_chunk_index)(None, by_date_chunks))
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from datasets import FOOT_TRAFFIC_FILE, read_foot_traffic
+from derived_store import CACHE_DIR, load_derived
+
+# Bump this whenever the fitted parameters change shape so old stores get refitted
+MODEL_VERSION = 2
+
+# Inventory units per visitor (midpoint of the 0.4-0.6 range the old simulation drew from)
+INVENTORY_PER_VISITOR = 0.5
+
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+
+
+# Fit a multiplicative seasonal model per corridor: level x day-of-week factor x week-of-year factor
+def fit(foot_traffic_data):
+    corridors, corridor_idx = np.unique(foot_traffic_data['Business Corridor'].to_numpy(dtype=object), return_inverse=True)
+    dates = pd.to_datetime(foot_traffic_data['Date'], errors='coerce')
+    volume = pd.to_numeric(foot_traffic_data['Foot Traffic Volume'], errors='coerce').to_numpy(dtype=np.float64)
+    # Readings without a volume or a date (unparseable dates are read as NaT) are left out
+    valid = ~np.isnan(volume) & dates.notna().to_numpy()
+    corridor_idx, volume, dates = corridor_idx[valid], volume[valid], dates[valid]
+    dow = dates.dt.dayofweek.to_numpy()
+    woy = dates.dt.isocalendar().week.to_numpy(dtype=np.int64) - 1
+    n = len(corridors)
+
+    # Level: average daily traffic per corridor. Corridors without any traffic (all zero or no readings) get
+    # level 0 and neutral factors, so they forecast 0.
+    level = _group_mean(corridor_idx, volume, n)
+    level = np.where(level > 0, level, 0.0)
+
+    # Day-of-week factors relative to the level
+    fitted = level[corridor_idx] > 0
+    dow_factor = _group_mean(corridor_idx[fitted] * 7 + dow[fitted], volume[fitted] / level[corridor_idx[fitted]],
+                             n * 7, fill=1.0).reshape(n, 7)
+
+    # Week-of-year factors on what the level and weekday don't explain (weekdays that never see traffic stay at 0)
+    expected = level[corridor_idx] * dow_factor[corridor_idx, dow]
+    fitted = expected > 0
+    residual = volume[fitted] / expected[fitted]
+    woy_factor = _group_mean(corridor_idx[fitted] * 53 + woy[fitted], residual, n * 53, fill=1.0).reshape(n, 53)
+
+    return {
+        'corridors': corridors,
+        'level': level,
+        'dow_factor': dow_factor,
+        'woy_factor': woy_factor,
+    }
+
+
+# Mean of values per integer group id, with fill for groups that have no observations
+def _group_mean(group_ids, values, n_groups, fill=np.nan):
+    sums = np.bincount(group_ids, weights=values, minlength=n_groups)
+    counts = np.bincount(group_ids, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    means[counts == 0] = fill
+    return means
+
+
+# Load the fitted model for a foot traffic file, refitting and saving it only when the file has changed
+def load_model(file_path=FOOT_TRAFFIC_FILE, cache_dir=CACHE_DIR):
+    return load_derived(file_path, 'forecast', MODEL_VERSION, lambda path: fit(read_foot_traffic(path)), cache_dir)
+
+
+# Forecast traffic for the given corridors (default: all) over the given dates as a (corridor x date) array
+def forecast_matrix(model, dates, corridors=None):
+    dates = pd.DatetimeIndex(dates)
+    rows = _corridor_rows(model, corridors)
+    dow = dates.dayofweek.to_numpy()
+    woy = dates.isocalendar().week.to_numpy(dtype=np.int64) - 1
+    return (model['level'][rows, np.newaxis]
+            * model['dow_factor'][rows][:, dow]
+            * model['woy_factor'][rows][:, woy])
+
+
+def _corridor_rows(model, corridors):
+    if corridors is None:
+        return np.arange(len(model['corridors']))
+    rows = np.searchsorted(model['corridors'], corridors)
+    rows = np.clip(rows, 0, len(model['corridors']) - 1)
+    unknown = model['corridors'][rows] != np.asarray(corridors)
+    if unknown.any():
+        raise KeyError(f"Unknown corridors: {np.asarray(corridors)[unknown].tolist()}")
+    return rows
+
+
+# Long-format traffic and inventory forecast for every corridor (or the given ones) from start over periods days
+def forecast(model, start, periods, corridors=None, inventory_per_visitor=INVENTORY_PER_VISITOR):
+    dates = pd.date_range(start=start, periods=periods, freq='D')
+    names = model['corridors'] if corridors is None else np.asarray(corridors)
+    traffic = np.rint(forecast_matrix(model, dates, corridors)).astype(np.int64)
+
+    return pd.DataFrame({
+        'Business Corridor': np.repeat(names, len(dates)),
+        'Date': np.tile(dates, len(names)),
+        'Day': np.tile(DAY_NAMES[dates.dayofweek], len(names)),
+        'Foot Traffic Volume': traffic.ravel(),
+        'Inventory Needed': np.rint(traffic.ravel() * inventory_per_visitor).astype(np.int64),
+    })
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# Only these columns are ever parsed from an uploaded business CSV, with compact dtypes
+USECOLS = ['Latitude', 'Longitude', 'Foot Traffic Volume', 'Zip Code', 'Business Type']
+DTYPES = {
+    'Latitude': 'float32',
+    'Longitude': 'float32',
+    'Zip Code': 'category',
+    'Business Type': 'category',
+}
+CHUNK_ROWS = 250_000
+
+
+# Stream a business CSV in chunks: keeps compact heat map points (float32 coordinates, int32 volume)
+# and running foot traffic sums per (Business Type, Zip Code), so peak memory is one chunk plus the results.
+# on_progress(fraction) is called after every chunk when the total size of the source is known.
+def ingest_business_csv(source, chunksize=CHUNK_ROWS, total_bytes=None, on_progress=None):
+    latitudes, longitudes, volumes = [], [], []
+    totals = None
+
+    for chunk in pd.read_csv(source, usecols=USECOLS, dtype=DTYPES, chunksize=chunksize):
+        volume = pd.to_numeric(chunk['Foot Traffic Volume'], errors='coerce').fillna(0).astype(np.int32)
+
+        latitudes.append(chunk['Latitude'].to_numpy())
+        longitudes.append(chunk['Longitude'].to_numpy())
+        volumes.append(volume.to_numpy())
+
+        # Sum in int64 so totals over many rows cannot overflow
+        chunk_totals = volume.astype(np.int64).groupby([chunk['Business Type'], chunk['Zip Code']], observed=True).sum()
+        chunk_totals.index = chunk_totals.index.set_levels(
+            [level.astype(str) for level in chunk_totals.index.levels])
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0).astype(np.int64)
+
+        if on_progress is not None and total_bytes:
+            on_progress(min(source.tell() / total_bytes, 1.0))
+
+    points = pd.DataFrame({
+        'Latitude': np.concatenate(latitudes) if latitudes else np.empty(0, np.float32),
+        'Longitude': np.concatenate(longitudes) if longitudes else np.empty(0, np.float32),
+        'Foot Traffic Volume': np.concatenate(volumes) if volumes else np.empty(0, np.int32),
+    })
+    if totals is None:
+        totals = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_tuples([], names=['Business Type', 'Zip Code']))
+    totals.name = 'Foot Traffic Volume'
+    return points, totals
+
+
+# Most (or least) popular zip codes for one business type, as a two-column table
+def top_zip_codes(totals, business_type, n=5, largest=True):
+    if business_type in totals.index.get_level_values('Business Type'):
+        by_zip = totals.xs(business_type, level='Business Type')
+    else:
+        by_zip = pd.Series(dtype=np.int64, name='Foot Traffic Volume', index=pd.Index([], name='Zip Code'))
+    by_zip = by_zip.nlargest(n) if largest else by_zip.nsmallest(n)
+    return by_zip.reset_index()
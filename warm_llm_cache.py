@@ -0,0 +1,77 @@
+# Warm the shared LLM response cache ahead of time so pages answer from disk on the first click
+#
+#   python warm_llm_cache.py                      # every plaza, zip code/business type and month
+#   python warm_llm_cache.py --plazas "Santana Row" "Japantown" --zip-codes 95112
+import argparse
+import os
+
+import openai
+import llm_cache
+import llm_gateway
+from business_cube import load_cube
+from datasets import BUSINESS_DATA_FILE, read_plaza_listings
+from llm_prompts import area_insights_prompt, foot_traffic_insight_messages, market_details_messages
+
+openai.api_key = os.getenv('OPENAI_API_KEY')
+
+
+# Print one line per warmed entry, reporting failures without stopping the run
+def report(labels, results):
+    for label, result in zip(labels, results):
+        if isinstance(result, Exception):
+            print(f"Failed to warm {label}: {result}")
+        else:
+            print(f"Warmed {label}")
+
+
+# Same request footFlow.get_market_details sends for a plaza
+def warm_plazas(plazas):
+    plazas = list(plazas)
+    results = llm_gateway.chat_completion_batch([market_details_messages(plaza) for plaza in plazas],
+                                                model="gpt-3.5-turbo", return_exceptions=True,
+                                                max_tokens=500, temperature=0.7)
+    report([f"market details for {plaza}" for plaza in plazas], results)
+
+
+# Same requests areaInsights.generate_insights sends for every business type in the given zip codes
+def warm_zip_codes(zip_codes, csv_file=BUSINESS_DATA_FILE):
+    by_type_zip = load_cube(csv_file)['by_type_zip']
+    selected = by_type_zip.index.get_level_values('Zip Code').astype(str).isin([str(zip_code) for zip_code in zip_codes])
+    totals = by_type_zip[selected].reorder_levels(['Zip Code', 'Business Type'])
+    prompts = [area_insights_prompt(zip_code, business_type, volume) for (zip_code, business_type), volume in totals.items()]
+    results = llm_gateway.completion_batch(prompts, model="gpt-3.5-turbo-instruct", return_exceptions=True,
+                                           max_tokens=150)
+    report([f"insights for {business_type} in {zip_code}" for zip_code, business_type in totals.index], results)
+
+
+# Same request inventory_guide_2.generate_foot_traffic_insight sends for a month
+def warm_months(months):
+    results = llm_gateway.chat_completion_batch([foot_traffic_insight_messages(month) for month in months],
+                                                model="gpt-3.5-turbo", return_exceptions=True, max_tokens=150)
+    report([f"foot traffic insight for month {month}" for month in months], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-populate the shared LLM response cache.")
+    parser.add_argument("--plazas", nargs="*", help="Plaza names (default: every plaza in sanjosedataset.csv)")
+    parser.add_argument("--zip-codes", nargs="*", help="Zip codes (default: every zip in full_year_business_data.csv)")
+    parser.add_argument("--months", nargs="*", default=["10", "11", "12"], help="Months for inventory_guide_2.py")
+    args = parser.parse_args()
+
+    plazas = args.plazas
+    if plazas is None:
+        plazas = read_plaza_listings()['Location Name'].dropna().unique()
+    zip_codes = args.zip_codes
+    if zip_codes is None:
+        zip_codes = load_cube()['zip_codes']
+
+    warm_plazas(plazas)
+    warm_zip_codes(zip_codes)
+    warm_months(args.months)
+
+    print(llm_cache.get_cache().stats())
+    print(llm_gateway.get_gateway().stats())
+
+
+if __name__ == "__main__":
+    main()